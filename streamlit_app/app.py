@@ -5,14 +5,25 @@ This is the main Streamlit app with login functionality.
 
 import streamlit as st
 from streamlit_app.core import (
+    profiled_page,
     init_session_state,
     authenticate_user,
+    check_login_rate_limit,
+    get_client_id,
     set_authenticated_user,
     clear_session,
     get_current_user,
+    is_password_reset_required,
+)
+from streamlit_app.components import (
+    render_footer,
+    render_forced_password_change_form,
+    apply_theme,
 )
-from streamlit_app.components import render_footer
 from streamlit_app.config.app_config import APP_CONFIG
+from streamlit_app.core.audit import audit
+from streamlit_app.core import metrics
+from streamlit_app.core.maintenance import start_maintenance_scheduler
 
 
 # Page configuration
@@ -24,75 +35,12 @@ st.set_page_config(
 )
 
 # Apply custom CSS theme (Portfolio Design)
-custom_css = """
-<style>
-:root {
-    --primary-color: #2B5A8C;
-    --secondary-color: #1A1F2E;
-    --accent-color: #4A7BA7;
-    --light-bg: #F5F7FA;
-    --border-color: #E0E5EB;
-    --text-primary: #1A1F2E;
-    --text-secondary: #6B7280;
-}
-
-h1, h2, h3, h4, h5, h6 {
-    color: var(--secondary-color) !important;
-    font-weight: 600;
-}
-
-h1 {
-    border-bottom: 3px solid var(--primary-color) !important;
-    padding-bottom: 0.75rem !important;
-}
-
-.stButton > button {
-    background-color: var(--primary-color) !important;
-    color: white !important;
-    border: none !important;
-    border-radius: 6px !important;
-    font-weight: 600 !important;
-    transition: all 0.3s ease !important;
-}
-
-.stButton > button:hover {
-    background-color: var(--accent-color) !important;
-    box-shadow: 0 4px 12px rgba(43, 90, 140, 0.3) !important;
-}
-
-.stExpander {
-    border: 1px solid var(--border-color) !important;
-    border-radius: 6px !important;
-}
+apply_theme()
 
-.stAlert {
-    border-radius: 6px !important;
-    border-left: 4px solid var(--primary-color) !important;
-}
-
-a {
-    color: var(--primary-color) !important;
-    text-decoration: none !important;
-    font-weight: 500 !important;
-}
-
-a:hover {
-    color: var(--accent-color) !important;
-    text-decoration: underline !important;
-}
-
-.stSidebar {
-    background-color: var(--light-bg) !important;
-}
-
-hr {
-    border: none !important;
-    border-top: 2px solid var(--primary-color) !important;
-    margin: 1.5rem 0 !important;
-}
-</style>
-"""
-st.markdown(custom_css, unsafe_allow_html=True)
+# Once per process; under `streamlit run` without the worker entry point,
+# this is the first script a new process runs
+metrics.start_exporters()
+start_maintenance_scheduler()
 
 # Initialize session state
 init_session_state()
@@ -108,7 +56,18 @@ def render_login_form():
         submit = st.form_submit_button("Login")
         
         if submit:
+            client = get_client_id()
+            
+            # Rejected before the password is hashed, so floods cost no bcrypt time
+            retry_after = check_login_rate_limit(username, client)
+            if retry_after:
+                audit('login', username, outcome='throttled', actor=username, client=client)
+                st.error(f"Too many login attempts. Try again in {retry_after:.0f} seconds.")
+                return
+            
             user = authenticate_user(username, password)
+            audit('login', username, outcome='success' if user else 'failure',
+                  actor=username, client=client)
             if user:
                 set_authenticated_user(user)
                 st.success(f"Welcome, {user['username']}!")
@@ -141,7 +100,9 @@ def main():
     # Main content
     st.title(f"🏠 {APP_CONFIG['app_name']}")
     
-    if st.session_state.authenticated:
+    if st.session_state.authenticated and is_password_reset_required(st.session_state.user):
+        render_forced_password_change_form()
+    elif st.session_state.authenticated:
         st.success("✅ You are logged in!")
         
         st.markdown("---")
@@ -219,4 +180,5 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    with profiled_page("Home"):
+        main()
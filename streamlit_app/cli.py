@@ -3,16 +3,308 @@ Command-line interface for the Streamlit app.
 """
 
 import sys
+import argparse
 import subprocess
 
 
-def main():
-    """Main entry point for running the Streamlit app."""
+def run_app():
+    """Run the Streamlit app."""
     subprocess.run([
         sys.executable, "-m", "streamlit", "run",
         "streamlit_app/app.py"
     ])
 
 
+def run_serve(args):
+    """Run several app workers behind the local load balancer."""
+    from streamlit_app.launcher import serve
+
+    serve(workers=args.workers, port=args.port, address=args.address,
+          worker_base_port=args.worker_base_port)
+
+
+def run_outbox(args):
+    """Deliver queued outbox messages."""
+    from streamlit_app.core.outbox import OutboxDispatcher
+
+    dispatcher = OutboxDispatcher(max_workers=args.workers)
+    if args.once:
+        totals = dispatcher.drain()
+        print(f"Sent: {totals['sent']}, retried: {totals['retried']}, failed: {totals['failed']}")
+        return
+
+    print(f"Dispatching outbox messages with {dispatcher.max_workers} workers (Ctrl+C to stop)...")
+    try:
+        dispatcher.run_forever(poll_interval=args.poll_interval)
+    except KeyboardInterrupt:
+        pass
+
+
+def run_export(args):
+    """Export saved XML messages to a file."""
+    import gzip
+    from datetime import date
+    from streamlit_app.core.export import export_messages
+
+    filters = {
+        'start_date': date.fromisoformat(args.since) if args.since else None,
+        'end_date': date.fromisoformat(args.until) if args.until else None,
+        'created_by': args.created_by,
+        'message_type': args.type,
+    }
+
+    # Concatenated exports are gzip-compressed on the fly when the name ends in .gz
+    if args.output.endswith(".gz"):
+        output = gzip.open(args.output, "wb")
+    else:
+        output = open(args.output, "wb")
+
+    with output:
+        exported = export_messages(output, export_format=args.format, **filters)
+    print(f"Exported {exported} message(s) to {args.output}")
+
+
+def run_sync_users(args):
+    """Sync directory users from a CSV or LDIF export."""
+    from streamlit_app.core.directory_sync import sync_users
+
+    result = sync_users(args.export, export_format=args.format, dry_run=args.dry_run,
+                        force=args.force)
+    for problem in result['problems']:
+        print(f"Skipped: {problem}")
+    if result['skipped']:
+        print(f"Export unchanged since the last sync; nothing to do ({result['seconds']:.2f} s)")
+        return
+    if result['conflicts']:
+        print(f"Not synced, name used by a local user: {', '.join(result['conflicts'])}")
+
+    verb = "Would apply" if args.dry_run or result['error'] else "Applied"
+    print(f"{verb}: {result['inserted']} new, {result['role_changed']} role changes, "
+          f"{result['deleted']} deleted ({result['seconds']:.2f} s)")
+    if result['error']:
+        print(f"Error: {result['error']}")
+        sys.exit(1)
+
+
+def run_archive(args):
+    """Move old XML messages into the monthly archive databases."""
+    from streamlit_app.core.archive import archive_messages
+
+    result = archive_messages(older_than_days=args.older_than_days, dry_run=args.dry_run)
+    for month, count in result['months'].items():
+        print(f"{month}: {count} message(s)")
+    verb = "Would archive" if args.dry_run else "Archived"
+    print(f"{verb} {sum(result['months'].values()) if args.dry_run else result['archived']} "
+          f"message(s) created before {result['cutoff']} UTC ({result['seconds']:.2f} s)")
+
+
+def run_maintenance(args):
+    """Run database maintenance now, or show past runs."""
+    from streamlit_app.core import maintenance
+
+    if args.history:
+        for run in maintenance.get_maintenance_runs():
+            seconds = f"{run['seconds']:.2f} s" if run['seconds'] is not None else "-"
+            print(f"#{run['id']} {run['started_at']} {run['trigger']}: {run['status']} "
+                  f"({seconds})")
+            for task in run['tasks']:
+                print(f"    {task['task']}: {task['status']} {task['seconds']:.3f} s "
+                      f"{task['detail']}")
+        return
+
+    if args.enable_vacuum:
+        print("Rewriting the database with VACUUM...")
+        if not maintenance.enable_incremental_vacuum():
+            sys.exit(1)
+        print("Incremental vacuum enabled.")
+
+    run = maintenance.run_maintenance(tasks=args.task, budget_seconds=args.budget)
+    for task in run['tasks']:
+        print(f"{task['task']}: {task['status']} in {task['seconds']:.3f} s {task['detail']}")
+    print(f"Maintenance {run['status']} in {run['seconds']:.2f} s")
+    if run['status'] == maintenance.STATUS_FAILED:
+        sys.exit(1)
+
+
+def run_backup(args):
+    """Back up the database, or list and verify the existing backups."""
+    import os
+    from streamlit_app.core import backup
+
+    if args.list:
+        for entry in backup.list_backups():
+            print(f"{entry['path']}  {entry['created_at']:%Y-%m-%d %H:%M:%S} UTC  "
+                  f"{entry['bytes'] / 1024 / 1024:.1f} MB")
+        return
+    if args.verify:
+        try:
+            tables = backup.verify_backup(args.verify)
+        except backup.BackupError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        print(f"{args.verify} is healthy ({tables} tables)")
+        return
+
+    # Stay out of the way of the app's workers on the same machine
+    if hasattr(os, "nice"):
+        os.nice(10)
+    try:
+        result = backup.create_backup(pages_per_step=args.pages_per_step)
+    except backup.BackupError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    print(f"Backed up {result['database_bytes'] / 1024 / 1024:.1f} MB to {result['path']} "
+          f"({result['bytes'] / 1024 / 1024:.1f} MB, {result['seconds']:.2f} s)")
+    for path in result['removed']:
+        print(f"Removed {path}")
+
+
+def run_restore(args):
+    """Restore the database from a backup."""
+    from streamlit_app.core import backup
+
+    if not args.yes:
+        answer = input(f"Replace the database with {args.backup}? Stop the app first. [y/N] ")
+        if answer.strip().lower() != "y":
+            print("Restore cancelled.")
+            return
+    try:
+        result = backup.restore_backup(args.backup)
+    except backup.BackupError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    print(f"Restored {result['restored']} ({result['tables']} tables). "
+          f"The previous database was saved to {result['safety_backup']}")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the argument parser for the CLI."""
+    parser = argparse.ArgumentParser(prog="app", description="Run and operate the Streamlit app.")
+    parser.add_argument(
+        "--profile-imports", action="store_true",
+        help="Report the app's import tree with timings and exit"
+    )
+    parser.add_argument(
+        "--import-budget-ms", type=float,
+        help="With --profile-imports, exit non-zero when imports take longer than this"
+    )
+    subparsers = parser.add_subparsers(dest="command")
+
+    subparsers.add_parser("run", help="Run the Streamlit app (default)")
+
+    serve = subparsers.add_parser(
+        "serve", help="Run several app workers behind a sticky load balancer"
+    )
+    serve.add_argument("--workers", type=int, help="Number of worker processes (default: CPUs)")
+    serve.add_argument("--port", type=int, help="Public port (default: 8501)")
+    serve.add_argument("--address", default="0.0.0.0", help="Address to listen on")
+    serve.add_argument(
+        "--worker-base-port", type=int, help="Port of the first worker (default: --port + 1)"
+    )
+
+    outbox = subparsers.add_parser("outbox", help="Deliver queued outbox messages")
+    outbox.add_argument("--once", action="store_true", help="Drain the outbox once and exit")
+    outbox.add_argument("--workers", type=int, help="Number of parallel deliveries")
+    outbox.add_argument(
+        "--poll-interval", type=float, default=1.0,
+        help="Seconds to wait between polls when the outbox is empty"
+    )
+
+    export = subparsers.add_parser("export", help="Export saved XML messages")
+    export.add_argument("output", help="Output file (.zip, or .xml/.xml.gz for --format concat)")
+    export.add_argument("--format", choices=["zip", "concat"], default="zip", help="Export format")
+    export.add_argument("--since", help="First creation date to include (YYYY-MM-DD, UTC)")
+    export.add_argument("--until", help="Last creation date to include (YYYY-MM-DD, UTC)")
+    export.add_argument("--created-by", help="Only messages created by this user")
+    export.add_argument("--type", help="Only messages of this type")
+
+    sync_users = subparsers.add_parser(
+        "sync-users", help="Sync directory users from a CSV or LDIF export"
+    )
+    sync_users.add_argument("export", help="Directory export file")
+    sync_users.add_argument(
+        "--format", choices=["csv", "ldif"], help="Export format (default: from the extension)"
+    )
+    sync_users.add_argument(
+        "--dry-run", action="store_true", help="Show the changes without applying them"
+    )
+    sync_users.add_argument(
+        "--force", action="store_true",
+        help="Sync an unchanged export, or one that deletes many users"
+    )
+
+    archive = subparsers.add_parser(
+        "archive", help="Move old XML messages into monthly archive databases"
+    )
+    archive.add_argument(
+        "--older-than-days", type=float,
+        help="Archive messages older than this (default: xml_archive_after_days)"
+    )
+    archive.add_argument(
+        "--dry-run", action="store_true", help="Show what would be archived without moving it"
+    )
+
+    maintenance = subparsers.add_parser("maintenance", help="Run database maintenance now")
+    maintenance.add_argument(
+        "--task", action="append",
+        choices=["optimize", "analyze", "incremental_vacuum", "quick_check"],
+        help="Run only this task (repeatable; default: all)"
+    )
+    maintenance.add_argument(
+        "--budget", type=float, help="Seconds allowed (default: maintenance_budget_seconds)"
+    )
+    maintenance.add_argument(
+        "--enable-vacuum", action="store_true",
+        help="First switch the database to incremental vacuum (full VACUUM; stop the app)"
+    )
+    maintenance.add_argument("--history", action="store_true", help="Show recent runs")
+
+    backup = subparsers.add_parser("backup", help="Back up the database while the app runs")
+    backup.add_argument(
+        "--pages-per-step", type=int,
+        help="Pages copied per step (default: backup_pages_per_step)"
+    )
+    backup.add_argument("--list", action="store_true", help="List the existing backups")
+    backup.add_argument("--verify", metavar="BACKUP", help="Check that a backup is usable")
+
+    restore = subparsers.add_parser("restore", help="Restore the database from a backup")
+    restore.add_argument("backup", help="Backup file (.db.gz)")
+    restore.add_argument("--yes", action="store_true", help="Do not ask for confirmation")
+
+    return parser
+
+
+def main(argv=None):
+    """Main entry point for running the Streamlit app."""
+    args = build_parser().parse_args(argv)
+
+    if args.profile_imports:
+        from streamlit_app.scripts import profile_imports
+
+        profile_args = []
+        if args.import_budget_ms is not None:
+            profile_args = ["--import-budget-ms", str(args.import_budget_ms)]
+        sys.exit(profile_imports.main(profile_args))
+
+    if args.command == "serve":
+        run_serve(args)
+    elif args.command == "outbox":
+        run_outbox(args)
+    elif args.command == "export":
+        run_export(args)
+    elif args.command == "sync-users":
+        run_sync_users(args)
+    elif args.command == "archive":
+        run_archive(args)
+    elif args.command == "maintenance":
+        run_maintenance(args)
+    elif args.command == "backup":
+        run_backup(args)
+    elif args.command == "restore":
+        run_restore(args)
+    else:
+        run_app()
+
+
 if __name__ == "__main__":
     main()
@@ -1,18 +1,37 @@
 """
 Reusable UI components.
+
+Names are imported from their submodules on first access.
 """
 
-from streamlit_app.components.footer import render_footer, render_simple_footer
-from streamlit_app.components.user_management import (
-    render_user_creation_form,
-    render_user_list,
-    render_password_change_form,
-)
-
-__all__ = [
-    'render_footer',
-    'render_simple_footer',
-    'render_user_creation_form',
-    'render_user_list',
-    'render_password_change_form',
-]
+import importlib
+
+_EXPORTS = {
+    'apply_theme': 'streamlit_app.components.theme',
+    'render_footer': 'streamlit_app.components.footer',
+    'render_simple_footer': 'streamlit_app.components.footer',
+    'render_user_creation_form': 'streamlit_app.components.user_management',
+    'render_user_import_form': 'streamlit_app.components.user_management',
+    'render_user_list': 'streamlit_app.components.user_management',
+    'render_password_change_form': 'streamlit_app.components.user_management',
+    'render_forced_password_change_form': 'streamlit_app.components.user_management',
+    'render_role_management': 'streamlit_app.components.role_management',
+    'render_session_memory_view': 'streamlit_app.components.session_memory',
+    'render_profiler_view': 'streamlit_app.components.profiler_view',
+    'render_perf_dashboard': 'streamlit_app.components.perf_dashboard',
+    'render_audit_log': 'streamlit_app.components.audit_view',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name]), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
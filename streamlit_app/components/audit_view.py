@@ -0,0 +1,74 @@
+"""
+Audit View Component
+Filterable, paginated view of the audit log (admin only).
+"""
+
+from datetime import timedelta
+
+import streamlit as st
+from streamlit_app.core.audit import ACTIONS, OUTCOMES, get_audit_entries
+
+
+ENTRIES_PER_PAGE = 50
+
+# Stack of before_id values: one per page, so Previous can step back
+PAGES_KEY = '_audit_pages'
+
+
+def render_audit_log():
+    """Render the audit log with filters and Newer/Older page buttons."""
+    col1, col2, col3, col4, col5 = st.columns([2, 2, 2, 2, 2])
+    actor = col1.text_input("User", placeholder="Exact username")
+    action = col2.selectbox("Action", ["All"] + list(ACTIONS))
+    outcome = col3.selectbox("Outcome", ["All"] + list(OUTCOMES))
+    since = col4.date_input("From (UTC)", value=None)
+    until = col5.date_input("To (UTC)", value=None)
+
+    filters = {
+        'actor': actor.strip() or None,
+        'action': None if action == "All" else action,
+        'outcome': None if outcome == "All" else outcome,
+        'since': since.isoformat() if since else None,
+        'until': (until + timedelta(days=1)).isoformat() if until else None,
+    }
+
+    # Start again from the newest entry whenever the filters change
+    state = st.session_state.get(PAGES_KEY)
+    if state is None or state['filters'] != filters:
+        state = {'filters': filters, 'pages': [None]}
+        st.session_state[PAGES_KEY] = state
+    pages = state['pages']
+
+    # One row more than a page tells whether an older page exists
+    entries = get_audit_entries(before_id=pages[-1], limit=ENTRIES_PER_PAGE + 1, **filters)
+    has_older = len(entries) > ENTRIES_PER_PAGE
+    entries = entries[:ENTRIES_PER_PAGE]
+
+    if not entries:
+        st.info("No audit entries match these filters.")
+    else:
+        st.dataframe(
+            [
+                {
+                    "Time (UTC)": entry['created_at'],
+                    "User": entry['actor'],
+                    "Action": entry['action'],
+                    "Target": entry['target'],
+                    "Outcome": entry['outcome'],
+                    "Client": entry['client'],
+                    "Details": entry['details'],
+                }
+                for entry in entries
+            ],
+            use_container_width=True,
+            hide_index=True,
+        )
+
+    col1, col2, col3 = st.columns([1, 2, 1])
+    if col1.button("⬅️ Newer", disabled=len(pages) == 1):
+        pages.pop()
+        st.rerun()
+    col2.caption(f"Page {len(pages)}")
+    if col3.button("Older ➡️", disabled=not has_older):
+        pages.append(entries[-1]['id'])
+        st.rerun()
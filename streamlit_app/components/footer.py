@@ -3,93 +3,71 @@ Footer Component
 Reusable footer for Streamlit apps.
 """
 
+import functools
 import streamlit as st
-from streamlit_app.config.app_config import APP_CONFIG
+from streamlit_app.config.app_config import APP_CONFIG, subscribe
+
+
+def _footer_settings() -> tuple:
+    """The configuration values the footer shows."""
+    return (
+        APP_CONFIG['copyright_year'],
+        APP_CONFIG['copyright_holder'],
+        APP_CONFIG['version'],
+        tuple((link['text'], link['url']) for link in APP_CONFIG.get('footer_links') or ()),
+    )
+
+
+@functools.lru_cache(maxsize=1)
+def _build_footer_html() -> str:
+    """Build the footer HTML; cached until the configuration is reloaded."""
+    copyright_year, copyright_holder, version, links = _footer_settings()
+    separator = '<span class="footer-separator">|</span>'
+
+    parts = [
+        '<div class="footer"><div class="footer-content">',
+        f'<span>© {copyright_year} {copyright_holder}</span>',
+        separator,
+        f'<span>v{version}</span>',
+    ]
+
+    # Add footer links
+    if links:
+        parts.append(separator)
+        parts.append('<span class="footer-separator">•</span>'.join(
+            f'<a href="{url}" target="_blank">{text}</a>' for text, url in links
+        ))
+
+    parts.append('</div></div>')
+    return "".join(parts)
+
+
+# Rebuild the footer when the configuration is reloaded
+subscribe(lambda old, new: _build_footer_html.cache_clear())
+
+
+@functools.lru_cache(maxsize=128)
+def _build_simple_footer_html(text: str) -> str:
+    """Build the simple footer HTML for a text."""
+    return f'<div class="simple-footer">{text}</div>'
 
 
 def render_footer():
     """
     Render the application footer with copyright and links.
     Configure the footer content in streamlit_app/config/app_config.py
+
+    The footer styles live in static/custom_style.css, applied by apply_theme().
+    The HTML is built once per configuration and reused on every rerun.
     """
-    footer_html = f"""
-    <style>
-        .footer {{
-            position: fixed;
-            left: 0;
-            bottom: 0;
-            width: 100%;
-            background-color: #f0f2f6;
-            color: #262730;
-            text-align: center;
-            padding: 10px 0;
-            font-size: 14px;
-            border-top: 1px solid #e0e0e0;
-            z-index: 999;
-        }}
-        .footer a {{
-            color: #FF4B4B;
-            text-decoration: none;
-            margin: 0 10px;
-        }}
-        .footer a:hover {{
-            text-decoration: underline;
-        }}
-        .footer-content {{
-            max-width: 1200px;
-            margin: 0 auto;
-            padding: 0 20px;
-        }}
-    </style>
-    <div class="footer">
-        <div class="footer-content">
-            <span>© {APP_CONFIG['copyright_year']} {APP_CONFIG['copyright_holder']}</span>
-            <span style="margin: 0 5px;">|</span>
-            <span>v{APP_CONFIG['version']}</span>
-    """
-    
-    # Add footer links
-    if APP_CONFIG.get('footer_links'):
-        footer_html += '<span style="margin: 0 5px;">|</span>'
-        for i, link in enumerate(APP_CONFIG['footer_links']):
-            footer_html += f'<a href="{link["url"]}" target="_blank">{link["text"]}</a>'
-            if i < len(APP_CONFIG['footer_links']) - 1:
-                footer_html += '<span style="margin: 0 5px;">•</span>'
-    
-    footer_html += """
-        </div>
-    </div>
-    """
-    
-    st.markdown(footer_html, unsafe_allow_html=True)
+    st.markdown(_build_footer_html(), unsafe_allow_html=True)
 
 
 def render_simple_footer(text: str):
     """
     Render a simple custom footer with just text.
-    
+
     Args:
         text: Footer text to display
     """
-    footer_html = f"""
-    <style>
-        .simple-footer {{
-            position: fixed;
-            left: 0;
-            bottom: 0;
-            width: 100%;
-            background-color: #f0f2f6;
-            color: #262730;
-            text-align: center;
-            padding: 10px 0;
-            font-size: 14px;
-            border-top: 1px solid #e0e0e0;
-            z-index: 999;
-        }}
-    </style>
-    <div class="simple-footer">
-        {text}
-    </div>
-    """
-    
-    st.markdown(footer_html, unsafe_allow_html=True)
+    st.markdown(_build_simple_footer_html(text), unsafe_allow_html=True)
@@ -0,0 +1,196 @@
+"""
+Performance Dashboard Component
+Live view of this process's metrics (admin only).
+
+Everything shown is read from in-process metrics, plus one indexed count of
+the outbox per refresh. The live section is a fragment that reruns on a
+timer by itself, so keeping the dashboard open never reruns the page.
+"""
+
+from datetime import datetime
+from typing import Dict, List
+
+import streamlit as st
+from streamlit_app.config.app_config import APP_CONFIG
+from streamlit_app.core import metrics
+from streamlit_app.core.auth import BCRYPT_IN_PROGRESS, BCRYPT_SECONDS, LOGIN_ATTEMPTS
+from streamlit_app.core.database import QUERY_SECONDS, get_slow_queries
+from streamlit_app.core.maintenance import get_maintenance_runs
+from streamlit_app.core.outbox import STATUS_FAILED, STATUS_PENDING, get_outbox_counts
+from streamlit_app.core.profiling import PAGE_RUN_SECONDS
+from streamlit_app.core.rate_limit import BCRYPT_SECONDS_AVOIDED, LOGINS_THROTTLED
+from streamlit_app.core.session import count_active_sessions
+from streamlit_app.core.xml_messages import get_xml_cache_stats
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 2)
+
+
+def _latency_rows(histogram: metrics.Histogram, label: str) -> List[Dict]:
+    """Summarise each label combination of a latency histogram."""
+    rows = []
+    for key, data in sorted(histogram.snapshot().items()):
+        count = data['count']
+        rows.append({
+            label: key[0] if key else "all",
+            "Count": count,
+            "Mean ms": _ms(data['sum'] / count) if count else 0.0,
+            "p50 ms": _ms(metrics.quantile(data, 0.50)),
+            "p95 ms": _ms(metrics.quantile(data, 0.95)),
+            "p99 ms": _ms(metrics.quantile(data, 0.99)),
+        })
+    return rows
+
+
+def _bucket_chart_data(histogram: metrics.Histogram) -> Dict[str, List]:
+    """Observations per latency bucket, one column per label value."""
+    snapshot = sorted(histogram.snapshot().items())
+    bounds = histogram.buckets
+    data = {
+        "Latency": [
+            f"{i:02d} ≤ {bound * 1000:g} ms" if bound != float("inf") else f"{i:02d} slower"
+            for i, bound in enumerate(bounds)
+        ]
+    }
+    for key, values in snapshot:
+        data[key[0] if key else "all"] = [count for _, count in values['buckets']]
+    return data
+
+
+def _render_overview():
+    active_sessions = count_active_sessions()
+    outbox = get_outbox_counts()
+    xml_cache = get_xml_cache_stats()
+    bcrypt_p95 = max(
+        (metrics.quantile(data, 0.95) for data in BCRYPT_SECONDS.snapshot().values()),
+        default=0.0
+    )
+
+    col1, col2, col3, col4, col5 = st.columns(5)
+    col1.metric("Active Sessions", "n/a" if active_sessions is None else active_sessions)
+    col2.metric(
+        "bcrypt In Flight",
+        int(BCRYPT_IN_PROGRESS.get()),
+        help=f"p95 bcrypt time: {_ms(bcrypt_p95)} ms"
+    )
+    col3.metric(
+        "Outbox Backlog",
+        outbox[STATUS_PENDING],
+        help=f"{outbox[STATUS_FAILED]} failed"
+    )
+    col4.metric(
+        "XML Cache Hit Rate",
+        f"{xml_cache['hit_rate']:.0%}",
+        help=f"{xml_cache['hits']} hits, {xml_cache['misses']} misses, "
+             f"{xml_cache['entries']} entries"
+    )
+    throttled = sum(LOGINS_THROTTLED.values().values())
+    col5.metric(
+        "Logins OK / Failed",
+        f"{LOGIN_ATTEMPTS.get(result='success'):.0f} / "
+        f"{LOGIN_ATTEMPTS.get(result='failure'):.0f}",
+        help=f"{throttled:.0f} throttled, saving about "
+             f"{BCRYPT_SECONDS_AVOIDED.get():.1f} s of bcrypt"
+    )
+
+
+def _render_database():
+    st.markdown("#### Database Queries")
+    rows = _latency_rows(QUERY_SECONDS, "Operation")
+    if not rows:
+        st.info("No queries recorded yet.")
+        return
+
+    st.dataframe(rows, use_container_width=True, hide_index=True)
+    st.bar_chart(_bucket_chart_data(QUERY_SECONDS), x="Latency", height=220)
+
+    slow_queries = get_slow_queries()
+    st.markdown(
+        f"#### Slow Queries (≥ {APP_CONFIG.get('db_slow_query_ms', 100)} ms)"
+    )
+    if not slow_queries:
+        st.caption("None recorded.")
+    else:
+        st.dataframe(
+            [
+                {
+                    "At": datetime.fromtimestamp(query['at']).strftime("%H:%M:%S"),
+                    "ms": _ms(query['seconds']),
+                    "SQL": query['sql'],
+                }
+                for query in slow_queries
+            ],
+            use_container_width=True,
+            hide_index=True,
+        )
+
+
+def _render_pages():
+    st.markdown("#### Page Runs")
+    rows = _latency_rows(PAGE_RUN_SECONDS, "Page")
+    if rows:
+        st.dataframe(rows, use_container_width=True, hide_index=True)
+    else:
+        st.caption("No page runs recorded yet.")
+
+
+def _render_live_metrics():
+    """Render everything that refreshes on the timer."""
+    _render_overview()
+    _render_database()
+    _render_pages()
+    st.caption(f"Process metrics as of {datetime.now().strftime('%H:%M:%S')}")
+
+
+def _render_maintenance():
+    st.markdown("#### Database Maintenance")
+    runs = get_maintenance_runs(limit=10)
+    if not runs:
+        st.caption("No maintenance runs yet.")
+        return
+
+    st.dataframe(
+        [
+            {
+                "Started (UTC)": run['started_at'],
+                "Trigger": run['trigger'],
+                "Status": run['status'],
+                "Seconds": round(run['seconds'] or 0.0, 2),
+                "Tasks": ", ".join(
+                    f"{task['task']} {task['status']} ({task['seconds']:.2f} s)"
+                    for task in run['tasks']
+                ),
+            }
+            for run in runs
+        ],
+        use_container_width=True,
+        hide_index=True,
+    )
+
+
+def _render_warmup():
+    st.markdown("#### Worker Warmup")
+    # Registered by streamlit_app.worker; absent under plain `streamlit run`
+    warmup = metrics.get_metric("worker_warmup_seconds")
+    values = warmup.values() if warmup is not None else {}
+    if not values:
+        st.caption("This process was not started through the worker entry point.")
+        return
+
+    st.dataframe(
+        [{"Step": key[0], "ms": _ms(seconds)} for key, seconds in values.items()],
+        use_container_width=True,
+        hide_index=True,
+    )
+
+
+def render_perf_dashboard():
+    """Render the live performance dashboard."""
+    refresh_seconds = APP_CONFIG.get("perf_dashboard_refresh_seconds", 5)
+    # st.fragment replaced st.experimental_fragment in Streamlit 1.37
+    fragment = getattr(st, "fragment", None) or st.experimental_fragment
+    fragment(run_every=refresh_seconds)(_render_live_metrics)()
+
+    _render_maintenance()
+    _render_warmup()
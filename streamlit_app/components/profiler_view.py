@@ -0,0 +1,83 @@
+"""
+Profiler Component
+Phase timings and sampled profiles of page runs (admin only).
+"""
+
+from datetime import datetime
+
+import streamlit as st
+from streamlit_app.core.profiling import (
+    RENDER_PHASE,
+    clear_profiles,
+    get_page_runs,
+    get_profiled_pages,
+    is_sampling_enabled,
+    set_sampling_enabled,
+)
+
+
+def render_profiler_view():
+    """Render recent page runs with their phases and downloadable profiles."""
+    st.subheader("Page Profiling")
+
+    sampling = st.toggle(
+        "Sample page runs",
+        value=is_sampling_enabled(),
+        help="Record the call stacks of every page run in this process. "
+             "Adds a little overhead; turn it off when you are done."
+    )
+    if sampling != is_sampling_enabled():
+        set_sampling_enabled(sampling)
+
+    pages = get_profiled_pages()
+    if not pages:
+        st.info("No page runs recorded yet.")
+        return
+
+    page = st.selectbox("Page", pages)
+    runs = get_page_runs(page)
+
+    phase_names = sorted({name for run in runs for name in run['phases']} - {RENDER_PHASE})
+    phase_names.append(RENDER_PHASE)
+
+    st.dataframe(
+        [
+            {
+                "Started": datetime.fromtimestamp(run['started_at']).strftime("%H:%M:%S"),
+                "Total ms": round(run['duration'] * 1000, 1),
+                **{
+                    f"{name} ms": round(run['phases'].get(name, 0.0) * 1000, 1)
+                    for name in phase_names
+                },
+                "Samples": run['samples'],
+            }
+            for run in runs
+        ],
+        use_container_width=True,
+        hide_index=True,
+    )
+
+    sampled = [run for run in runs if run['collapsed']]
+    if sampled:
+        run = st.selectbox(
+            "Sampled run",
+            sampled,
+            format_func=lambda r: (
+                f"{datetime.fromtimestamp(r['started_at']).strftime('%H:%M:%S')} "
+                f"({r['duration'] * 1000:.0f} ms, {r['samples']} samples)"
+            ),
+        )
+        stamp = datetime.fromtimestamp(run['started_at']).strftime('%Y%m%d_%H%M%S')
+        st.download_button(
+            label="⬇️ Download Collapsed Stacks",
+            data=run['collapsed'],
+            file_name=f"{page.replace(' ', '_')}_{stamp}.collapsed.txt",
+            mime="text/plain",
+            help="Open with speedscope or flamegraph.pl to view a flamegraph",
+        )
+    elif sampling:
+        st.caption("Sampled runs appear here after the next page run.")
+
+    if st.button("🗑️ Clear Profiles"):
+        clear_profiles()
+        st.rerun()
@@ -0,0 +1,85 @@
+"""
+Role Management Component
+UI for roles, their permissions and extra roles per user (admin only).
+"""
+
+import streamlit as st
+from streamlit_app.core.auth import get_cached_user
+from streamlit_app.core.rbac import (
+    BUILTIN_ROLES,
+    create_role,
+    delete_role,
+    get_permissions,
+    get_roles,
+    get_user_roles,
+    set_role_permissions,
+    set_user_roles,
+)
+
+
+def render_role_management():
+    """Render role permissions, role creation and user role assignment."""
+    st.subheader("Roles and Permissions")
+
+    permissions = get_permissions()
+    descriptions = {p['name']: p['description'] for p in permissions}
+
+    for role in get_roles():
+        with st.expander(f"**{role['name']}** — {role['description'] or ''}"):
+            granted = st.multiselect(
+                "Permissions",
+                [p['name'] for p in permissions],
+                default=role['permissions'],
+                format_func=lambda name: f"{name} ({descriptions[name]})",
+                key=f"role_permissions_{role['name']}",
+            )
+            col1, col2 = st.columns(2)
+            if col1.button("💾 Save", key=f"save_role_{role['name']}"):
+                if set_role_permissions(role['name'], granted):
+                    st.success("Permissions saved.")
+                    st.rerun()
+                else:
+                    st.error("Failed to save permissions.")
+            if role['name'] not in BUILTIN_ROLES:
+                if col2.button("🗑️ Delete Role", key=f"delete_role_{role['name']}"):
+                    if delete_role(role['name']):
+                        st.rerun()
+                    else:
+                        st.error("Failed to delete role.")
+
+    with st.form("create_role_form"):
+        st.markdown("**New Role**")
+        name = st.text_input("Name", max_chars=50)
+        description = st.text_input("Description", max_chars=200)
+        if st.form_submit_button("Create Role"):
+            if not name.strip():
+                st.error("A role needs a name.")
+            elif create_role(name.strip().lower(), description.strip()):
+                st.success(f"✅ Role '{name}' created.")
+                st.rerun()
+            else:
+                st.error("❌ Failed to create role. The name may already exist.")
+
+    st.markdown("---")
+    st.subheader("Extra Roles per User")
+    st.caption("Users always have their primary role; extra roles add permissions.")
+
+    username = st.text_input("Username", key="role_assignment_username")
+    if not username:
+        return
+    user = get_cached_user(username.strip())
+    if user is None:
+        st.warning("No such user.")
+        return
+
+    options = [role['name'] for role in get_roles() if role['name'] != user['role']]
+    extra_roles = st.multiselect(
+        f"Extra roles for {user['username']} (primary role: {user['role']})",
+        options,
+        default=[role for role in get_user_roles(user['id']) if role in options],
+    )
+    if st.button("💾 Save Roles"):
+        if set_user_roles(user['id'], extra_roles):
+            st.success("Roles saved.")
+        else:
+            st.error("Failed to save roles.")
@@ -0,0 +1,60 @@
+"""
+Session Memory Component
+Per-session memory accounting for the session payload store (admin only).
+"""
+
+import streamlit as st
+from streamlit_app.core.payload_store import payload_store, get_session_id
+
+
+def _format_bytes(size: int) -> str:
+    """Format a byte count for display."""
+    for unit in ("B", "KiB", "MiB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GiB"
+
+
+def render_session_memory_view():
+    """Render memory and disk usage of stored session payloads."""
+    st.subheader("Session Memory")
+    
+    totals = payload_store.totals()
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Sessions", totals['sessions'])
+    col2.metric(
+        "In Memory",
+        _format_bytes(totals['memory_bytes']),
+        help=f"Budget: {_format_bytes(totals['memory_budget'])}"
+    )
+    col3.metric("Spilled to Disk", _format_bytes(totals['disk_bytes']))
+    
+    rows = payload_store.usage()
+    if not rows:
+        st.info("No session payloads stored.")
+    else:
+        current_session = get_session_id()
+        
+        def session_label(session_id):
+            return session_id[:8] + (" (you)" if session_id == current_session else "")
+        
+        st.dataframe(
+            [
+                {
+                    "Session": session_label(row['session_id']),
+                    "Values": row['entries'],
+                    "Spilled": row['spilled'],
+                    "Memory": _format_bytes(row['memory_bytes']),
+                    "Disk (compressed)": _format_bytes(row['disk_bytes']),
+                    "Idle": f"{row['idle_seconds']:.0f} s",
+                }
+                for row in rows
+            ],
+            use_container_width=True,
+            hide_index=True,
+        )
+    
+    if st.button("🧹 Sweep Ended Sessions"):
+        removed = payload_store.sweep()
+        st.success(f"Removed payloads of {removed} ended session(s).")
@@ -0,0 +1,62 @@
+"""
+Theme Component
+Applies the shared stylesheet in static/custom_style.css to every page.
+"""
+
+import functools
+import os
+import re
+
+import streamlit as st
+from streamlit_app.config.app_config import APP_CONFIG, subscribe
+
+
+STYLESHEET_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "static", "custom_style.css"
+)
+
+
+def minify_css(css: str) -> str:
+    """
+    Strip comments and redundant whitespace from a stylesheet.
+
+    Args:
+        css: Stylesheet source
+
+    Returns:
+        str: Minified stylesheet
+    """
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.DOTALL)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{};,>])\s*", r"\1", css)
+    css = re.sub(r":\s+", ":", css)
+    css = css.replace(" !important", "!important").replace(";}", "}")
+    return css.strip()
+
+
+@functools.lru_cache(maxsize=None)
+def get_theme_html() -> str:
+    """
+    Get the minified stylesheet wrapped in a style tag.
+    The file is read once per process, and again after a configuration reload.
+
+    Returns:
+        str: HTML style block
+    """
+    path = APP_CONFIG.get("theme_stylesheet") or STYLESHEET_PATH
+    with open(path, encoding="utf-8") as f:
+        return f"<style>{minify_css(f.read())}</style>"
+
+
+# Re-read the stylesheet on reload, so edits to it (or to theme_stylesheet) show up
+subscribe(lambda old, new: get_theme_html.cache_clear())
+
+
+def apply_theme():
+    """
+    Apply the shared theme to the current page.
+    Call this right after st.set_page_config().
+    """
+    # Streamlit drops elements that are not re-sent on a rerun, so the style block
+    # is emitted every run; building it is a cached lookup
+    st.markdown(get_theme_html(), unsafe_allow_html=True)
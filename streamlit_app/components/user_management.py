@@ -3,8 +3,22 @@ User Management Component
 UI components for managing users (admin only).
 """
 
+from typing import Dict, List
+
 import streamlit as st
-from streamlit_app.core.auth import create_user, get_all_users, delete_user, update_user_password
+from streamlit_app.core.audit import audit
+from streamlit_app.core.auth import (
+    create_user,
+    delete_users,
+    get_all_users,
+    require_password_reset,
+    set_users_role,
+    update_user_password,
+)
+from streamlit_app.core.rbac import get_role_names
+
+
+BULK_ACTIONS = ("Delete", "Change role", "Require password reset")
 
 
 def render_user_creation_form():
@@ -15,7 +29,8 @@ def render_user_creation_form():
         username = st.text_input("Username", max_chars=50)
         password = st.text_input("Password", type="password", max_chars=100)
         confirm_password = st.text_input("Confirm Password", type="password", max_chars=100)
-        role = st.selectbox("Role", ["user", "admin"])
+        roles = get_role_names()
+        role = st.selectbox("Role", roles, index=roles.index('user') if 'user' in roles else 0)
         
         submitted = st.form_submit_button("Create User")
         
@@ -45,8 +60,57 @@ def render_user_creation_form():
                 st.error("❌ Failed to create user. Username may already exist.")
 
 
+def render_user_import_form():
+    """Render the bulk import of users from a CSV file."""
+    st.subheader("Import Users from CSV")
+    st.caption(
+        "The file needs a header row with `username` and `password` columns and "
+        "may have a `role` column (any role name, default `user`)."
+    )
+    
+    with st.form("import_users_form"):
+        uploaded = st.file_uploader("CSV file", type=["csv"])
+        submitted = st.form_submit_button("Import Users")
+    
+    if not submitted:
+        return
+    if uploaded is None:
+        st.error("Choose a CSV file to import.")
+        return
+    
+    from streamlit_app.core.user_import import import_users_from_bytes
+    
+    progress_bar = st.progress(0.0, text="Hashing passwords...")
+    
+    def show_progress(done: int, total: int):
+        progress_bar.progress(done / total, text=f"Imported {done} of {total} rows...")
+    
+    try:
+        result = import_users_from_bytes(uploaded.getvalue(), progress=show_progress)
+    except (UnicodeDecodeError, ValueError) as e:
+        progress_bar.empty()
+        st.error(f"❌ Could not read the file: {e}")
+        return
+    progress_bar.empty()
+    
+    st.success(
+        f"✅ Imported {result['imported']} of {result['rows']} users in "
+        f"{result['seconds']:.1f} s ({result['rows_per_second']:.0f} rows/s)."
+    )
+    if result['failures']:
+        st.warning(f"{len(result['failures'])} row(s) were not imported:")
+        st.dataframe(
+            [
+                {"Line": f['line'], "Username": f['username'], "Error": f['error']}
+                for f in result['failures']
+            ],
+            use_container_width=True,
+            hide_index=True,
+        )
+
+
 def render_user_list():
-    """Render list of all users with management options."""
+    """Render list of all users with bulk management actions."""
     st.subheader("Existing Users")
     
     users = get_all_users()
@@ -55,33 +119,82 @@ def render_user_list():
         st.info("No users found.")
         return
     
-    for user in users:
-        col1, col2, col3, col4 = st.columns([3, 2, 2, 2])
-        
-        with col1:
-            st.write(f"**{user['username']}**")
-        
-        with col2:
-            badge_color = "🔴" if user['role'] == 'admin' else "🟢"
-            st.write(f"{badge_color} {user['role']}")
-        
-        with col3:
-            st.write(f"ID: {user['id']}")
-        
-        with col4:
-            # Don't allow deleting yourself
-            current_user = st.session_state.get('user', {})
-            if user['id'] != current_user.get('id'):
-                if st.button("🗑️ Delete", key=f"delete_{user['id']}"):
-                    if delete_user(user['id']):
-                        st.success(f"User '{user['username']}' deleted.")
-                        st.rerun()
-                    else:
-                        st.error("Failed to delete user.")
-            else:
-                st.write("_(You)_")
-        
-        st.divider()
+    col1, col2 = st.columns([3, 1])
+    search = col1.text_input("Search users", placeholder="Part of a username")
+    role_filter = col2.selectbox("Role", ["All"] + get_role_names())
+    if search:
+        users = [user for user in users if search.lower() in user['username'].lower()]
+    if role_filter != "All":
+        users = [user for user in users if user['role'] == role_filter]
+    st.caption(f"{len(users)} users. Select rows to act on them together.")
+    
+    # One table instead of a row of widgets per user keeps large directories fast;
+    # the key changes with the filters so a selection never points at other rows
+    event = st.dataframe(
+        [
+            {
+                "Username": user['username'],
+                "Role": user['role'],
+                "Source": user['source'],
+                "Reset required": bool(user['password_reset_required']),
+                "ID": user['id'],
+            }
+            for user in users
+        ],
+        use_container_width=True,
+        hide_index=True,
+        on_select="rerun",
+        selection_mode="multi-row",
+        key=f"user_table_{search}_{role_filter}",
+    )
+    selected = [users[row] for row in event.selection.rows]
+    if not selected:
+        return
+    
+    render_bulk_actions(selected)
+
+
+def render_bulk_actions(selected: List[Dict]):
+    """
+    Render the actions applied to every selected user in one transaction.
+    
+    Args:
+        selected: User dictionaries from get_all_users()
+    """
+    # Don't allow acting on yourself
+    current_user = st.session_state.get('user') or {}
+    targets = [user for user in selected if user['id'] != current_user.get('id')]
+    if len(targets) < len(selected):
+        st.info("Your own account is left out of bulk actions.")
+    if not targets:
+        return
+    
+    with st.form("bulk_user_actions_form"):
+        st.markdown(f"**{len(targets)} user(s) selected**")
+        action = st.radio("Action", BULK_ACTIONS, horizontal=True)
+        role = st.selectbox("New role (for Change role)", get_role_names())
+        confirmed = st.checkbox(f"Yes, apply this to {len(targets)} user(s)")
+        submitted = st.form_submit_button("Apply")
+    
+    if not submitted:
+        return
+    if not confirmed:
+        st.error("Tick the confirmation box first.")
+        return
+    
+    user_ids = [user['id'] for user in targets]
+    if action == "Delete":
+        ok = delete_users(user_ids)
+    elif action == "Change role":
+        ok = set_users_role(user_ids, role)
+    else:
+        ok = require_password_reset(user_ids)
+    
+    if ok:
+        st.success(f"✅ {action}: done for {len(targets)} user(s).")
+        st.rerun()
+    else:
+        st.error(f"❌ {action} failed; no users were changed.")
 
 
 def render_password_change_form():
@@ -97,14 +210,22 @@ def render_password_change_form():
         
         if submitted:
             from streamlit_app.core.auth import authenticate_user
+            from streamlit_app.core.rate_limit import check_login_rate_limit
             
             current_user = st.session_state.get('user')
             if not current_user:
                 st.error("Session expired. Please log in again.")
                 return
             
+            retry_after = check_login_rate_limit(current_user['username'])
+            if retry_after:
+                audit('password.change', outcome='throttled', user_id=current_user['id'])
+                st.error(f"Too many attempts. Try again in {retry_after:.0f} seconds.")
+                return
+            
             # Verify current password
             if not authenticate_user(current_user['username'], current_password):
+                audit('password.change', outcome='failure', user_id=current_user['id'])
                 st.error("Current password is incorrect.")
                 return
             
@@ -122,3 +243,35 @@ def render_password_change_form():
                 st.success("✅ Password changed successfully!")
             else:
                 st.error("❌ Failed to change password.")
+
+
+def render_forced_password_change_form():
+    """Render the form a user must fill in after an administrator required a reset."""
+    st.subheader("Choose a New Password")
+    st.warning("An administrator requires you to set a new password before you continue.")
+    
+    with st.form("forced_password_change_form"):
+        new_password = st.text_input("New Password", type="password")
+        confirm_new_password = st.text_input("Confirm New Password", type="password")
+        
+        submitted = st.form_submit_button("Set Password")
+        
+        if submitted:
+            current_user = st.session_state.get('user')
+            if not current_user:
+                st.error("Session expired. Please log in again.")
+                return
+            
+            if len(new_password) < 8:
+                st.error("New password must be at least 8 characters long.")
+                return
+            
+            if new_password != confirm_new_password:
+                st.error("New passwords do not match.")
+                return
+            
+            if update_user_password(current_user['id'], new_password):
+                st.success("✅ Password changed successfully!")
+                st.rerun()
+            else:
+                st.error("❌ Failed to change password.")
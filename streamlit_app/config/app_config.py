@@ -1,9 +1,32 @@
 """
 Application Configuration
 Customize these settings for your specific app.
+
+Settings are layered: the defaults below, then an optional TOML file
+(streamlit_app.toml in the working directory, or the path in
+APP_CONFIG_FILE), then environment variables named APP_CONFIG_<KEY>
+(for example APP_CONFIG_DB_PATH). The result is an immutable snapshot that
+is reloaded when the TOML file changes, without restarting the app.
 """
 
-APP_CONFIG = {
+import json
+import os
+import sys
+import threading
+import time
+from types import MappingProxyType
+from typing import Any, Callable, Iterator, List, Mapping, Optional
+
+if sys.version_info >= (3, 11):
+    import tomllib
+else:
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
+
+
+DEFAULTS = {
     # App metadata
     "app_name": "Streamlit App Framework",
     "version": "1.0.0",
@@ -21,7 +44,329 @@ APP_CONFIG = {
     
     # Database settings
     "db_path": "data/app.db",
+    "db_pool_size": 8,
     
     # Session settings
     "session_timeout_minutes": 60,
+    
+    # Login rate limits: burst size and seconds to regain one attempt, per
+    # username and per client address. The "sqlite" backend shares the
+    # limits between worker processes ("memory" keeps them per process).
+    "login_rate_limit_backend": "memory",
+    "login_rate_limit_per_user": 5,
+    "login_rate_limit_user_refill_seconds": 30.0,
+    "login_rate_limit_per_client": 20,
+    "login_rate_limit_client_refill_seconds": 3.0,
+    "login_rate_limit_max_keys": 100000,
+    
+    # Directory sync (`app sync-users`): attribute or column holding the
+    # username and the role, groups (memberOf DNs) whose members are admins,
+    # rows per transaction, and the share of directory users a sync may
+    # delete without --force
+    "directory_username_attribute": "uid",
+    "directory_role_attribute": "role",
+    "directory_admin_groups": [],
+    "directory_sync_batch_size": 1000,
+    "directory_sync_max_delete_fraction": 0.5,
+    
+    # Audit log: entries written per transaction, seconds between writes of
+    # a partial batch, and entries queued at most before new ones are dropped
+    "audit_batch_size": 500,
+    "audit_flush_interval_seconds": 1.0,
+    "audit_max_pending": 100000,
+    
+    # Database maintenance (see core/maintenance.py): a scheduled run happens
+    # at most once per interval, inside the local-time window (None: any
+    # time) and while at most this many sessions are connected to the worker
+    "maintenance_enabled": True,
+    "maintenance_window": "02:00-05:00",
+    "maintenance_interval_hours": 24,
+    "maintenance_budget_seconds": 30,
+    "maintenance_max_active_sessions": 2,
+    "maintenance_check_interval_seconds": 300,
+    
+    # Large per-session values are compressed to disk above this size,
+    # and once all sessions together exceed the memory budget
+    "session_payload_spill_bytes": 64 * 1024,
+    "session_payload_memory_budget_bytes": 64 * 1024 * 1024,
+    "session_payload_dir": None,  # None uses the system temp directory
+    
+    # Outbox delivery settings
+    "outbox_transport": "file",
+    "outbox_dir": "data/outbox",
+    "outbox_max_workers": 8,
+    "outbox_max_attempts": 5,
+    "outbox_backoff_seconds": 2.0,
+    
+    # Archival (`app archive`): messages older than this many days move to
+    # monthly archive databases in xml_archive_dir (None: data/archive)
+    "xml_archive_after_days": 180,
+    "xml_archive_dir": None,
+    "xml_archive_batch_size": 1000,
+    
+    # Exports larger than this are not offered for download on the Message
+    # Export page (Streamlit keeps downloads in memory); use `app export`
+    "export_download_max_bytes": 64 * 1024 * 1024,
+    
+    # Backups (`app backup`) in backup_dir (None: data/backups): pages
+    # copied per step and the pause between steps, gzip level, and the
+    # retention policy (the newest keep_last backups, plus the newest backup
+    # of each of the last keep_daily days)
+    "backup_dir": None,
+    "backup_pages_per_step": 256,
+    "backup_step_sleep_seconds": 0.005,
+    "backup_compress_level": 6,
+    "backup_keep_last": 7,
+    "backup_keep_daily": 14,
+    
+    # Maximum total size of the shared cache of generated XML documents
+    "xml_cache_max_bytes": 16 * 1024 * 1024,
+    
+    # `app serve`: public port and number of worker processes (None = one per CPU)
+    "serve_port": 8501,
+    "serve_workers": None,
+    
+    # Interval of the page run stack sampler (Profiling tab on User Management)
+    "profiling_sample_interval_ms": 5,
+    
+    # Stylesheet applied to every page (None uses static/custom_style.css)
+    "theme_stylesheet": None,
+    
+    # Metrics: HTTP endpoint serving /metrics and/or a file rewritten periodically
+    # (None disables each). "{pid}" in the file name is replaced by the process ID.
+    "metrics_port": None,
+    "metrics_address": "127.0.0.1",
+    "metrics_file": None,
+    "metrics_file_interval_seconds": 15,
+    
+    # Queries slower than this are kept in the slow query log
+    "db_slow_query_ms": 100,
+    
+    # Seconds between refreshes of the Performance page
+    "perf_dashboard_refresh_seconds": 5,
+}
+
+
+ENV_PREFIX = "APP_CONFIG_"
+CONFIG_FILE_ENV = "APP_CONFIG_FILE"
+DEFAULT_CONFIG_FILE = "streamlit_app.toml"
+
+# Seconds between checks of the TOML file for changes
+RELOAD_INTERVAL_SECONDS = 2.0
+
+
+def _freeze(value: Any) -> Any:
+    """Make nested dicts and lists read-only."""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+# Types of the settings whose default is None; environment variables for
+# every other setting are parsed as the type of its default
+TYPES = {
+    "session_payload_dir": str,
+    "xml_archive_dir": str,
+    "backup_dir": str,
+    "serve_workers": int,
+    "theme_stylesheet": str,
+    "metrics_port": int,
+    "metrics_file": str,
 }
+
+_TRUE = ("1", "true", "yes", "on")
+_FALSE = ("0", "false", "no", "off")
+
+
+def _parse_env_value(key: str, raw: str, default: Any) -> Any:
+    """
+    Convert an environment variable to the type of its setting.
+
+    Raises:
+        ValueError: If the value does not parse as that type
+    """
+    kind = TYPES.get(key) if default is None else type(default)
+    if default is None and raw.strip().lower() in ("", "none", "null"):
+        return None
+    if kind is bool:
+        value = raw.strip().lower()
+        if value not in _TRUE + _FALSE:
+            raise ValueError(f"expected one of {', '.join(_TRUE + _FALSE)}")
+        return value in _TRUE
+    if kind is int:
+        try:
+            return int(raw)
+        except ValueError:
+            raise ValueError("expected an integer") from None
+    if kind is float:
+        try:
+            return float(raw)
+        except ValueError:
+            raise ValueError("expected a number") from None
+    if kind in (list, dict):
+        try:
+            value = json.loads(raw)
+        except ValueError:
+            raise ValueError(f"expected a JSON {kind.__name__}") from None
+        if not isinstance(value, kind):
+            raise ValueError(f"expected a JSON {kind.__name__}")
+        return value
+    return raw
+
+
+def get_config_file() -> str:
+    """Get the path of the TOML configuration file."""
+    return os.environ.get(CONFIG_FILE_ENV, DEFAULT_CONFIG_FILE)
+
+
+def _file_signature(path: str) -> Optional[tuple]:
+    """Modification time and size of a file, or None if it does not exist."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def load_config() -> Mapping[str, Any]:
+    """
+    Build a configuration snapshot from defaults, the TOML file and the environment.
+
+    Returns:
+        Mapping: Read-only configuration
+    """
+    config = dict(DEFAULTS)
+
+    path = get_config_file()
+    if os.path.exists(path):
+        if tomllib is None:
+            print(f"Ignoring {path}: install 'tomli' to read TOML on Python < 3.11")
+        else:
+            with open(path, "rb") as f:
+                config.update(tomllib.load(f))
+
+    for key, default in DEFAULTS.items():
+        raw = os.environ.get(ENV_PREFIX + key.upper())
+        if raw is not None:
+            try:
+                config[key] = _parse_env_value(key, raw, default)
+            except ValueError as e:
+                print(f"Ignoring {ENV_PREFIX}{key.upper()}={raw!r}: {e}")
+
+    return _freeze(config)
+
+
+class _ConfigState:
+    """Current snapshot plus the machinery to reload it."""
+
+    def __init__(self):
+        self.snapshot = load_config()
+        self.version = 1
+        self.file_signature = _file_signature(get_config_file())
+        self.subscribers: List[Callable[[Mapping, Mapping], None]] = []
+        self.lock = threading.Lock()
+        self.watcher: Optional[threading.Thread] = None
+
+
+_state = _ConfigState()
+
+
+def get_config() -> Mapping[str, Any]:
+    """
+    Get the current configuration snapshot.
+
+    Returns:
+        Mapping: Read-only configuration
+    """
+    if _state.watcher is None:
+        _start_watcher()
+    return _state.snapshot
+
+
+def get_config_version() -> int:
+    """Get a number that increases every time the configuration is reloaded."""
+    return _state.version
+
+
+def subscribe(callback: Callable[[Mapping, Mapping], None]):
+    """
+    Call a function after every configuration reload.
+
+    Args:
+        callback: Called with the old and the new snapshot
+    """
+    with _state.lock:
+        _state.subscribers.append(callback)
+
+
+def reload_config() -> bool:
+    """
+    Rebuild the configuration snapshot and notify subscribers if it changed.
+
+    Returns:
+        bool: True if the configuration changed
+    """
+    with _state.lock:
+        _state.file_signature = _file_signature(get_config_file())
+        try:
+            new = load_config()
+        except Exception as e:
+            # Keep serving the previous snapshot when the file is half-written or invalid
+            print(f"Error reloading configuration: {e}")
+            return False
+
+        old = _state.snapshot
+        if new == old:
+            return False
+
+        _state.snapshot = new
+        _state.version += 1
+        subscribers = list(_state.subscribers)
+
+    for callback in subscribers:
+        try:
+            callback(old, new)
+        except Exception as e:
+            print(f"Error in configuration subscriber: {e}")
+    return True
+
+
+def _watch_config_file():
+    """Reload the configuration whenever the TOML file changes."""
+    while True:
+        time.sleep(RELOAD_INTERVAL_SECONDS)
+        if _file_signature(get_config_file()) != _state.file_signature:
+            reload_config()
+
+
+def _start_watcher():
+    """Start the file watcher thread once per process."""
+    with _state.lock:
+        if _state.watcher is None:
+            _state.watcher = threading.Thread(
+                target=_watch_config_file, name="config-watcher", daemon=True
+            )
+            _state.watcher.start()
+
+
+class _ConfigView(Mapping):
+    """Read-only view that always reflects the current snapshot."""
+
+    def __getitem__(self, key: str) -> Any:
+        return get_config()[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(get_config())
+
+    def __len__(self) -> int:
+        return len(get_config())
+
+    def __repr__(self) -> str:
+        return f"APP_CONFIG({dict(get_config())!r})"
+
+
+# Use APP_CONFIG["key"] or APP_CONFIG.get("key") anywhere; reads are O(1)
+# and always see the latest snapshot
+APP_CONFIG = _ConfigView()
@@ -1,45 +1,54 @@
 """
 Core modules for authentication, database, and session management.
+
+Names are imported from their submodules on first access, so importing
+streamlit_app.core does not load bcrypt or touch the database until a page
+actually needs them.
 """
 
-from streamlit_app.core.auth import (
-    authenticate_user,
-    create_user,
-    require_auth,
-    require_admin,
-    logout,
-    is_admin,
-    get_all_users,
-    update_user_password,
-    delete_user,
-)
-
-from streamlit_app.core.database import (
-    get_db_connection,
-    init_database,
-)
-
-from streamlit_app.core.session import (
-    init_session_state,
-    set_authenticated_user,
-    clear_session,
-    get_current_user,
-)
-
-__all__ = [
-    'authenticate_user',
-    'create_user',
-    'require_auth',
-    'require_admin',
-    'logout',
-    'is_admin',
-    'get_all_users',
-    'update_user_password',
-    'delete_user',
-    'get_db_connection',
-    'init_database',
-    'init_session_state',
-    'set_authenticated_user',
-    'clear_session',
-    'get_current_user',
-]
+import importlib
+
+_EXPORTS = {
+    'authenticate_user': 'streamlit_app.core.auth',
+    'create_user': 'streamlit_app.core.auth',
+    'require_auth': 'streamlit_app.core.auth',
+    'require_admin': 'streamlit_app.core.auth',
+    'logout': 'streamlit_app.core.auth',
+    'is_admin': 'streamlit_app.core.auth',
+    'get_all_users': 'streamlit_app.core.auth',
+    'update_user_password': 'streamlit_app.core.auth',
+    'delete_user': 'streamlit_app.core.auth',
+    'delete_users': 'streamlit_app.core.auth',
+    'set_users_role': 'streamlit_app.core.auth',
+    'require_password_reset': 'streamlit_app.core.auth',
+    'is_password_reset_required': 'streamlit_app.core.auth',
+    'require_permission': 'streamlit_app.core.rbac',
+    'has_permission': 'streamlit_app.core.rbac',
+    'get_db_connection': 'streamlit_app.core.database',
+    'init_database': 'streamlit_app.core.database',
+    'init_session_state': 'streamlit_app.core.session',
+    'set_authenticated_user': 'streamlit_app.core.session',
+    'clear_session': 'streamlit_app.core.session',
+    'get_current_user': 'streamlit_app.core.session',
+    'enqueue_message': 'streamlit_app.core.outbox',
+    'get_outbox_counts': 'streamlit_app.core.outbox',
+    'OutboxDispatcher': 'streamlit_app.core.outbox',
+    'check_login_rate_limit': 'streamlit_app.core.rate_limit',
+    'get_client_id': 'streamlit_app.core.rate_limit',
+    'profiled_page': 'streamlit_app.core.profiling',
+    'phase': 'streamlit_app.core.profiling',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name]), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
@@ -0,0 +1,249 @@
+"""
+Archive Module
+Moves old XML messages out of the main database into monthly archive files.
+
+archive_messages() moves every message older than xml_archive_after_days
+into data/archive/xml_messages_YYYY_MM.db (one SQLite file per month of
+creation), in batched transactions that copy a batch into the ATTACHed
+archive and delete it from app.db together. The main database keeps only
+recent messages, so backups, VACUUM and scans of xml_messages stay small.
+
+Readers call message_sources() with the date range they need. It ATTACHes
+each archive overlapping the range in turn, oldest first, then yields the
+main database. Archived months are always older than the messages left in
+app.db, so querying the sources in that order keeps results in time order.
+"""
+
+import glob
+import os
+import re
+import sqlite3
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from streamlit_app.config.app_config import APP_CONFIG
+from streamlit_app.core import metrics
+from streamlit_app.core.audit import audit
+from streamlit_app.core.database import get_db_connection, get_db_path
+
+
+ARCHIVE_SCHEMA = 'archive'
+FILE_PATTERN = re.compile(r"xml_messages_(\d{4})_(\d{2})\.db$")
+
+COLUMNS = "id, filename, content, created_by, created_at, message_type, idempotency_key"
+
+DEFAULT_BATCH_SIZE = 1000
+
+MESSAGES_ARCHIVED = metrics.counter(
+    "xml_messages_archived_total", "XML messages moved to archive databases"
+)
+
+
+def get_archive_dir() -> str:
+    """Directory of the archive files (default: archive/ next to the database)."""
+    return APP_CONFIG.get("xml_archive_dir") or os.path.join(
+        os.path.dirname(get_db_path()), "archive"
+    )
+
+
+def archive_path(year: int, month: int) -> str:
+    """Path of the archive file for one month."""
+    return os.path.join(get_archive_dir(), f"xml_messages_{year:04d}_{month:02d}.db")
+
+
+def list_archives() -> List[Tuple[date, str]]:
+    """
+    List the archive files.
+
+    Returns:
+        list: (first day of the month, path), oldest first
+    """
+    archives = []
+    for path in glob.glob(os.path.join(get_archive_dir(), "xml_messages_*.db")):
+        match = FILE_PATTERN.search(path)
+        if match:
+            archives.append((date(int(match[1]), int(match[2]), 1), path))
+    return sorted(archives)
+
+
+def _next_month(month: date) -> date:
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def _attach(conn: sqlite3.Connection, path: str):
+    conn.execute(f"ATTACH DATABASE ? AS {ARCHIVE_SCHEMA}", (path,))
+
+
+def _detach(conn: sqlite3.Connection):
+    conn.execute(f"DETACH DATABASE {ARCHIVE_SCHEMA}")
+
+
+@contextmanager
+def message_sources(conn: sqlite3.Connection, start_date: Optional[date] = None,
+                    end_date: Optional[date] = None) -> Iterator[Iterator[str]]:
+    """
+    Attach the archives a date range needs, one at a time.
+
+    Use as:
+
+        with message_sources(conn, start, end) as sources:
+            for schema in sources:
+                conn.execute(f"SELECT ... FROM {schema}.xml_messages ...")
+
+    Each archive is attached only while its schema name is being used.
+    Finish one schema's query before asking for the next, and close any
+    cursor still open on it (e.g. in a finally block) before leaving the
+    with block: SQLite cannot detach a database with an unfinished
+    statement.
+
+    Args:
+        conn: Connection to the main database (not in a transaction)
+        start_date: First creation date needed (None: from the oldest message)
+        end_date: Last creation date needed, inclusive (None: up to now)
+
+    Yields:
+        Iterator of schema names: 'archive' once per overlapping archive,
+        oldest first, then 'main'
+    """
+    attached = False
+
+    def sources() -> Iterator[str]:
+        nonlocal attached
+        for month, path in list_archives():
+            if start_date and _next_month(month) <= start_date:
+                continue
+            if end_date and month > end_date:
+                break
+            _attach(conn, path)
+            attached = True
+            yield ARCHIVE_SCHEMA
+            _detach(conn)
+            attached = False
+        yield 'main'
+
+    try:
+        yield sources()
+    finally:
+        if attached:
+            _detach(conn)
+
+
+def _create_archive_table(conn: sqlite3.Connection):
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {ARCHIVE_SCHEMA}.xml_messages (
+            id INTEGER PRIMARY KEY,
+            filename TEXT NOT NULL,
+            content TEXT NOT NULL,
+            created_by TEXT NOT NULL,
+            created_at TIMESTAMP,
+            message_type TEXT,
+            idempotency_key TEXT
+        )
+    """)
+    conn.execute(f"""
+        CREATE INDEX IF NOT EXISTS {ARCHIVE_SCHEMA}.idx_xml_messages_created_at
+        ON xml_messages(created_at)
+    """)
+    conn.execute(f"""
+        CREATE INDEX IF NOT EXISTS {ARCHIVE_SCHEMA}.idx_xml_messages_created_by
+        ON xml_messages(created_by, created_at)
+    """)
+
+
+def _archive_cutoff(older_than_days: float) -> str:
+    """Creation time (UTC, CURRENT_TIMESTAMP format) before which messages are archived."""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=older_than_days)
+    return cutoff.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def archive_messages(older_than_days: Optional[float] = None, dry_run: bool = False,
+                     batch_size: Optional[int] = None) -> Dict:
+    """
+    Move messages older than a given age into the monthly archives.
+
+    Each batch is copied and deleted in one transaction spanning app.db and
+    the archive, and copies are INSERT OR IGNORE, so an interrupted run can
+    simply be repeated.
+
+    Args:
+        older_than_days: Age in days (default: xml_archive_after_days)
+        dry_run: Count the messages per month without moving them
+        batch_size: Messages moved per transaction
+
+    Returns:
+        dict: cutoff, months ({'YYYY-MM': messages}), archived (total) and seconds
+    """
+    started = time.perf_counter()
+    if older_than_days is None:
+        older_than_days = APP_CONFIG.get("xml_archive_after_days", 180)
+    batch_size = batch_size or APP_CONFIG.get("xml_archive_batch_size", DEFAULT_BATCH_SIZE)
+    cutoff = _archive_cutoff(float(older_than_days))
+    result = {'cutoff': cutoff, 'months': {}, 'archived': 0}
+
+    conn = get_db_connection()
+    try:
+        result['months'] = months = {
+            row['month']: row['count'] for row in conn.execute(
+                """
+                SELECT substr(created_at, 1, 7) AS month, COUNT(*) AS count
+                FROM xml_messages WHERE created_at < ?
+                GROUP BY month ORDER BY month
+                """,
+                (cutoff,)
+            )
+        }
+        if dry_run or not months:
+            result['seconds'] = time.perf_counter() - started
+            return result
+
+        os.makedirs(get_archive_dir(), exist_ok=True)
+        for month in months:
+            first_day = date.fromisoformat(f"{month}-01")
+            end = min(cutoff, _next_month(first_day).isoformat())
+            _attach(conn, archive_path(first_day.year, first_day.month))
+            try:
+                _create_archive_table(conn)
+                conn.commit()
+                while True:
+                    # Copy and delete one batch in a single transaction over both files
+                    ids = [
+                        row['id'] for row in conn.execute(
+                            """
+                            SELECT id FROM main.xml_messages
+                            WHERE created_at >= ? AND created_at < ?
+                            ORDER BY id LIMIT ?
+                            """,
+                            (first_day.isoformat(), end, batch_size)
+                        )
+                    ]
+                    if not ids:
+                        break
+                    placeholders = ",".join("?" * len(ids))
+                    conn.execute(
+                        f"INSERT OR IGNORE INTO {ARCHIVE_SCHEMA}.xml_messages ({COLUMNS}) "
+                        f"SELECT {COLUMNS} FROM main.xml_messages WHERE id IN ({placeholders})",
+                        ids
+                    )
+                    conn.execute(
+                        f"DELETE FROM main.xml_messages WHERE id IN ({placeholders})", ids
+                    )
+                    conn.commit()
+                    result['archived'] += len(ids)
+                    MESSAGES_ARCHIVED.inc(len(ids))
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                _detach(conn)
+    except Exception as e:
+        print(f"Error archiving messages: {e}")
+        audit('xml.archive', cutoff, outcome='error', archived=result['archived'], error=str(e))
+        raise
+    finally:
+        conn.close()
+
+    audit('xml.archive', cutoff, archived=result['archived'], months=months)
+    result['seconds'] = time.perf_counter() - started
+    return result
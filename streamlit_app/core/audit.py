@@ -0,0 +1,276 @@
+"""
+Audit Module
+Append-only record of logins, user administration and message activity.
+
+audit() only appends the entry to an in-memory queue, so it costs a few
+microseconds on the request path. A background thread writes the queue to
+the audit_log table in batched transactions, once per
+audit_flush_interval_seconds or as soon as a full batch is waiting. Entries
+still queued when the process exits are written by an exit handler.
+
+The table is append-only: triggers reject every UPDATE and DELETE.
+"""
+
+import atexit
+import json
+import sqlite3
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+from streamlit_app.config.app_config import APP_CONFIG
+from streamlit_app.core import metrics
+from streamlit_app.core.database import pooled_connection
+
+
+# Actions recorded by the application (others may be added freely)
+ACTIONS = (
+    'login',
+    'login.rate_limit',
+    'logout',
+    'session.timeout',
+    'password.change',
+    'user.create',
+    'user.delete',
+    'user.role',
+    'user.password_reset',
+    'user.import',
+    'directory.sync',
+    'permission.create',
+    'role.create',
+    'role.delete',
+    'role.permissions',
+    'user.roles',
+    'xml.save',
+    'xml.export',
+    'xml.archive',
+    'db.backup',
+    'db.restore',
+)
+
+OUTCOMES = ('success', 'failure', 'throttled', 'error')
+
+# Actor of entries recorded outside a browser session (CLI, background jobs)
+SYSTEM_ACTOR = 'system'
+
+AUDIT_EVENTS = metrics.counter(
+    "audit_events_total", "Audit entries by what happened to them", ["result"]
+)
+AUDIT_FLUSH_SECONDS = metrics.histogram(
+    "audit_flush_seconds", "Time to write one batch of audit entries"
+)
+
+
+def _timestamp(seconds: float) -> str:
+    """Format a time like CURRENT_TIMESTAMP (UTC), with milliseconds."""
+    milliseconds = int(seconds % 1 * 1000)
+    return f"{time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(seconds))}.{milliseconds:03d}"
+
+
+class AuditWriter:
+    """Queue of audit entries written to the database by a background thread."""
+
+    def __init__(self, batch_size: int = 500, flush_interval: float = 1.0,
+                 max_pending: int = 100_000):
+        """
+        Args:
+            batch_size: Entries written per transaction
+            flush_interval: Seconds between writes of a partial batch
+            max_pending: Entries queued at most; further entries are dropped
+        """
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending: deque = deque()
+        self._wakeup = threading.Event()
+        self._write_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, entry: Tuple):
+        """Queue an entry (created_at, actor, action, target, outcome, client, details)."""
+        if len(self._pending) >= self.max_pending:
+            AUDIT_EVENTS.inc(result='dropped')
+            return
+        self._pending.append(entry)
+        if self._thread is None:
+            self._start()
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+
+    def _start(self):
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self) -> int:
+        """
+        Write every queued entry now.
+
+        Returns:
+            int: Entries written
+        """
+        written = 0
+        with self._write_lock:
+            while self._pending:
+                batch = []
+                while self._pending and len(batch) < self.batch_size:
+                    batch.append(self._pending.popleft())
+                try:
+                    self._write(batch)
+                except sqlite3.OperationalError as e:
+                    # Typically a locked database: keep the entries for the next flush
+                    print(f"Error writing audit log, will retry: {e}")
+                    self._pending.extendleft(reversed(batch))
+                    break
+                except Exception as e:
+                    print(f"Error writing audit log: {e}")
+                    AUDIT_EVENTS.inc(len(batch), result='failed')
+                    continue
+                written += len(batch)
+        return written
+
+    @staticmethod
+    def _write(batch: List[Tuple]):
+        started = time.perf_counter()
+        with pooled_connection() as conn:
+            conn.executemany(
+                """
+                INSERT INTO audit_log
+                    (created_at, actor, action, target, outcome, client, details)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                [
+                    (_timestamp(created_at), str(actor), action,
+                     None if target is None else str(target), outcome,
+                     None if client is None else str(client),
+                     json.dumps(details, default=str) if details else None)
+                    for created_at, actor, action, target, outcome, client, details in batch
+                ]
+            )
+        AUDIT_FLUSH_SECONDS.observe(time.perf_counter() - started)
+        AUDIT_EVENTS.inc(len(batch), result='written')
+
+    def pending(self) -> int:
+        """Number of queued entries."""
+        return len(self._pending)
+
+
+_writer = AuditWriter(
+    batch_size=APP_CONFIG.get("audit_batch_size", 500),
+    flush_interval=APP_CONFIG.get("audit_flush_interval_seconds", 1.0),
+    max_pending=APP_CONFIG.get("audit_max_pending", 100_000),
+)
+atexit.register(_writer.flush)
+
+metrics.gauge(
+    "audit_pending", "Audit entries waiting to be written"
+).set_function(lambda: _writer.pending())
+
+
+def _session_actor() -> str:
+    """Username of the logged-in user, or SYSTEM_ACTOR outside a session."""
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+        if get_script_run_ctx(suppress_warning=True) is None:
+            return SYSTEM_ACTOR
+        import streamlit as st
+
+        user = st.session_state.get('user')
+    except Exception:
+        return SYSTEM_ACTOR
+    return user['username'] if user else SYSTEM_ACTOR
+
+
+def audit(action: str, target: Optional[str] = None, outcome: str = 'success',
+          actor: Optional[str] = None, client: Optional[str] = None, **details):
+    """
+    Record an audit entry. The entry is written in the background.
+
+    Args:
+        action: What happened, e.g. 'user.delete' (see ACTIONS)
+        target: What it happened to, e.g. a username or filename
+        outcome: 'success', 'failure', 'throttled' or 'error'
+        actor: Who did it (default: the logged-in user, or 'system')
+        client: Client address, if known
+        **details: Anything else worth keeping; stored as JSON
+    """
+    _writer.submit((
+        time.time(), actor or _session_actor(), action, target, outcome, client, details or None
+    ))
+
+
+def flush_audit_log() -> int:
+    """
+    Write queued audit entries now, e.g. before reading the log in a test or script.
+
+    Returns:
+        int: Entries written
+    """
+    return _writer.flush()
+
+
+def get_audit_entries(actor: Optional[str] = None, action: Optional[str] = None,
+                      outcome: Optional[str] = None, since: Optional[str] = None,
+                      until: Optional[str] = None, before_id: Optional[int] = None,
+                      limit: int = 50) -> List[Dict]:
+    """
+    Get audit entries, newest first, one page at a time.
+
+    Pages are found by keyset rather than OFFSET: pass the id of the last
+    entry of a page as before_id to get the next one, which costs the same
+    on the first page and the thousandth.
+
+    Args:
+        actor: Only entries by this user
+        action: Only entries with this action
+        outcome: Only entries with this outcome
+        since: Only entries at or after this UTC time ('YYYY-MM-DD[ HH:MM:SS]')
+        until: Only entries before this UTC time
+        before_id: Only entries older than this entry
+        limit: Entries per page
+
+    Returns:
+        list: Dictionaries with id, created_at, actor, action, target,
+        outcome, client and details (dict or None)
+    """
+    conditions, params = [], []
+    for column, value in (('actor', actor), ('action', action), ('outcome', outcome)):
+        if value:
+            conditions.append(f"{column} = ?")
+            params.append(value)
+    if since:
+        conditions.append("created_at >= ?")
+        params.append(since)
+    if until:
+        conditions.append("created_at < ?")
+        params.append(until)
+    if before_id is not None:
+        conditions.append("id < ?")
+        params.append(before_id)
+
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    with pooled_connection() as conn:
+        rows = conn.execute(
+            f"""
+            SELECT id, created_at, actor, action, target, outcome, client, details
+            FROM audit_log {where}
+            ORDER BY id DESC
+            LIMIT ?
+            """,
+            params + [limit]
+        ).fetchall()
+
+    return [
+        {**dict(row), 'details': json.loads(row['details']) if row['details'] else None}
+        for row in rows
+    ]
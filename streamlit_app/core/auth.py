@@ -3,10 +3,39 @@ Authentication Module
 Handles user authentication, password hashing, and session management.
 """
 
-import bcrypt
+import json
+import threading
+import time
 import streamlit as st
-from typing import Optional, Dict
-from streamlit_app.core.database import get_db_connection
+from typing import Optional, Dict, List
+from streamlit_app.core.database import get_db_connection, pooled_connection
+from streamlit_app.core import metrics
+from streamlit_app.core.audit import audit
+from streamlit_app.core.cache_versions import clear_run_cache, get_version
+from streamlit_app.core.profiling import phase
+
+
+LOGIN_ATTEMPTS = metrics.counter("auth_login_attempts_total", "Login attempts", ["result"])
+LOGIN_SECONDS = metrics.histogram("auth_login_seconds", "Time to check a login")
+BCRYPT_SECONDS = metrics.histogram(
+    "auth_bcrypt_seconds", "Time spent in bcrypt", ["operation"]
+)
+BCRYPT_IN_PROGRESS = metrics.gauge(
+    "auth_bcrypt_in_progress", "bcrypt operations running or waiting to run"
+)
+
+
+# Stored instead of a hash for users who cannot log in with a password
+# (e.g. synced from the directory before an administrator sets one)
+UNUSABLE_PASSWORD = '!'
+
+
+# Process-wide copy of the users table, keyed by username. It is reloaded
+# when the 'users' cache version changes, i.e. after a write by any process.
+_user_cache: Dict[str, Dict] = {}
+_user_cache_version: Optional[int] = None
+_user_cache_generation = 0
+_user_cache_lock = threading.Lock()
 
 
 def hash_password(password: str) -> str:
@@ -19,8 +48,12 @@ def hash_password(password: str) -> str:
     Returns:
         str: Hashed password
     """
-    salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
+    import bcrypt
+    
+    with BCRYPT_IN_PROGRESS.track_in_progress(), BCRYPT_SECONDS.time(operation='hash'), \
+            phase('bcrypt'):
+        salt = bcrypt.gensalt()
+        hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
     return hashed.decode('utf-8')
 
 
@@ -35,7 +68,72 @@ def verify_password(password: str, password_hash: str) -> bool:
     Returns:
         bool: True if password matches, False otherwise
     """
-    return bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
+    import bcrypt
+    
+    if not password_hash.startswith('$2'):
+        # UNUSABLE_PASSWORD or another value no password can match
+        return False
+    
+    with BCRYPT_IN_PROGRESS.track_in_progress(), BCRYPT_SECONDS.time(operation='verify'), \
+            phase('bcrypt'):
+        return bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
+
+
+def load_user_cache() -> int:
+    """
+    Read every user into the process-wide user cache.
+    
+    Returns:
+        int: Number of cached users
+    """
+    global _user_cache, _user_cache_version, _user_cache_generation
+    
+    # Read before the rows: a write in between only causes one more reload
+    version = get_version('users')
+    with pooled_connection() as conn:
+        rows = conn.execute(
+            "SELECT id, username, password_hash, role, source, password_reset_required, "
+            "created_at FROM users"
+        ).fetchall()
+    
+    with _user_cache_lock:
+        _user_cache = {row['username']: dict(row) for row in rows}
+        _user_cache_version = version
+        _user_cache_generation += 1
+    return len(rows)
+
+
+def invalidate_user_cache():
+    """Drop the user cache so the next read reloads it."""
+    global _user_cache_version
+    
+    with _user_cache_lock:
+        _user_cache_version = None
+    clear_run_cache()
+
+
+def _get_user_cache() -> Dict[str, Dict]:
+    """Get the user cache, reloading it when it is missing or stale."""
+    version = _user_cache_version
+    if version is None or version != get_version('users'):
+        load_user_cache()
+    return _user_cache
+
+
+def get_cached_user(username: str) -> Optional[Dict]:
+    """
+    Get a user from the process-wide user cache.
+    
+    Returns:
+        Dict with id, username, password_hash, role, source,
+        password_reset_required and created_at, or None if there is no such user
+    """
+    return _get_user_cache().get(username)
+
+
+def get_user_cache_generation() -> int:
+    """Get a number that changes every time the user cache is reloaded."""
+    return _user_cache_generation
 
 
 def authenticate_user(username: str, password: str) -> Optional[Dict]:
@@ -49,24 +147,30 @@ def authenticate_user(username: str, password: str) -> Optional[Dict]:
     Returns:
         Dict with user info if authenticated, None otherwise
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    started = time.perf_counter()
+    result = None
     
-    cursor.execute(
-        "SELECT id, username, password_hash, role FROM users WHERE username = ?",
-        (username,)
-    )
-    user = cursor.fetchone()
-    conn.close()
+    user = _get_user_cache().get(username)
+    if user is None:
+        # The user may have been created by another process since the cache was loaded
+        with pooled_connection() as conn:
+            user = conn.execute(
+                "SELECT id, username, password_hash, role, password_reset_required "
+                "FROM users WHERE username = ?",
+                (username,)
+            ).fetchone()
     
     if user and verify_password(password, user['password_hash']):
-        return {
+        result = {
             'id': user['id'],
             'username': user['username'],
-            'role': user['role']
+            'role': user['role'],
+            'password_reset_required': bool(user['password_reset_required'])
         }
     
-    return None
+    LOGIN_SECONDS.observe(time.perf_counter() - started)
+    LOGIN_ATTEMPTS.inc(result='success' if result else 'failure')
+    return result
 
 
 def create_user(username: str, password: str, role: str = 'user') -> bool:
@@ -94,15 +198,18 @@ def create_user(username: str, password: str, role: str = 'user') -> bool:
         
         conn.commit()
         conn.close()
+        invalidate_user_cache()
+        audit('user.create', username, role=role)
         return True
     except Exception as e:
         print(f"Error creating user: {e}")
+        audit('user.create', username, outcome='error', role=role, error=str(e))
         return False
 
 
 def update_user_password(user_id: int, new_password: str) -> bool:
     """
-    Update a user's password.
+    Update a user's password. This also clears a forced password reset.
     
     Args:
         user_id: ID of the user
@@ -118,15 +225,19 @@ def update_user_password(user_id: int, new_password: str) -> bool:
         password_hash = hash_password(new_password)
         
         cursor.execute(
-            "UPDATE users SET password_hash = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+            "UPDATE users SET password_hash = ?, password_reset_required = 0, "
+            "updated_at = CURRENT_TIMESTAMP WHERE id = ?",
             (password_hash, user_id)
         )
         
         conn.commit()
         conn.close()
+        invalidate_user_cache()
+        audit('password.change', user_id=user_id)
         return True
     except Exception as e:
         print(f"Error updating password: {e}")
+        audit('password.change', outcome='error', user_id=user_id, error=str(e))
         return False
 
 
@@ -140,20 +251,104 @@ def delete_user(user_id: int) -> bool:
     Returns:
         bool: True if user deleted successfully, False otherwise
     """
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("DELETE FROM users WHERE id = ?", (user_id,))
+    return delete_users([user_id])
+
+
+def _bulk_update(description: str, event: str, sql: str, user_ids: List[int],
+                 params: List[tuple], **details) -> bool:
+    """
+    Run one statement for many users in a single transaction.
+    
+    The cache is invalidated and one audit entry is recorded for the whole batch.
+    
+    Args:
+        description: What is being done, for the error message
+        event: Audit action
+        sql: Statement with placeholders
+        user_ids: IDs of the users
+        params: One parameter tuple per user
+        **details: Extra audit details
         
-        conn.commit()
-        conn.close()
+    Returns:
+        bool: True if every row was written, False if nothing was
+    """
+    if not params:
+        return True
+    try:
+        with pooled_connection() as conn:
+            # Read the names first: after a delete they are gone
+            usernames = [
+                row['username'] for row in conn.execute(
+                    "SELECT username FROM users WHERE id IN (SELECT value FROM json_each(?))",
+                    (json.dumps(user_ids),)
+                )
+            ]
+            conn.executemany(sql, params)
+        invalidate_user_cache()
+        audit(event, f"{len(usernames)} user(s)", usernames=usernames, **details)
         return True
     except Exception as e:
-        print(f"Error deleting user: {e}")
+        print(f"Error {description}: {e}")
+        audit(event, f"{len(user_ids)} user(s)", outcome='error', user_ids=user_ids,
+              error=str(e), **details)
         return False
 
 
+def delete_users(user_ids: List[int]) -> bool:
+    """
+    Delete many users at once.
+    
+    Args:
+        user_ids: IDs of the users to delete
+        
+    Returns:
+        bool: True if the users were deleted, False otherwise (none are)
+    """
+    return _bulk_update(
+        "deleting users", 'user.delete', "DELETE FROM users WHERE id = ?",
+        user_ids, [(user_id,) for user_id in user_ids]
+    )
+
+
+def set_users_role(user_ids: List[int], role: str) -> bool:
+    """
+    Give many users the same primary role.
+    
+    Args:
+        user_ids: IDs of the users
+        role: New role
+        
+    Returns:
+        bool: True if the roles were changed, False otherwise (none are)
+    """
+    return _bulk_update(
+        "changing roles", 'user.role',
+        "UPDATE users SET role = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+        user_ids, [(role, user_id) for user_id in user_ids], role=role
+    )
+
+
+def require_password_reset(user_ids: List[int]) -> bool:
+    """
+    Make many users choose a new password before they can continue.
+    
+    Users who are logged in are sent to the password form on their next
+    page load, in every process.
+    
+    Args:
+        user_ids: IDs of the users
+        
+    Returns:
+        bool: True if the users were flagged, False otherwise (none are)
+    """
+    return _bulk_update(
+        "requiring password resets", 'user.password_reset',
+        "UPDATE users SET password_reset_required = 1, updated_at = CURRENT_TIMESTAMP "
+        "WHERE id = ?",
+        user_ids, [(user_id,) for user_id in user_ids]
+    )
+
+
 def get_all_users():
     """
     Get all users (excluding password hashes).
@@ -161,14 +356,23 @@ def get_all_users():
     Returns:
         list: List of user dictionaries
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute("SELECT id, username, role, created_at FROM users ORDER BY username")
-    users = cursor.fetchall()
-    conn.close()
+    keys = ('id', 'username', 'role', 'source', 'password_reset_required', 'created_at')
+    users = _get_user_cache()
+    return [{key: users[username][key] for key in keys} for username in sorted(users)]
+
+
+def is_password_reset_required(user: Dict) -> bool:
+    """
+    Check whether a logged-in user must choose a new password.
     
-    return [dict(user) for user in users]
+    Args:
+        user: User dictionary from the session
+        
+    Returns:
+        bool: True if an administrator has required a password reset
+    """
+    current = get_cached_user(user['username'])
+    return bool(current and current['id'] == user['id'] and current['password_reset_required'])
 
 
 def is_admin(user: Dict) -> bool:
@@ -192,11 +396,16 @@ def require_auth() -> bool:
     Returns:
         bool: True if user is authenticated, False otherwise
     """
-    if 'authenticated' not in st.session_state or not st.session_state.authenticated:
-        st.warning("⚠️ Please log in to access this page.")
-        st.info("👈 Use the login form in the sidebar.")
-        return False
-    return True
+    with phase('require_auth'):
+        if 'authenticated' not in st.session_state or not st.session_state.authenticated:
+            st.warning("⚠️ Please log in to access this page.")
+            st.info("👈 Use the login form in the sidebar.")
+            return False
+        if is_password_reset_required(st.session_state.user):
+            st.warning("⚠️ You must choose a new password before you continue.")
+            st.info("👈 Go to the home page to set it.")
+            return False
+        return True
 
 
 def require_admin() -> bool:
@@ -0,0 +1,343 @@
+"""
+Backup Module
+Online backups of the database through SQLite's backup API.
+
+The database is copied backup_pages_per_step pages at a time, with a pause
+between steps, so the copy only holds a read lock for one short step at a
+time and the app keeps serving requests. Writes made during the copy make
+SQLite start it over, so the result is always a consistent snapshot; each
+restart doubles the step size, so even a busy database is copied. The copy
+is checked with PRAGMA quick_check, gzip-compressed and moved into
+backup_dir under a name with the time to the microsecond, so backups taken
+in the same second (e.g. a restore's safety backup) never replace each
+other. Old backups are then pruned: the
+newest backup_keep_last are kept, plus the newest of each of the last
+backup_keep_daily days.
+
+`app backup` runs in its own process (at a lower CPU priority), so neither
+the copy nor the compression competes with the app for the GIL.
+"""
+
+import gzip
+import os
+import re
+import shutil
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from streamlit_app.config.app_config import APP_CONFIG
+from streamlit_app.core import metrics
+from streamlit_app.core.audit import audit
+from streamlit_app.core.cache_versions import bump_versions
+from streamlit_app.core.database import (
+    close_pooled_connections,
+    get_db_connection,
+    get_db_path,
+)
+
+
+# app-YYYYMMDD-HHMMSS-ffffff.db.gz; older backups have no microseconds
+FILE_PATTERN = re.compile(r"^app-(\d{8})-(\d{6})(?:-(\d{6}))?\.db\.gz$")
+
+BACKUP_SECONDS = metrics.histogram(
+    "db_backup_seconds", "Time to create, verify and compress a backup"
+)
+BACKUP_RESTARTS = metrics.counter(
+    "db_backup_restarts_total", "Backups started over because the database changed"
+)
+BACKUP_BYTES = metrics.gauge("db_backup_bytes", "Size of the latest compressed backup")
+
+
+class BackupError(Exception):
+    """A backup could not be created, verified or restored."""
+
+
+def get_backup_dir() -> str:
+    """Directory of the backups (default: backups/ next to the database)."""
+    return APP_CONFIG.get("backup_dir") or os.path.join(
+        os.path.dirname(get_db_path()), "backups"
+    )
+
+
+def list_backups() -> List[Dict]:
+    """
+    List the backups, newest first.
+
+    Returns:
+        list: Dictionaries with path, created_at (UTC datetime) and bytes
+    """
+    directory = get_backup_dir()
+    if not os.path.isdir(directory):
+        return []
+    backups = []
+    for name in os.listdir(directory):
+        match = FILE_PATTERN.match(name)
+        if match:
+            path = os.path.join(directory, name)
+            created_at = datetime.strptime(
+                match[1] + match[2] + (match[3] or "000000"), "%Y%m%d%H%M%S%f"
+            )
+            backups.append({
+                'path': path,
+                'created_at': created_at.replace(tzinfo=timezone.utc),
+                'bytes': os.path.getsize(path),
+            })
+    return sorted(backups, key=lambda backup: backup['created_at'], reverse=True)
+
+
+def _verify_database(path: str, name: str) -> int:
+    """
+    Open a database file and run PRAGMA quick_check on it.
+
+    Args:
+        path: Database file
+        name: What to call it in error messages
+
+    Returns:
+        int: Number of tables
+
+    Raises:
+        BackupError: If the file is not a healthy database
+    """
+    try:
+        conn = sqlite3.connect(path)
+        try:
+            problems = [row[0] for row in conn.execute("PRAGMA quick_check(20)")]
+            tables = conn.execute(
+                "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table'"
+            ).fetchone()[0]
+        finally:
+            conn.close()
+    except sqlite3.DatabaseError as e:
+        raise BackupError(f"{name} is not a usable database: {e}") from e
+    if problems != ['ok']:
+        raise BackupError(f"{name} failed its integrity check: {'; '.join(problems)}")
+    if not tables:
+        raise BackupError(f"{name} contains no tables")
+    return tables
+
+
+class _Restarted(Exception):
+    """Another connection wrote to the database, so SQLite restarted the copy."""
+
+
+def _copy_database(target: str, pages: int, sleep: float) -> int:
+    """
+    Copy the live database into a new file with the online backup API.
+
+    Every write by another connection makes SQLite start the copy over. So
+    that a busy database is still copied in the end, each restart doubles
+    the pages per step and shortens the copy accordingly.
+
+    Returns:
+        int: Restarts
+    """
+    restarts = 0
+    while True:
+        remaining_before = None
+
+        def progress(status, remaining, total):
+            nonlocal remaining_before
+            if remaining_before is not None and remaining > remaining_before:
+                raise _Restarted()
+            remaining_before = remaining
+
+        # Start from an empty file: a partial copy is not a valid database
+        open(target, "wb").close()
+        source = get_db_connection()
+        destination = sqlite3.connect(target)
+        # The copy is temporary: only the compressed file is synced to disk.
+        # Syncing 'target' would make the app's own commits queue behind it.
+        destination.execute("PRAGMA synchronous = OFF")
+        destination.execute("PRAGMA journal_mode = OFF")
+        try:
+            source.backup(destination, pages=pages, progress=progress, sleep=sleep)
+            return restarts
+        except _Restarted:
+            restarts += 1
+            BACKUP_RESTARTS.inc()
+            pages *= 2
+        finally:
+            destination.close()
+            source.close()
+
+
+def create_backup(pages_per_step: Optional[int] = None,
+                  step_sleep_seconds: Optional[float] = None, prune: bool = True) -> Dict:
+    """
+    Back up the database into backup_dir and prune old backups.
+
+    Args:
+        pages_per_step: Pages copied per step (default: backup_pages_per_step)
+        step_sleep_seconds: Pause between steps (default: backup_step_sleep_seconds)
+        prune: Delete the backups outside the retention policy afterwards
+
+    Returns:
+        dict: path, bytes (compressed), database_bytes, tables, seconds,
+        restarts and removed (paths of pruned backups)
+
+    Raises:
+        BackupError: If the copy fails its check; nothing is kept then
+    """
+    started = time.perf_counter()
+    pages = pages_per_step or APP_CONFIG.get("backup_pages_per_step", 256)
+    sleep = step_sleep_seconds
+    if sleep is None:
+        sleep = APP_CONFIG.get("backup_step_sleep_seconds", 0.005)
+
+    directory = get_backup_dir()
+    os.makedirs(directory, exist_ok=True)
+    name = f"app-{datetime.now(timezone.utc).strftime('%Y%m%d-%H%M%S-%f')}.db.gz"
+    path = os.path.join(directory, name)
+
+    fd, copy_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=".db")
+    os.close(fd)
+    partial_path = f"{path}.partial"
+    try:
+        restarts = _copy_database(copy_path, pages, sleep)
+        tables = _verify_database(copy_path, "The copy of the database")
+        database_bytes = os.path.getsize(copy_path)
+
+        level = APP_CONFIG.get("backup_compress_level", 6)
+        with open(copy_path, "rb") as src, gzip.open(partial_path, "wb", level) as dst:
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+        with open(partial_path, "rb") as compressed:
+            os.fsync(compressed.fileno())
+        os.replace(partial_path, path)
+    except Exception as e:
+        audit('db.backup', name, outcome='error', error=str(e))
+        if os.path.exists(partial_path):
+            os.unlink(partial_path)
+        raise
+    finally:
+        os.unlink(copy_path)
+
+    removed = prune_backups() if prune else []
+    seconds = time.perf_counter() - started
+    size = os.path.getsize(path)
+    BACKUP_SECONDS.observe(seconds)
+    BACKUP_BYTES.set(size)
+    audit('db.backup', name, bytes=size, database_bytes=database_bytes,
+          seconds=round(seconds, 3), restarts=restarts, removed=len(removed))
+    return {
+        'path': path,
+        'bytes': size,
+        'database_bytes': database_bytes,
+        'tables': tables,
+        'seconds': seconds,
+        'restarts': restarts,
+        'removed': removed,
+    }
+
+
+def prune_backups(keep_last: Optional[int] = None, keep_daily: Optional[int] = None) -> List[str]:
+    """
+    Delete backups outside the retention policy.
+
+    Args:
+        keep_last: Newest backups always kept (default: backup_keep_last)
+        keep_daily: Days for which the newest backup of the day is kept
+            (default: backup_keep_daily)
+
+    Returns:
+        list: Paths of the deleted backups
+    """
+    if keep_last is None:
+        keep_last = APP_CONFIG.get("backup_keep_last", 7)
+    if keep_daily is None:
+        keep_daily = APP_CONFIG.get("backup_keep_daily", 14)
+
+    backups = list_backups()
+    keep = {backup['path'] for backup in backups[:keep_last]}
+    days = set()
+    for backup in backups:
+        day = backup['created_at'].date()
+        if day not in days and len(days) < keep_daily:
+            days.add(day)
+            keep.add(backup['path'])
+
+    removed = []
+    for backup in backups:
+        if backup['path'] not in keep:
+            os.unlink(backup['path'])
+            removed.append(backup['path'])
+    return removed
+
+
+def _decompress(path: str, directory: str) -> str:
+    """Decompress a backup into a temporary file and return its path."""
+    fd, copy_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=".db")
+    try:
+        with os.fdopen(fd, "wb") as dst, gzip.open(path, "rb") as src:
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+    except (OSError, EOFError) as e:
+        os.unlink(copy_path)
+        raise BackupError(f"{path} cannot be decompressed: {e}") from e
+    return copy_path
+
+
+def verify_backup(path: str) -> int:
+    """
+    Check that a backup decompresses into a healthy database.
+
+    Returns:
+        int: Number of tables
+
+    Raises:
+        BackupError: If it does not
+    """
+    copy_path = _decompress(path, os.path.dirname(path) or ".")
+    try:
+        return _verify_database(copy_path, path)
+    finally:
+        os.unlink(copy_path)
+
+
+def restore_backup(path: str) -> Dict:
+    """
+    Replace the contents of the database with a backup.
+
+    The backup is verified first, and the current database is backed up
+    before it is overwritten. The copy goes through the backup API into the
+    live file, so it is atomic. It is done in a single step: SQLite holds
+    the write lock on the destination from the first step to the last
+    however the copy is split, so stepping would only make the lock last
+    longer. Other connections' writes wait for it (and fail with "database
+    is locked" after their busy timeout on a large database). Cache versions
+    are bumped afterwards, so running processes reload their caches, but
+    stop the app anyway: sessions still hold state read from the replaced
+    database.
+
+    Args:
+        path: Backup file (.db.gz)
+
+    Returns:
+        dict: restored (path), tables and safety_backup (path of the backup
+        taken just before the restore)
+
+    Raises:
+        BackupError: If the backup is not usable; the database is untouched
+    """
+    copy_path = _decompress(path, os.path.dirname(get_db_path()) or ".")
+    try:
+        tables = _verify_database(copy_path, path)
+        safety_backup = create_backup(prune=False)['path']
+
+        close_pooled_connections()
+        source = sqlite3.connect(copy_path)
+        destination = get_db_connection()
+        try:
+            source.backup(destination)
+        finally:
+            destination.close()
+            source.close()
+    finally:
+        os.unlink(copy_path)
+    # The restored versions may be ones a cache has already seen
+    bump_versions()
+
+    audit('db.restore', os.path.basename(path), safety_backup=os.path.basename(safety_backup))
+    return {'restored': path, 'tables': tables, 'safety_backup': safety_backup}
@@ -0,0 +1,157 @@
+"""
+Cache Versions Module
+Tells in-process caches when any process changed the data behind them.
+
+Each cache has a row in the cache_versions table. Triggers bump it in the
+same transaction as every write to the cache's tables (CACHED_TABLES in
+core/database.py), whichever process or tool makes the write. A cache keeps
+the version it loaded and reloads only once get_version() returns another
+one.
+
+Checking is cheap: one connection per process polls PRAGMA data_version,
+which only changes after another connection commits, and reads the table
+again only then.
+
+During a page run (see profiled_page()), the versions are polled once, on
+the first get_version() of the run, and every later call reads that
+snapshot without a query or the lock. Values derived from cached data, such
+as permission bits, can be kept until the end of the run in run_cache().
+Another process's write is therefore seen from the next rerun on.
+"""
+
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+from streamlit_app.config.app_config import subscribe
+from streamlit_app.core import metrics
+from streamlit_app.core.database import get_db_connection, pooled_connection
+
+
+VERSION_READS = metrics.counter(
+    "cache_version_reads_total", "Reads of cache_versions after another connection committed"
+)
+
+
+class _VersionState:
+    """The process's polling connection and the versions it last read."""
+
+    def __init__(self):
+        self.conn: Optional[sqlite3.Connection] = None
+        self.data_version: Optional[int] = None
+        self.versions: Dict[str, int] = {}
+        self.lock = threading.Lock()
+
+
+class _RunSnapshot:
+    """Versions seen by one page run, and values derived from them."""
+
+    __slots__ = ('versions', 'cache')
+
+    def __init__(self):
+        self.versions: Optional[Dict[str, int]] = None
+        self.cache: Dict = {}
+
+
+_state = _VersionState()
+_local = threading.local()
+
+
+def _poll_versions() -> Dict[str, int]:
+    """Get every cache's version, reading the table only after another commit."""
+    with _state.lock:
+        if _state.conn is None:
+            _state.conn = get_db_connection()
+        data_version = _state.conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version != _state.data_version:
+            _state.versions = dict(
+                _state.conn.execute("SELECT name, version FROM cache_versions").fetchall()
+            )
+            _state.data_version = data_version
+            VERSION_READS.inc()
+        return _state.versions
+
+
+def get_version(name: str) -> int:
+    """
+    Get the current version of a cache's data.
+
+    Call it before loading the data, and reload when it differs from the
+    version the cache was loaded at. Inside a page run this is the version
+    at the run's first call.
+
+    Args:
+        name: Cache name, a key of CACHED_TABLES
+
+    Returns:
+        int: Version
+    """
+    run: Optional[_RunSnapshot] = getattr(_local, 'run', None)
+    if run is None:
+        return _poll_versions().get(name, 0)
+    if run.versions is None:
+        run.versions = _poll_versions()
+    return run.versions.get(name, 0)
+
+
+@contextmanager
+def run_snapshot() -> Iterator[None]:
+    """Check the versions at most once for the page run on this thread."""
+    if getattr(_local, 'run', None) is not None:
+        yield
+        return
+    _local.run = _RunSnapshot()
+    try:
+        yield
+    finally:
+        _local.run = None
+
+
+def run_cache() -> Optional[Dict]:
+    """
+    Get a dictionary that lives until the end of the current page run.
+
+    Returns:
+        dict, or None outside a page run
+    """
+    run: Optional[_RunSnapshot] = getattr(_local, 'run', None)
+    return run.cache if run is not None else None
+
+
+def clear_run_cache():
+    """Forget the values derived in this run, e.g. after the run changed their data."""
+    run: Optional[_RunSnapshot] = getattr(_local, 'run', None)
+    if run is not None:
+        run.cache.clear()
+
+
+def bump_versions():
+    """
+    Invalidate every cache in every process, e.g. after a restore.
+
+    A restored database brings back versions that caches may already have
+    seen, so the versions jump to the current time in milliseconds, which
+    is ahead of anything counted since the last jump.
+    """
+    with pooled_connection() as conn:
+        conn.execute(
+            """
+            UPDATE cache_versions SET version = max(
+                version + 1, CAST((julianday('now') - 2440587.5) * 86400000 AS INTEGER)
+            )
+            """
+        )
+
+
+def reset():
+    """Close the polling connection, e.g. because the database was replaced."""
+    with _state.lock:
+        if _state.conn is not None:
+            _state.conn.close()
+        _state.conn = None
+        _state.data_version = None
+        _state.versions = {}
+
+
+subscribe(lambda old, new: reset() if old.get("db_path") != new.get("db_path") else None)
@@ -5,8 +5,15 @@ Handles SQLite database connection and operations.
 
 import sqlite3
 import os
-from typing import Optional
-from streamlit_app.config.app_config import APP_CONFIG
+import queue
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Deque, Dict, Iterator, List, Optional
+from streamlit_app.config.app_config import APP_CONFIG, subscribe
+from streamlit_app.core import metrics
+from streamlit_app.core.profiling import phase
 
 
 def get_db_path() -> str:
@@ -20,18 +27,98 @@ def ensure_data_directory():
     os.makedirs(os.path.dirname(db_path), exist_ok=True)
 
 
-def get_db_connection() -> sqlite3.Connection:
+QUERY_SECONDS = metrics.histogram(
+    "db_query_seconds", "Time to execute an SQL statement", ["operation"]
+)
+SLOW_QUERIES = metrics.counter(
+    "db_slow_queries_total", "SQL statements slower than db_slow_query_ms"
+)
+
+_QUERY_OPERATIONS = {
+    "select", "insert", "update", "delete", "begin", "pragma", "analyze", "vacuum", "attach",
+}
+
+# Most recent slow statements, oldest first
+_slow_queries: Deque[Dict] = deque(maxlen=100)
+
+
+def _record_query(sql: str, seconds: float):
+    """Record the latency of one statement and remember it if it was slow."""
+    words = sql.split(None, 1)
+    operation = words[0].lower() if words else "other"
+    QUERY_SECONDS.observe(
+        seconds, operation=operation if operation in _QUERY_OPERATIONS else "other"
+    )
+    if seconds * 1000 >= APP_CONFIG.get("db_slow_query_ms", 100):
+        SLOW_QUERIES.inc()
+        _slow_queries.append({
+            'sql': " ".join(sql.split())[:500],
+            'seconds': seconds,
+            'at': time.time(),
+        })
+
+
+def get_slow_queries() -> List[Dict]:
     """
-    Get a connection to the SQLite database.
+    Get the most recent slow statements, newest first.
     
     Returns:
-        sqlite3.Connection: Database connection object
+        list: Dictionaries with sql, seconds and at (a Unix timestamp)
     """
-    ensure_data_directory()
+    return list(reversed(_slow_queries))
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Cursor that records the latency of every statement it executes."""
+    
+    def execute(self, sql, parameters=()):
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            _record_query(sql, time.perf_counter() - started)
+    
+    def executemany(self, sql, seq_of_parameters):
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            _record_query(sql, time.perf_counter() - started)
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Connection whose statements all run on instrumented cursors."""
+    
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+    
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+    
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+# Tables behind each in-process cache: writes to them bump the cache's
+# row in cache_versions (see core/cache_versions.py)
+CACHED_TABLES = {
+    'users': ('users',),
+    'permissions': ('permissions', 'roles', 'role_permissions', 'user_roles'),
+    'xml_messages': ('xml_messages',),
+}
+
+
+# Set once init_database() has run in this process
+_database_ready = False
+_database_ready_lock = threading.Lock()
+
+
+def _connect() -> sqlite3.Connection:
+    """Open a new connection without checking that the schema exists."""
     db_path = get_db_path()
     
     # Enable foreign key constraints
-    conn = sqlite3.connect(db_path, check_same_thread=False)
+    conn = sqlite3.connect(db_path, check_same_thread=False, factory=InstrumentedConnection)
     conn.execute("PRAGMA foreign_keys = ON")
     
     # Return rows as dictionaries for easier access
@@ -40,15 +127,136 @@ def get_db_connection() -> sqlite3.Connection:
     return conn
 
 
+def ensure_database():
+    """
+    Initialize the database once per process.
+    Tables are created with IF NOT EXISTS, so this also adds tables
+    introduced after the database file was created.
+    """
+    global _database_ready
+    
+    if _database_ready:
+        return
+    with _database_ready_lock:
+        if not _database_ready:
+            init_database()
+            _database_ready = True
+
+
+def get_db_connection() -> sqlite3.Connection:
+    """
+    Get a connection to the SQLite database.
+    The database is initialized on the first call in each process.
+    
+    Returns:
+        sqlite3.Connection: Database connection object
+    """
+    ensure_database()
+    return _connect()
+
+
+# Idle connections kept for reuse by pooled_connection()
+_connection_pool: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue(
+    maxsize=APP_CONFIG.get("db_pool_size", 8)
+)
+
+
+metrics.gauge(
+    "db_pool_idle_connections", "Idle connections in the connection pool"
+).set_function(lambda: _connection_pool.qsize())
+
+
+@contextmanager
+def pooled_connection() -> Iterator[sqlite3.Connection]:
+    """
+    Borrow a database connection from the process-wide pool.
+    
+    The block runs as one transaction: it is committed on success and rolled
+    back if an exception escapes. The connection goes back to the pool
+    afterwards instead of being closed.
+    
+    Yields:
+        sqlite3.Connection: Database connection object
+    """
+    try:
+        conn = _connection_pool.get_nowait()
+    except queue.Empty:
+        conn = get_db_connection()
+    
+    try:
+        with phase("db"):
+            yield conn
+            conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        try:
+            _connection_pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+
+def close_pooled_connections():
+    """Close every idle connection in the pool."""
+    while True:
+        try:
+            _connection_pool.get_nowait().close()
+        except queue.Empty:
+            return
+
+
+def _on_config_change(old, new):
+    """Reconnect when the database settings change."""
+    global _database_ready, _connection_pool
+    
+    if old.get("db_path") != new.get("db_path"):
+        close_pooled_connections()
+        # The new database may not have the schema yet
+        with _database_ready_lock:
+            _database_ready = False
+    
+    if old.get("db_pool_size") != new.get("db_pool_size"):
+        previous = _connection_pool
+        _connection_pool = queue.LifoQueue(maxsize=new.get("db_pool_size", 8))
+        while True:
+            try:
+                previous.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+subscribe(_on_config_change)
+
+
+def add_column_if_missing(cursor: sqlite3.Cursor, table: str, column: str, definition: str):
+    """
+    Add a column to an existing table unless it is already there.
+    
+    Args:
+        cursor: Database cursor
+        table: Table name
+        column: Column name
+        definition: Column type and constraints, e.g. "TEXT NOT NULL DEFAULT ''"
+    """
+    cursor.execute(f"PRAGMA table_info({table})")
+    if column not in {row[1] for row in cursor.fetchall()}:
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
 def init_database():
     """
     Initialize the database with required tables.
     This is called automatically on first run.
     """
     ensure_data_directory()
-    conn = get_db_connection()
+    conn = _connect()
     cursor = conn.cursor()
     
+    # Lets maintenance return free pages without a full VACUUM (core/maintenance.py).
+    # Only takes effect for a new database file; existing ones keep their setting.
+    cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    
     # Create users table
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS users (
@@ -66,6 +274,194 @@ def init_database():
         CREATE INDEX IF NOT EXISTS idx_username ON users(username)
     """)
     
+    # Where a user comes from: 'local' (created in the app) or 'directory'
+    add_column_if_missing(cursor, "users", "source", "TEXT NOT NULL DEFAULT 'local'")
+    
+    # Set by an administrator; the user must choose a new password to continue
+    add_column_if_missing(
+        cursor, "users", "password_reset_required", "INTEGER NOT NULL DEFAULT 0"
+    )
+    
+    # Directory syncs read their users in username order
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_users_source ON users(source, username)
+    """)
+    
+    # Watermark of the last sync from each external source
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS sync_state (
+            source TEXT PRIMARY KEY,
+            watermark TEXT NOT NULL,
+            synced_at TIMESTAMP NOT NULL,
+            stats TEXT
+        )
+    """)
+    
+    # Saved XML messages
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS xml_messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            filename TEXT NOT NULL,
+            content TEXT NOT NULL,
+            created_by TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    add_column_if_missing(cursor, "xml_messages", "message_type", "TEXT")
+    add_column_if_missing(cursor, "xml_messages", "idempotency_key", "TEXT")
+    
+    # Repeated submissions of the same generated message are ignored
+    cursor.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_xml_messages_idempotency_key
+        ON xml_messages(idempotency_key)
+    """)
+    
+    # Exports and listings filter by date, author and type
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_xml_messages_created_at ON xml_messages(created_at)
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_xml_messages_created_by
+        ON xml_messages(created_by, created_at)
+    """)
+    
+    # Outbox of generated messages awaiting delivery
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            filename TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at REAL NOT NULL DEFAULT 0,
+            claimed_at REAL,
+            last_error TEXT,
+            created_by TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            sent_at TIMESTAMP
+        )
+    """)
+    add_column_if_missing(cursor, "outbox", "idempotency_key", "TEXT")
+    cursor.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_outbox_idempotency_key ON outbox(idempotency_key)
+    """)
+    
+    # The dispatcher polls by status and due time
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_outbox_status ON outbox(status, next_attempt_at)
+    """)
+    
+    # Login rate limit buckets shared between worker processes
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS rate_limit_buckets (
+            key TEXT PRIMARY KEY,
+            tokens REAL NOT NULL,
+            updated_at REAL NOT NULL
+        ) WITHOUT ROWID
+    """)
+    
+    # Roles and permissions (see core/rbac.py); users.role is each user's
+    # primary role, user_roles holds any extra ones
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS roles (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT UNIQUE NOT NULL,
+            description TEXT
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS permissions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT UNIQUE NOT NULL,
+            bit INTEGER UNIQUE NOT NULL,
+            description TEXT
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS role_permissions (
+            role_id INTEGER NOT NULL REFERENCES roles(id) ON DELETE CASCADE,
+            permission_id INTEGER NOT NULL REFERENCES permissions(id) ON DELETE CASCADE,
+            PRIMARY KEY (role_id, permission_id)
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS user_roles (
+            user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+            role_id INTEGER NOT NULL REFERENCES roles(id) ON DELETE CASCADE,
+            PRIMARY KEY (user_id, role_id)
+        ) WITHOUT ROWID
+    """)
+    
+    # Audit log (see core/audit.py); id order is time order, so pages are
+    # read by keyset on id, per actor or action through the composite indexes
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS audit_log (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            created_at TEXT NOT NULL,
+            actor TEXT NOT NULL,
+            action TEXT NOT NULL,
+            target TEXT,
+            outcome TEXT NOT NULL DEFAULT 'success',
+            client TEXT,
+            details TEXT
+        )
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_audit_log_created_at ON audit_log(created_at)
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_audit_log_actor ON audit_log(actor, id)
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_audit_log_action ON audit_log(action, id)
+    """)
+    # Append-only
+    for statement in ("UPDATE", "DELETE"):
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS audit_log_no_{statement.lower()}
+            BEFORE {statement} ON audit_log
+            BEGIN
+                SELECT RAISE(ABORT, 'audit_log is append-only');
+            END
+        """)
+    
+    # One row per database maintenance run (see core/maintenance.py)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS maintenance_runs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            finished_at TIMESTAMP,
+            trigger TEXT NOT NULL,
+            status TEXT NOT NULL,
+            seconds REAL,
+            tasks TEXT
+        )
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_maintenance_runs_started_at
+        ON maintenance_runs(started_at)
+    """)
+    
+    # One version per in-process cache, bumped by triggers in the same
+    # transaction as every write to the tables behind it (core/cache_versions.py)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS cache_versions (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    for name, tables in CACHED_TABLES.items():
+        cursor.execute("INSERT OR IGNORE INTO cache_versions (name) VALUES (?)", (name,))
+        for table in tables:
+            for statement in ("INSERT", "UPDATE", "DELETE"):
+                cursor.execute(f"""
+                    CREATE TRIGGER IF NOT EXISTS {table}_{statement.lower()}_bumps_{name}
+                    AFTER {statement} ON {table}
+                    BEGIN
+                        UPDATE cache_versions SET version = version + 1 WHERE name = '{name}';
+                    END
+                """)
+    
     # Add your custom tables here
     # Example:
     # cursor.execute("""
@@ -85,6 +481,38 @@ def database_exists() -> bool:
     return os.path.exists(get_db_path())
 
 
-# Auto-initialize database if it doesn't exist
-if not database_exists():
-    init_database()
+def warm_connection_pool() -> int:
+    """
+    Fill the connection pool and load the database into memory.
+    
+    Every pooled connection reads the schema, and the database file is read
+    once so its pages are in the operating system's cache before the first
+    query from a user.
+    
+    Returns:
+        int: Number of idle connections in the pool
+    """
+    ensure_database()
+    
+    connections = []
+    while len(connections) + _connection_pool.qsize() < _connection_pool.maxsize:
+        conn = _connect()
+        conn.execute("SELECT name FROM sqlite_master").fetchall()
+        connections.append(conn)
+    for conn in connections:
+        try:
+            _connection_pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+    
+    with open(get_db_path(), "rb") as f:
+        while f.read(1024 * 1024):
+            pass
+    
+    return _connection_pool.qsize()
+
+
+def analyze_database():
+    """Refresh the query planner statistics (ANALYZE)."""
+    with pooled_connection() as conn:
+        conn.execute("ANALYZE")
@@ -0,0 +1,317 @@
+"""
+Directory Sync Module
+Keeps the users table in step with an export of the company directory.
+
+The export (CSV or LDIF) is read and sorted by username, then merged with
+the directory users in the table, read in the same order from an index.
+One pass over both yields the users to insert, the role changes and the
+deletions, and only those are written, in batched transactions. A digest of
+the export is stored as the sync watermark, so an unchanged export is
+skipped without reading the table at all.
+
+Users created in the app (source 'local') are never changed by a sync.
+Directory users get an unusable password until an administrator sets one.
+"""
+
+import base64
+import csv
+import hashlib
+import io
+import json
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from streamlit_app.config.app_config import APP_CONFIG
+from streamlit_app.core import metrics
+from streamlit_app.core.audit import audit
+from streamlit_app.core.auth import UNUSABLE_PASSWORD, invalidate_user_cache
+from streamlit_app.core.database import pooled_connection
+from streamlit_app.core.rbac import get_role_names
+
+
+SOURCE_DIRECTORY = 'directory'
+SOURCE_LOCAL = 'local'
+EXPORT_FORMATS = ('csv', 'ldif')
+DEFAULT_ROLE = 'user'
+
+DEFAULT_BATCH_SIZE = 1000
+
+SYNC_CHANGES = metrics.counter(
+    "directory_sync_changes_total", "Users changed by directory syncs", ["change"]
+)
+
+
+# Reading exports
+
+
+def _parse_ldif(text: str) -> Iterator[Dict[str, List[str]]]:
+    """Yield each LDIF entry as a dict of lower-case attribute names to values."""
+    entry: Dict[str, List[str]] = {}
+    lines: List[str] = []
+
+    def flush_line():
+        if not lines:
+            return
+        line = "".join(lines)
+        lines.clear()
+        name, sep, value = line.partition(":")
+        if not sep:
+            return
+        if value.startswith(":"):
+            value = base64.b64decode(value[1:].strip()).decode("utf-8")
+        else:
+            value = value.strip()
+        entry.setdefault(name.strip().lower(), []).append(value)
+
+    for raw in text.splitlines():
+        if raw.startswith(" ") and lines:
+            # Folded line: continuation of the previous value
+            lines.append(raw[1:])
+            continue
+        flush_line()
+        if not raw.strip():
+            if entry:
+                yield entry
+                entry = {}
+        elif not raw.startswith("#"):
+            lines.append(raw)
+    flush_line()
+    if entry:
+        yield entry
+
+
+def _role_from_ldif(entry: Dict[str, List[str]], admin_groups: set,
+                    role_attribute: str) -> str:
+    groups = {value.lower() for value in entry.get("memberof", [])}
+    if groups & admin_groups:
+        return 'admin'
+    return (entry.get(role_attribute) or [DEFAULT_ROLE])[0]
+
+
+def _read_ldif(text: str) -> Iterator[Tuple[Optional[str], str]]:
+    username_attribute = APP_CONFIG.get("directory_username_attribute", "uid").lower()
+    role_attribute = APP_CONFIG.get("directory_role_attribute", "role").lower()
+    admin_groups = {group.lower() for group in APP_CONFIG.get("directory_admin_groups", ())}
+
+    for entry in _parse_ldif(text):
+        if "dn" not in entry:
+            continue
+        values = entry.get(username_attribute)
+        username = values[0] if values else None
+        yield username, _role_from_ldif(entry, admin_groups, role_attribute)
+
+
+def _read_csv(text: str) -> Iterator[Tuple[Optional[str], str]]:
+    username_attribute = APP_CONFIG.get("directory_username_attribute", "uid").lower()
+    role_attribute = APP_CONFIG.get("directory_role_attribute", "role").lower()
+
+    reader = csv.DictReader(io.StringIO(text, newline=""))
+    reader.fieldnames = [name.strip().lower() for name in (reader.fieldnames or [])]
+    username_column = 'username' if 'username' in reader.fieldnames else username_attribute
+    for row in reader:
+        yield row.get(username_column), row.get(role_attribute) or DEFAULT_ROLE
+
+
+def parse_directory_export(data: bytes, export_format: str) -> Tuple[List, List[str]]:
+    """
+    Parse a directory export.
+
+    Args:
+        data: Contents of a CSV or LDIF file
+        export_format: 'csv' or 'ldif'
+
+    Returns:
+        tuple: (sorted list of unique (username, role), problems)
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {export_format}")
+
+    text = data.decode("utf-8-sig")
+    reader = _read_ldif if export_format == 'ldif' else _read_csv
+    roles = set(get_role_names())
+
+    users: Dict[str, str] = {}
+    problems = []
+    for number, (username, role) in enumerate(reader(text), start=1):
+        username = (username or "").strip()
+        if not username:
+            problems.append(f"Entry {number}: no username")
+        elif username in users:
+            problems.append(f"Entry {number}: duplicate username '{username}'")
+        else:
+            # Roles the app does not know fall back to the default role
+            role = role.strip().lower()
+            users[username] = role if role in roles else DEFAULT_ROLE
+
+    return sorted(users.items()), problems
+
+
+# Diffing
+
+
+def diff_users(entries: List[Tuple[str, str]],
+               existing: Iterator[Tuple[int, str, str]]) -> Dict[str, List]:
+    """
+    Merge two username-sorted sequences into the changes between them.
+
+    Args:
+        entries: Sorted (username, role) from the export
+        existing: (id, username, role) of directory users, sorted by username
+
+    Returns:
+        dict: inserts [(username, role)], role_changes [(id, username, role)]
+        and deletes [(id, username)]
+    """
+    inserts, role_changes, deletes = [], [], []
+    entry_iter, row_iter = iter(entries), iter(existing)
+    entry, row = next(entry_iter, None), next(row_iter, None)
+
+    while entry is not None or row is not None:
+        if row is None or (entry is not None and entry[0] < row[1]):
+            inserts.append(entry)
+            entry = next(entry_iter, None)
+        elif entry is None or row[1] < entry[0]:
+            deletes.append((row[0], row[1]))
+            row = next(row_iter, None)
+        else:
+            if entry[1] != row[2]:
+                role_changes.append((row[0], row[1], entry[1]))
+            entry, row = next(entry_iter, None), next(row_iter, None)
+
+    return {'inserts': inserts, 'role_changes': role_changes, 'deletes': deletes}
+
+
+# Applying
+
+
+def get_sync_state(source: str = SOURCE_DIRECTORY) -> Optional[Dict]:
+    """
+    Get the watermark and results of the last successful sync.
+
+    Returns:
+        dict with source, watermark, synced_at and stats, or None if never synced
+    """
+    with pooled_connection() as conn:
+        row = conn.execute(
+            "SELECT source, watermark, synced_at, stats FROM sync_state WHERE source = ?",
+            (source,)
+        ).fetchone()
+    if row is None:
+        return None
+    return {**dict(row), 'stats': json.loads(row['stats'] or '{}')}
+
+
+def _batches(items: List, size: int) -> Iterator[List]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def sync_users(path: str, export_format: Optional[str] = None, dry_run: bool = False,
+               force: bool = False, batch_size: Optional[int] = None) -> Dict:
+    """
+    Bring the directory users in the users table in line with an export.
+
+    Args:
+        path: CSV or LDIF export
+        export_format: 'csv' or 'ldif' (default: from the file extension)
+        dry_run: Compute the changes without writing them
+        force: Sync even if the export is unchanged or would delete more
+            than directory_sync_max_delete_fraction of the directory users
+        batch_size: Changes written per transaction
+
+    Returns:
+        dict: applied (bool), skipped (unchanged export), error, counts of
+        inserted, role_changed, deleted and conflicts, conflicts (usernames
+        already used by local users), problems, and seconds
+    """
+    started = time.perf_counter()
+    batch_size = batch_size or APP_CONFIG.get("directory_sync_batch_size", DEFAULT_BATCH_SIZE)
+    result = {
+        'applied': False, 'skipped': False, 'error': None,
+        'inserted': 0, 'role_changed': 0, 'deleted': 0, 'conflicts': [], 'problems': [],
+    }
+
+    export_format = export_format or ('ldif' if path.lower().endswith('.ldif') else 'csv')
+    with open(path, "rb") as f:
+        data = f.read()
+    digest = hashlib.sha256(data).hexdigest()
+
+    state = get_sync_state()
+    if state and state['watermark'] == digest and not force:
+        result['skipped'] = True
+        result['seconds'] = time.perf_counter() - started
+        return result
+
+    entries, result['problems'] = parse_directory_export(data, export_format)
+
+    with pooled_connection() as conn:
+        local = {
+            row['username'] for row in conn.execute(
+                "SELECT username FROM users WHERE source != ?", (SOURCE_DIRECTORY,)
+            )
+        }
+        existing = conn.execute(
+            "SELECT id, username, role FROM users WHERE source = ? ORDER BY username",
+            (SOURCE_DIRECTORY,)
+        ).fetchall()
+
+    changes = diff_users(entries, (tuple(row) for row in existing))
+    inserts = [entry for entry in changes['inserts'] if entry[0] not in local]
+    result['conflicts'] = [entry[0] for entry in changes['inserts'] if entry[0] in local]
+    result['inserted'] = len(inserts)
+    result['role_changed'] = len(changes['role_changes'])
+    result['deleted'] = len(changes['deletes'])
+
+    max_delete_fraction = APP_CONFIG.get("directory_sync_max_delete_fraction", 0.5)
+    if existing and len(changes['deletes']) > max_delete_fraction * len(existing) and not force:
+        result['error'] = (
+            f"The export would delete {len(changes['deletes'])} of {len(existing)} directory "
+            f"users; re-run with force to apply it."
+        )
+    if result['error'] and not dry_run:
+        audit('directory.sync', path, outcome='failure', error=result['error'])
+    if dry_run or result['error']:
+        result['seconds'] = time.perf_counter() - started
+        return result
+
+    for batch in _batches(inserts, batch_size):
+        with pooled_connection() as conn:
+            conn.executemany(
+                "INSERT INTO users (username, password_hash, role, source) VALUES (?, ?, ?, ?)",
+                [(username, UNUSABLE_PASSWORD, role, SOURCE_DIRECTORY) for username, role in batch]
+            )
+    for batch in _batches(changes['role_changes'], batch_size):
+        with pooled_connection() as conn:
+            conn.executemany(
+                "UPDATE users SET role = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+                [(role, user_id) for user_id, _, role in batch]
+            )
+    for batch in _batches(changes['deletes'], batch_size):
+        with pooled_connection() as conn:
+            conn.executemany(
+                "DELETE FROM users WHERE id = ?", [(user_id,) for user_id, _ in batch]
+            )
+
+    stats = {key: result[key] for key in ('inserted', 'role_changed', 'deleted')}
+    stats['conflicts'] = len(result['conflicts'])
+    with pooled_connection() as conn:
+        conn.execute(
+            """
+            INSERT INTO sync_state (source, watermark, synced_at, stats)
+            VALUES (?, ?, CURRENT_TIMESTAMP, ?)
+            ON CONFLICT(source) DO UPDATE SET
+                watermark = excluded.watermark, synced_at = excluded.synced_at,
+                stats = excluded.stats
+            """,
+            (SOURCE_DIRECTORY, digest, json.dumps(stats))
+        )
+
+    if inserts or changes['role_changes'] or changes['deletes']:
+        invalidate_user_cache()
+    for change in ('inserted', 'role_changed', 'deleted'):
+        SYNC_CHANGES.inc(result[change], change=change)
+    audit('directory.sync', path, **stats)
+
+    result['applied'] = True
+    result['seconds'] = time.perf_counter() - started
+    return result
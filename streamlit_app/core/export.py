@@ -0,0 +1,243 @@
+"""
+Export Module
+Streams saved XML messages into zip or concatenated export files.
+
+Queries span app.db and whichever monthly archives (core/archive.py) the
+date filters reach into.
+"""
+
+import os
+import threading
+import zipfile
+from contextlib import closing
+from datetime import date
+from typing import Any, BinaryIO, Callable, Dict, Hashable, Iterator, List, Optional, Tuple
+
+from streamlit_app.core.archive import message_sources
+from streamlit_app.core.audit import audit
+from streamlit_app.core.cache_versions import get_version
+from streamlit_app.core.database import get_db_connection
+
+
+EXPORT_FORMATS = ('zip', 'concat')
+
+# Rows fetched from SQLite per round trip
+DEFAULT_CHUNK_SIZE = 500
+
+# Counts and author lists shown on the export page, kept until the
+# 'xml_messages' cache version changes (a save or archive run in any process)
+MAX_CACHED_QUERIES = 64
+_query_cache: Dict[Hashable, Any] = {}
+_query_cache_version: Optional[int] = None
+_query_cache_lock = threading.Lock()
+
+
+def _cached_query(key: Hashable, compute: Callable[[], Any]) -> Any:
+    """Get a query result from the cache, computing it on a miss."""
+    global _query_cache_version
+
+    # Read before computing: a write in between only causes one more query
+    version = get_version('xml_messages')
+    with _query_cache_lock:
+        if version != _query_cache_version:
+            _query_cache.clear()
+            _query_cache_version = version
+        if key in _query_cache:
+            return _query_cache[key]
+
+    result = compute()
+    with _query_cache_lock:
+        if version == _query_cache_version and len(_query_cache) < MAX_CACHED_QUERIES:
+            _query_cache[key] = result
+    return result
+
+
+def _build_filters(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    created_by: Optional[str] = None,
+    message_type: Optional[str] = None,
+) -> Tuple[str, List]:
+    """
+    Build the WHERE clause and parameters for an export query.
+    Dates are UTC days, like the CURRENT_TIMESTAMP values in created_at.
+    """
+    clauses, params = [], []
+
+    if start_date:
+        clauses.append("created_at >= ?")
+        params.append(start_date.isoformat())
+    if end_date:
+        # End date is inclusive
+        clauses.append("created_at < date(?, '+1 day')")
+        params.append(end_date.isoformat())
+    if created_by:
+        clauses.append("created_by = ?")
+        params.append(created_by)
+    if message_type:
+        clauses.append("message_type = ?")
+        params.append(message_type)
+
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    return where, params
+
+
+def count_xml_messages(**filters) -> int:
+    """
+    Count the saved messages matching the export filters.
+    Counts are cached until a message is saved or archived.
+
+    Args:
+        **filters: start_date, end_date, created_by and message_type
+
+    Returns:
+        int: Number of matching messages
+    """
+    return _cached_query(('count', tuple(sorted(filters.items()))),
+                         lambda: _count_xml_messages(**filters))
+
+
+def _count_xml_messages(**filters) -> int:
+    where, params = _build_filters(**filters)
+
+    count = 0
+    conn = get_db_connection()
+    try:
+        with message_sources(conn, filters.get('start_date'), filters.get('end_date')) as sources:
+            for schema in sources:
+                count += conn.execute(
+                    f"SELECT COUNT(*) AS count FROM {schema}.xml_messages {where}", params
+                ).fetchone()['count']
+    finally:
+        conn.close()
+
+    return count
+
+
+def iter_xml_messages(chunk_size: int = DEFAULT_CHUNK_SIZE, **filters) -> Iterator[Dict]:
+    """
+    Yield saved messages matching the filters, oldest first.
+
+    SQLite steps through the result set as rows are fetched, so only one
+    chunk of rows is held in memory at a time. Archived messages come first,
+    one archive at a time.
+
+    Args:
+        chunk_size: Number of rows fetched per round trip
+        **filters: start_date, end_date, created_by and message_type
+
+    Yields:
+        Dict with id, filename, content, created_by, created_at and message_type
+    """
+    where, params = _build_filters(**filters)
+
+    conn = get_db_connection()
+    try:
+        with message_sources(conn, filters.get('start_date'), filters.get('end_date')) as sources:
+            for schema in sources:
+                cursor = conn.cursor()
+                # Closed even when the caller stops early: an archive with an
+                # unfinished statement cannot be detached
+                try:
+                    cursor.execute(
+                        f"""
+                        SELECT id, filename, content, created_by, created_at, message_type
+                        FROM {schema}.xml_messages {where}
+                        ORDER BY created_at, id
+                        """,
+                        params
+                    )
+
+                    while True:
+                        rows = cursor.fetchmany(chunk_size)
+                        if not rows:
+                            break
+                        for row in rows:
+                            yield dict(row)
+                finally:
+                    cursor.close()
+    finally:
+        conn.close()
+
+
+def get_message_creators() -> List[str]:
+    """
+    Get the distinct authors of saved messages, including archived ones.
+    The list is cached until a message is saved or archived.
+
+    Returns:
+        list: Sorted usernames
+    """
+    return list(_cached_query('creators', _get_message_creators))
+
+
+def _get_message_creators() -> Tuple[str, ...]:
+    creators = set()
+    conn = get_db_connection()
+    try:
+        with message_sources(conn) as sources:
+            for schema in sources:
+                creators.update(
+                    row['created_by'] for row in
+                    conn.execute(f"SELECT DISTINCT created_by FROM {schema}.xml_messages")
+                )
+    finally:
+        conn.close()
+
+    return tuple(sorted(creators))
+
+
+def _archive_name(message: Dict) -> str:
+    """Unique name for a message inside an export."""
+    return f"{message['id']:08d}_{os.path.basename(message['filename'])}"
+
+
+def export_messages(
+    fileobj: BinaryIO,
+    export_format: str = 'zip',
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    **filters,
+) -> int:
+    """
+    Write matching messages to a binary file object.
+
+    Messages are compressed one at a time as they are read, so memory use does
+    not grow with the size of the export. The file object does not need to be
+    seekable.
+
+    Args:
+        fileobj: Binary file object to write to
+        export_format: 'zip' for one file per message, 'concat' for a single
+            document stream separated by comment lines
+        chunk_size: Number of rows fetched per round trip
+        **filters: start_date, end_date, created_by and message_type
+
+    Returns:
+        int: Number of messages exported
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {export_format}")
+
+    count = 0
+    # Closed right away if writing fails, which detaches any open archive
+    with closing(iter_xml_messages(chunk_size=chunk_size, **filters)) as messages:
+        if export_format == 'zip':
+            with zipfile.ZipFile(fileobj, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+                for message in messages:
+                    archive.writestr(_archive_name(message), message['content'])
+                    count += 1
+        else:
+            for message in messages:
+                header = (
+                    f"<!-- message id={message['id']} filename={_archive_name(message)} "
+                    f"created_by={message['created_by']} "
+                    f"created_at={message['created_at']} -->\n"
+                )
+                fileobj.write(header.encode('utf-8'))
+                fileobj.write(message['content'].encode('utf-8'))
+                fileobj.write(b"\n")
+                count += 1
+
+    audit('xml.export', f"{count} message(s)", export_format=export_format,
+          **{key: value for key, value in filters.items() if value is not None})
+    return count
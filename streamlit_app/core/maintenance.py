@@ -0,0 +1,330 @@
+"""
+Maintenance Module
+Keeps the database healthy: planner statistics, free pages and integrity.
+
+A run performs, in order and within maintenance_budget_seconds in total:
+
+- optimize: PRAGMA optimize, which re-analyzes tables whose statistics
+  are out of date
+- analyze: ANALYZE with a row sampling limit, for every table
+- incremental_vacuum: returns free pages to the file system (databases
+  created with auto_vacuum = INCREMENTAL, see enable_incremental_vacuum())
+- quick_check: PRAGMA quick_check
+
+A task still running when the budget is spent is interrupted through
+SQLite's progress handler, so a run never holds the database for long.
+
+Every worker runs a scheduler thread that checks every
+maintenance_check_interval_seconds. When the time of day is inside
+maintenance_window, few sessions are connected, and no run started within
+maintenance_interval_hours, the worker claims a run in the maintenance_runs
+table and performs it. Claiming takes a write lock, so only one worker runs
+at a time. Each run's task results and durations are stored with it.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Sequence
+
+from streamlit_app.config.app_config import APP_CONFIG
+from streamlit_app.core import metrics
+from streamlit_app.core.database import get_db_connection, pooled_connection
+
+
+STATUS_DONE = 'done'
+STATUS_SKIPPED = 'skipped'
+STATUS_INTERRUPTED = 'interrupted'
+STATUS_FAILED = 'failed'
+
+# Pages returned to the file system per incremental_vacuum step
+VACUUM_STEP_PAGES = 1024
+
+# Rows sampled per index by ANALYZE
+ANALYSIS_LIMIT = 1000
+
+# SQLite virtual machine instructions between two budget checks
+PROGRESS_CHECK_STEPS = 10_000
+
+MAINTENANCE_RUNS = metrics.counter(
+    "db_maintenance_runs_total", "Database maintenance runs", ["status"]
+)
+MAINTENANCE_TASK_SECONDS = metrics.histogram(
+    "db_maintenance_task_seconds", "Time spent in each maintenance task", ["task"]
+)
+
+
+class _Skip(Exception):
+    """The task does not apply to this database."""
+
+
+class _Corrupt(Exception):
+    """quick_check found problems."""
+
+
+def _optimize(conn: sqlite3.Connection, deadline: float) -> str:
+    conn.execute("PRAGMA optimize")
+    return ""
+
+
+def _analyze(conn: sqlite3.Connection, deadline: float) -> str:
+    conn.execute(f"PRAGMA analysis_limit = {ANALYSIS_LIMIT}")
+    conn.execute("ANALYZE")
+    tables = conn.execute("SELECT COUNT(DISTINCT tbl) FROM sqlite_stat1").fetchone()[0]
+    return f"{tables} tables"
+
+
+def _incremental_vacuum(conn: sqlite3.Connection, deadline: float) -> str:
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        raise _Skip("auto_vacuum is not INCREMENTAL (see `app maintenance --enable-vacuum`)")
+
+    before = free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    while free and time.monotonic() < deadline:
+        # execute() would step the pragma once, which frees a single page;
+        # executescript() runs it to completion
+        conn.executescript(f"PRAGMA incremental_vacuum({VACUUM_STEP_PAGES});")
+        free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    return f"freed {before - free} pages, {free} free"
+
+
+def _quick_check(conn: sqlite3.Connection, deadline: float) -> str:
+    problems = [row[0] for row in conn.execute("PRAGMA quick_check(20)")]
+    if problems != ['ok']:
+        raise _Corrupt("; ".join(problems))
+    return "ok"
+
+
+# Each task takes the connection and the deadline (time.monotonic()) and
+# returns a short description of what it did
+TASKS: Dict[str, Callable[[sqlite3.Connection, float], str]] = {
+    'optimize': _optimize,
+    'analyze': _analyze,
+    'incremental_vacuum': _incremental_vacuum,
+    'quick_check': _quick_check,
+}
+
+
+def _run_task(conn: sqlite3.Connection, name: str, deadline: float) -> Dict:
+    """Run one task and describe how it went."""
+    started = time.monotonic()
+    if started >= deadline:
+        return {'task': name, 'status': STATUS_SKIPPED, 'seconds': 0.0,
+                'detail': "maintenance budget spent"}
+
+    # Abort the running statement once the budget is spent
+    conn.set_progress_handler(lambda: time.monotonic() > deadline, PROGRESS_CHECK_STEPS)
+    try:
+        detail, status = TASKS[name](conn, deadline), STATUS_DONE
+        conn.commit()
+    except _Skip as e:
+        detail, status = str(e), STATUS_SKIPPED
+    except _Corrupt as e:
+        print(f"Database integrity check failed: {e}")
+        detail, status = str(e), STATUS_FAILED
+    except sqlite3.DatabaseError as e:
+        # OperationalError "interrupted" comes from the progress handler;
+        # anything else, such as a malformed database, fails the task
+        if isinstance(e, sqlite3.OperationalError) and "interrupted" in str(e):
+            detail, status = "stopped at the end of the maintenance budget", STATUS_INTERRUPTED
+        else:
+            print(f"Error in maintenance task {name}: {e}")
+            detail, status = str(e), STATUS_FAILED
+    finally:
+        conn.set_progress_handler(None, 0)
+
+    seconds = time.monotonic() - started
+    MAINTENANCE_TASK_SECONDS.observe(seconds, task=name)
+    return {'task': name, 'status': status, 'seconds': round(seconds, 3), 'detail': detail}
+
+
+def _claim_run(trigger: str) -> Optional[int]:
+    """
+    Record the start of a run, unless a scheduled run is not due yet.
+
+    Returns:
+        int: ID of the new maintenance_runs row, or None if not due
+    """
+    interval_hours = float(APP_CONFIG.get("maintenance_interval_hours", 24))
+    with pooled_connection() as conn:
+        # Serializes workers deciding at the same time
+        conn.execute("BEGIN IMMEDIATE")
+        if trigger == 'scheduled':
+            recent = conn.execute(
+                "SELECT 1 FROM maintenance_runs WHERE started_at > datetime('now', ?)",
+                (f"-{interval_hours} hours",)
+            ).fetchone()
+            if recent:
+                return None
+        cursor = conn.execute(
+            "INSERT INTO maintenance_runs (trigger, status) VALUES (?, 'running')", (trigger,)
+        )
+        return cursor.lastrowid
+
+
+def run_maintenance(tasks: Optional[Sequence[str]] = None,
+                    budget_seconds: Optional[float] = None,
+                    trigger: str = 'manual') -> Optional[Dict]:
+    """
+    Run maintenance tasks now and record the run.
+
+    Args:
+        tasks: Task names, in order (default: all of TASKS)
+        budget_seconds: Time allowed for the whole run (default: maintenance_budget_seconds)
+        trigger: 'manual' or 'scheduled'; a scheduled run is skipped when
+            another run started within maintenance_interval_hours
+
+    Returns:
+        dict: id, status, seconds and tasks (list of dicts with task, status,
+        seconds and detail), or None when a scheduled run was not due
+    """
+    tasks = list(tasks or TASKS)
+    unknown = [name for name in tasks if name not in TASKS]
+    if unknown:
+        raise ValueError(f"Unknown maintenance task(s): {', '.join(unknown)}")
+    if budget_seconds is None:
+        budget_seconds = float(APP_CONFIG.get("maintenance_budget_seconds", 30))
+
+    run_id = _claim_run(trigger)
+    if run_id is None:
+        return None
+
+    started = time.monotonic()
+    deadline = started + budget_seconds
+    results = []
+    # Stays failed unless every task got to run; the claimed run is
+    # finalized either way, so it is never left 'running'
+    status = STATUS_FAILED
+    try:
+        conn = get_db_connection()
+        try:
+            for name in tasks:
+                results.append(_run_task(conn, name, deadline))
+        finally:
+            conn.close()
+
+        if all(result['status'] != STATUS_FAILED for result in results):
+            status = STATUS_DONE
+    finally:
+        seconds = time.monotonic() - started
+        MAINTENANCE_RUNS.inc(status=status)
+        with pooled_connection() as conn:
+            conn.execute(
+                """
+                UPDATE maintenance_runs
+                SET finished_at = CURRENT_TIMESTAMP, status = ?, seconds = ?, tasks = ?
+                WHERE id = ?
+                """,
+                (status, seconds, json.dumps(results), run_id)
+            )
+    return {'id': run_id, 'status': status, 'seconds': seconds, 'tasks': results}
+
+
+def enable_incremental_vacuum() -> bool:
+    """
+    Switch the database to auto_vacuum = INCREMENTAL.
+
+    This rewrites the whole file with VACUUM and blocks every other writer
+    meanwhile, so run it once while the app is stopped. New databases are
+    created with incremental vacuum already.
+
+    Returns:
+        bool: True if the database now uses incremental vacuum
+    """
+    conn = get_db_connection()
+    try:
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+        return conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+    except Exception as e:
+        print(f"Error enabling incremental vacuum: {e}")
+        return False
+    finally:
+        conn.close()
+
+
+def get_maintenance_runs(limit: int = 20) -> List[Dict]:
+    """
+    Get the most recent maintenance runs, newest first.
+
+    Returns:
+        list: Dictionaries with id, started_at, finished_at, trigger, status,
+        seconds and tasks (list)
+    """
+    with pooled_connection() as conn:
+        rows = conn.execute(
+            """
+            SELECT id, started_at, finished_at, trigger, status, seconds, tasks
+            FROM maintenance_runs ORDER BY id DESC LIMIT ?
+            """,
+            (limit,)
+        ).fetchall()
+    return [{**dict(row), 'tasks': json.loads(row['tasks'] or '[]')} for row in rows]
+
+
+# Scheduling
+
+
+def in_maintenance_window(now: Optional[datetime] = None) -> bool:
+    """
+    Check whether the local time is inside maintenance_window ("HH:MM-HH:MM").
+
+    The window may wrap past midnight ("23:00-04:00"); None allows any time.
+    """
+    window = APP_CONFIG.get("maintenance_window")
+    if not window:
+        return True
+    start, end = (part.strip() for part in window.split("-"))
+    current = (now or datetime.now()).strftime("%H:%M")
+    if start <= end:
+        return start <= current < end
+    return current >= start or current < end
+
+
+def _is_quiet() -> bool:
+    """Check whether few enough sessions are connected to this worker."""
+    from streamlit_app.core.session import count_active_sessions
+
+    sessions = count_active_sessions()
+    return sessions is None or sessions <= APP_CONFIG.get("maintenance_max_active_sessions", 2)
+
+
+def maybe_run_maintenance() -> Optional[Dict]:
+    """Run scheduled maintenance if it is enabled, due and the app is quiet."""
+    if not APP_CONFIG.get("maintenance_enabled", True):
+        return None
+    if not in_maintenance_window() or not _is_quiet():
+        return None
+    return run_maintenance(trigger='scheduled')
+
+
+def _schedule_forever(interval: float):
+    while True:
+        time.sleep(interval)
+        try:
+            maybe_run_maintenance()
+        except Exception as e:
+            print(f"Error in scheduled maintenance: {e}")
+
+
+_scheduler_started = False
+_scheduler_lock = threading.Lock()
+
+
+def start_maintenance_scheduler():
+    """Start the maintenance scheduler thread, once per process."""
+    global _scheduler_started
+
+    if _scheduler_started:
+        return
+    with _scheduler_lock:
+        if _scheduler_started:
+            return
+        _scheduler_started = True
+        threading.Thread(
+            target=_schedule_forever,
+            args=(float(APP_CONFIG.get("maintenance_check_interval_seconds", 300)),),
+            name="db-maintenance",
+            daemon=True,
+        ).start()
@@ -0,0 +1,359 @@
+"""
+Metrics Module
+In-process counters, gauges and histograms with Prometheus text exposition.
+
+Metrics are created once with counter(), gauge() or histogram() and updated
+from the code they describe. Recording a value takes a lock and a few
+arithmetic operations, so instrumentation costs microseconds per rerun.
+
+The registry is exposed in the Prometheus text format through a local HTTP
+endpoint (metrics_port) and/or a file rewritten periodically (metrics_file,
+for node_exporter's textfile collector). Both are off unless configured.
+"""
+
+import bisect
+import http.server
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from streamlit_app.config.app_config import APP_CONFIG
+
+
+PREFIX = "app_"
+
+# Seconds; suits both sub-millisecond queries and bcrypt checks
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+# Bytes
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", r"\\").replace('"', r'\"').replace("\n", r"\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Metric(ABC):
+    """Base class: a named family of values keyed by label values."""
+
+    type_name = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = PREFIX + name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._function: Optional[Callable[[], Optional[float]]] = None
+
+    def _key(self, labels: Dict) -> Tuple:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def set_function(self, function: Callable[[], Optional[float]]):
+        """Read the (unlabelled) value from a function at collection time."""
+        self._function = function
+
+    @abstractmethod
+    def samples(self) -> List[Tuple[str, str, float]]:
+        """List (suffix, formatted labels, value) for exposition."""
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type_name}"]
+        for suffix, labels, value in self.samples():
+            lines.append(f"{self.name}{suffix}{labels} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+class Counter(_Metric):
+    """A value that only goes up."""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def get(self, **labels) -> float:
+        """Current value for one label combination (or the function value)."""
+        if self._function is not None:
+            return self._function() or 0.0
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def values(self) -> Dict[Tuple, float]:
+        """Copy of every label combination and its value."""
+        with self._lock:
+            return dict(self._values)
+
+    def samples(self):
+        if self._function is not None:
+            value = self._function()
+            return [] if value is None else [("", "", value)]
+        return [("", _format_labels(self.labelnames, key), value)
+                for key, value in sorted(self.values().items())]
+
+
+class Gauge(Counter):
+    """A value that can go up and down."""
+
+    type_name = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    @contextmanager
+    def track_in_progress(self, **labels) -> Iterator[None]:
+        """Add one while the block runs."""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(_Metric):
+    """Counts observations in buckets, with their sum and count."""
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # label key -> [bucket counts..., sum, count]
+        self._values: Dict[Tuple, List[float]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            state[index] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        """Observe how long the block takes, in seconds."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def snapshot(self) -> Dict[Tuple, Dict]:
+        """
+        Copy of every label combination's data.
+
+        Returns:
+            dict: label key -> {'buckets': [(upper bound, count in bucket)], 'sum', 'count'}
+        """
+        with self._lock:
+            values = {key: list(state) for key, state in self._values.items()}
+        return {
+            key: {
+                'buckets': list(zip(self.buckets, state[:len(self.buckets)])),
+                'sum': state[-2],
+                'count': state[-1],
+            }
+            for key, state in values.items()
+        }
+
+    def samples(self):
+        samples = []
+        for key, data in sorted(self.snapshot().items()):
+            cumulative = 0
+            for bound, count in data['buckets']:
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                samples.append(("_bucket", _format_labels(self.labelnames, key, le), cumulative))
+            labels = _format_labels(self.labelnames, key)
+            samples.append(("_sum", labels, data['sum']))
+            samples.append(("_count", labels, data['count']))
+        return samples
+
+
+def quantile(snapshot: Dict, q: float) -> float:
+    """
+    Estimate a quantile from histogram data, like Prometheus' histogram_quantile().
+
+    Args:
+        snapshot: One entry of Histogram.snapshot()
+        q: Quantile between 0 and 1
+
+    Returns:
+        float: Estimated value (0.0 without observations)
+    """
+    total = snapshot['count']
+    if not total:
+        return 0.0
+    rank = q * total
+    cumulative = 0
+    lower = 0.0
+    for bound, count in snapshot['buckets']:
+        if cumulative + count >= rank and count:
+            if bound == float("inf"):
+                return lower
+            return lower + (bound - lower) * (rank - cumulative) / count
+        cumulative += count
+        if bound != float("inf"):
+            lower = bound
+    return lower
+
+
+_registry: Dict[str, _Metric] = {}
+_registry_lock = threading.Lock()
+
+
+def _register(cls, name: str, *args, **kwargs):
+    with _registry_lock:
+        metric = _registry.get(PREFIX + name)
+        if metric is None:
+            metric = _registry[PREFIX + name] = cls(name, *args, **kwargs)
+        return metric
+
+
+def counter(name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+    """Get or create a counter."""
+    return _register(Counter, name, help_text, labelnames)
+
+
+def gauge(name: str, help_text: str, labelnames: Sequence[str] = ()) -> Gauge:
+    """Get or create a gauge."""
+    return _register(Gauge, name, help_text, labelnames)
+
+
+def histogram(name: str, help_text: str, labelnames: Sequence[str] = (),
+              buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+    """Get or create a histogram."""
+    return _register(Histogram, name, help_text, labelnames, buckets)
+
+
+def get_metric(name: str) -> Optional[_Metric]:
+    """Look up a registered metric by name (with or without the app_ prefix)."""
+    return _registry.get(name if name.startswith(PREFIX) else PREFIX + name)
+
+
+def render_prometheus() -> str:
+    """
+    Render every metric in the Prometheus text format.
+
+    Returns:
+        str: Exposition text
+    """
+    with _registry_lock:
+        metrics = sorted(_registry.values(), key=lambda metric: metric.name)
+    return "".join(metric.render() for metric in metrics)
+
+
+# Exposition
+
+
+class _MetricsHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def write_metrics_file(path: str):
+    """Write the exposition text to a file atomically."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(render_prometheus())
+    os.replace(tmp_path, path)
+
+
+def _write_metrics_file_forever(path: str, interval: float):
+    while True:
+        try:
+            write_metrics_file(path)
+        except OSError as e:
+            print(f"Error writing metrics file: {e}")
+        time.sleep(interval)
+
+
+_exporters_started = False
+_exporters_lock = threading.Lock()
+
+
+def start_exporters():
+    """
+    Start the configured metrics endpoint and file writer, once per process.
+
+    metrics_port serves GET /metrics on metrics_address. metrics_file may
+    contain {pid} so that several workers write separate files.
+    """
+    global _exporters_started
+
+    if _exporters_started:
+        return
+    with _exporters_lock:
+        if _exporters_started:
+            return
+        _exporters_started = True
+
+        port = APP_CONFIG.get("metrics_port")
+        if port:
+            address = APP_CONFIG.get("metrics_address", "127.0.0.1")
+            try:
+                server = http.server.ThreadingHTTPServer(
+                    (address, int(port)), _MetricsHandler
+                )
+            except OSError as e:
+                # Typically another worker already owns the port
+                print(f"Metrics endpoint not started on {address}:{port}: {e}")
+            else:
+                server.daemon_threads = True
+                threading.Thread(
+                    target=server.serve_forever, name="metrics-http", daemon=True
+                ).start()
+
+        path = APP_CONFIG.get("metrics_file")
+        if path:
+            threading.Thread(
+                target=_write_metrics_file_forever,
+                args=(path.format(pid=os.getpid()),
+                      APP_CONFIG.get("metrics_file_interval_seconds", 15)),
+                name="metrics-file",
+                daemon=True,
+            ).start()
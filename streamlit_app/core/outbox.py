@@ -0,0 +1,358 @@
+"""
+Outbox Module
+Queues generated messages and delivers them through a pluggable transport.
+"""
+
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from streamlit_app.config.app_config import APP_CONFIG
+from streamlit_app.core import metrics
+from streamlit_app.core.database import get_db_connection, pooled_connection
+
+
+STATUS_PENDING = 'pending'
+STATUS_SENDING = 'sending'
+STATUS_SENT = 'sent'
+STATUS_FAILED = 'failed'
+
+# Upper bound for the delay between two delivery attempts
+MAX_BACKOFF_SECONDS = 300.0
+
+# Messages stuck in 'sending' longer than this are assumed lost by a crashed dispatcher
+CLAIM_TIMEOUT_SECONDS = 600.0
+
+# Attempts to record the outcome of a batch, and the pause before a retry
+RECORD_ATTEMPTS = 3
+RECORD_RETRY_SECONDS = 0.5
+
+OUTBOX_UNRECORDED = metrics.counter(
+    "outbox_unrecorded_total",
+    "Messages whose delivery outcome could not be recorded; they are sent again "
+    "once their claim times out"
+)
+
+
+class Transport(ABC):
+    """
+    Base class for outbox transports.
+    Subclasses deliver one message per send() call and raise on failure.
+    """
+
+    @abstractmethod
+    def send(self, message: Dict) -> None:
+        """
+        Deliver a message.
+
+        Args:
+            message: Dictionary with id, filename and payload
+        """
+
+
+class FileDropTransport(Transport):
+    """Writes each message atomically into a local outbound directory."""
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory or APP_CONFIG['outbox_dir']
+
+    def send(self, message: Dict) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+
+        # Prefix with the outbox id so messages sharing a filename never overwrite each other
+        filename = f"{message['id']:010d}_{os.path.basename(message['filename'])}"
+        target = os.path.join(self.directory, filename)
+
+        # Write to a hidden temp file in the same directory, then rename it into place,
+        # so the gateway never picks up a partially written file
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix='.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(message['payload'])
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, target)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+
+_TRANSPORTS: Dict[str, Callable[[], Transport]] = {
+    'file': FileDropTransport,
+}
+
+
+def register_transport(name: str, factory: Callable[[], Transport]):
+    """
+    Register a transport so it can be selected with the outbox_transport setting.
+
+    Args:
+        name: Name used in APP_CONFIG['outbox_transport']
+        factory: Callable returning a Transport instance
+    """
+    _TRANSPORTS[name] = factory
+
+
+def get_transport(name: Optional[str] = None) -> Transport:
+    """
+    Create the configured transport.
+
+    Args:
+        name: Transport name (defaults to APP_CONFIG['outbox_transport'])
+
+    Returns:
+        Transport: Transport instance
+    """
+    name = name or APP_CONFIG.get('outbox_transport', 'file')
+    if name not in _TRANSPORTS:
+        raise ValueError(f"Unknown outbox transport: {name}")
+    return _TRANSPORTS[name]()
+
+
+def enqueue_message(filename: str, payload: str, created_by: Optional[str] = None,
+                    idempotency_key: Optional[str] = None) -> int:
+    """
+    Add a message to the outbox.
+
+    A message is queued at most once per idempotency key; repeated calls with
+    the same key return the existing entry.
+
+    Args:
+        filename: Name of the delivered file
+        payload: Message content
+        created_by: Username of the message author
+        idempotency_key: Key identifying this generated message
+
+    Returns:
+        int: ID of the outbox entry
+    """
+    with pooled_connection() as conn:
+        cursor = conn.execute(
+            "INSERT OR IGNORE INTO outbox (filename, payload, created_by, idempotency_key) "
+            "VALUES (?, ?, ?, ?)",
+            (filename, payload, created_by, idempotency_key)
+        )
+        if cursor.rowcount == 1:
+            return cursor.lastrowid
+
+        cursor = conn.execute("SELECT id FROM outbox WHERE idempotency_key = ?", (idempotency_key,))
+        return cursor.fetchone()['id']
+
+
+def get_outbox_counts() -> Dict[str, int]:
+    """
+    Count outbox entries per status.
+
+    Returns:
+        Dict mapping each status to its number of entries
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    counts = {status: 0 for status in (STATUS_PENDING, STATUS_SENDING, STATUS_SENT, STATUS_FAILED)}
+    for status in counts:
+        cursor.execute("SELECT COUNT(*) AS count FROM outbox WHERE status = ?", (status,))
+        counts[status] = cursor.fetchone()['count']
+
+    conn.close()
+    return counts
+
+
+def retry_failed_messages() -> int:
+    """
+    Move failed entries back to pending with a fresh attempt budget.
+
+    Returns:
+        int: Number of entries requeued
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    cursor.execute(
+        "UPDATE outbox SET status = ?, attempts = 0, next_attempt_at = 0 WHERE status = ?",
+        (STATUS_PENDING, STATUS_FAILED)
+    )
+    requeued = cursor.rowcount
+
+    conn.commit()
+    conn.close()
+    return requeued
+
+
+class OutboxDispatcher:
+    """
+    Drains the outbox with bounded parallelism.
+
+    Entries are claimed in batches inside a write transaction, so several
+    dispatcher processes can share one outbox without sending a message twice.
+    Failed deliveries are retried with exponential backoff until max_attempts
+    is reached, after which the entry is marked failed.
+    """
+
+    def __init__(
+        self,
+        transport: Optional[Transport] = None,
+        max_workers: Optional[int] = None,
+        max_attempts: Optional[int] = None,
+        backoff_seconds: Optional[float] = None,
+    ):
+        self.transport = transport or get_transport()
+        self.max_workers = max_workers or APP_CONFIG.get('outbox_max_workers', 8)
+        self.max_attempts = max_attempts or APP_CONFIG.get('outbox_max_attempts', 5)
+        self.backoff_seconds = backoff_seconds or APP_CONFIG.get('outbox_backoff_seconds', 2.0)
+        self.batch_size = self.max_workers * 4
+
+    def _claim_batch(self) -> List[Dict]:
+        """Atomically move a batch of due entries from pending to sending."""
+        now = time.time()
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+
+            # Recover entries abandoned by a dispatcher that died mid-send
+            cursor.execute(
+                "UPDATE outbox SET status = ? WHERE status = ? AND claimed_at < ?",
+                (STATUS_PENDING, STATUS_SENDING, now - CLAIM_TIMEOUT_SECONDS)
+            )
+
+            cursor.execute(
+                """
+                SELECT id, filename, payload, attempts FROM outbox
+                WHERE status = ? AND next_attempt_at <= ?
+                ORDER BY next_attempt_at, id
+                LIMIT ?
+                """,
+                (STATUS_PENDING, now, self.batch_size)
+            )
+            batch = [dict(row) for row in cursor.fetchall()]
+
+            cursor.executemany(
+                "UPDATE outbox SET status = ?, claimed_at = ?, attempts = attempts + 1 "
+                "WHERE id = ?",
+                [(STATUS_SENDING, now, message['id']) for message in batch]
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+        for message in batch:
+            message['attempts'] += 1
+        return batch
+
+    def _send(self, message: Dict) -> Optional[str]:
+        """Deliver one message, returning an error string on failure."""
+        try:
+            self.transport.send(message)
+            return None
+        except Exception as e:
+            return f"{type(e).__name__}: {e}"
+
+    def _next_attempt_at(self, attempts: int) -> float:
+        """Exponential backoff with jitter for the given attempt count."""
+        delay = min(self.backoff_seconds * (2 ** (attempts - 1)), MAX_BACKOFF_SECONDS)
+        return time.time() + delay * random.uniform(0.9, 1.1)
+
+    def _record_results(self, results: List[tuple]) -> Dict[str, int]:
+        """
+        Write the outcome of a batch in a single transaction.
+
+        A locked database is retried RECORD_ATTEMPTS times. If the outcome
+        still cannot be written, the messages stay in 'sending' and are
+        delivered again after CLAIM_TIMEOUT_SECONDS; that is logged and
+        counted in outbox_unrecorded_total.
+        """
+        sent, retried, failed = [], [], []
+        for message, error in results:
+            if error is None:
+                sent.append((STATUS_SENT, message['id']))
+            elif message['attempts'] >= self.max_attempts:
+                failed.append((STATUS_FAILED, error, message['id']))
+            else:
+                next_attempt_at = self._next_attempt_at(message['attempts'])
+                retried.append((STATUS_PENDING, error, next_attempt_at, message['id']))
+
+        for attempt in range(1, RECORD_ATTEMPTS + 1):
+            try:
+                self._write_results(sent, failed, retried)
+                break
+            except sqlite3.OperationalError as e:
+                if attempt < RECORD_ATTEMPTS:
+                    time.sleep(RECORD_RETRY_SECONDS * attempt)
+                    continue
+                ids = [message['id'] for message, _ in results]
+                print(f"Error recording outbox results, {len(ids)} message(s) will be sent "
+                      f"again after {CLAIM_TIMEOUT_SECONDS:.0f} s: {e} (ids: {ids})")
+                OUTBOX_UNRECORDED.inc(len(ids))
+                return {'sent': 0, 'retried': 0, 'failed': 0}
+
+        return {'sent': len(sent), 'retried': len(retried), 'failed': len(failed)}
+
+    @staticmethod
+    def _write_results(sent: List[tuple], failed: List[tuple], retried: List[tuple]):
+        with pooled_connection() as conn:
+            conn.executemany(
+                "UPDATE outbox SET status = ?, sent_at = CURRENT_TIMESTAMP, last_error = NULL "
+                "WHERE id = ?",
+                sent
+            )
+            conn.executemany(
+                "UPDATE outbox SET status = ?, last_error = ? WHERE id = ?", failed
+            )
+            conn.executemany(
+                "UPDATE outbox SET status = ?, last_error = ?, next_attempt_at = ? WHERE id = ?",
+                retried
+            )
+
+    def drain(self, limit: Optional[int] = None) -> Dict[str, int]:
+        """
+        Deliver due messages until none are left.
+
+        Args:
+            limit: Stop after roughly this many messages (None for no limit)
+
+        Returns:
+            Dict with the number of messages sent, retried and failed
+        """
+        totals = {'sent': 0, 'retried': 0, 'failed': 0}
+        processed = 0
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while limit is None or processed < limit:
+                batch = self._claim_batch()
+                if not batch:
+                    break
+
+                errors = executor.map(self._send, batch)
+                for key, value in self._record_results(list(zip(batch, errors))).items():
+                    totals[key] += value
+                processed += len(batch)
+
+        return totals
+
+    def run_forever(self, poll_interval: float = 1.0, stop_event: Optional[threading.Event] = None):
+        """
+        Keep draining the outbox, sleeping between polls when it is empty.
+
+        Args:
+            poll_interval: Seconds to wait when there is nothing to send
+            stop_event: Optional event that stops the loop when set
+        """
+        stop_event = stop_event or threading.Event()
+        while not stop_event.is_set():
+            totals = self.drain()
+            if not any(totals.values()):
+                stop_event.wait(poll_interval)
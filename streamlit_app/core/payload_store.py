@@ -0,0 +1,386 @@
+"""
+Session Payload Store
+Keeps large per-session values (such as generated documents) out of st.session_state.
+
+Small values stay in memory. Values above a size threshold, and the least
+recently used values once the process-wide memory budget is exceeded, are
+compressed and spilled to a temporary directory keyed by session. Everything
+belonging to a session is dropped when the session ends.
+
+Spilled values are generated banking messages, so the spill directory is
+private: it is created with mode 0700 and must be owned by the current
+user, and files are created with O_EXCL | O_NOFOLLOW. Each process spills
+into its own subdirectory named after its PID, and only the
+subdirectories of processes that are no longer running are removed.
+"""
+
+import hashlib
+import os
+import shutil
+import stat
+import tempfile
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from streamlit_app.config.app_config import APP_CONFIG, subscribe
+
+
+# Minimum seconds between two sweeps for ended sessions
+SWEEP_INTERVAL_SECONDS = 60.0
+
+# Flags for creating a spilled file: never reuse an existing file, never follow a symlink
+_CREATE_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_NOFOLLOW', 0)
+
+
+def _make_private_dir(path: str) -> bool:
+    """
+    Create a directory only the current user can use, or check an existing one.
+
+    Returns:
+        bool: True if the directory is a real directory owned by the current
+        user and closed to everyone else
+    """
+    try:
+        os.makedirs(path, mode=0o700, exist_ok=True)
+        info = os.lstat(path)
+    except OSError:
+        return False
+    if not stat.S_ISDIR(info.st_mode):
+        return False
+    if hasattr(os, 'getuid'):
+        if info.st_uid != os.getuid():
+            return False
+        if info.st_mode & 0o077:
+            os.chmod(path, 0o700)
+    return True
+
+
+def _is_process_running(pid: int) -> bool:
+    """Check whether a process with this PID exists."""
+    if os.name == 'nt':
+        # os.kill() would terminate it; assume it runs
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class _Entry:
+    """A stored value, either in memory or spilled to disk."""
+
+    __slots__ = ('value', 'path', 'size', 'disk_size', 'last_access')
+
+    def __init__(self, value: str):
+        self.value: Optional[str] = value
+        self.path: Optional[str] = None
+        self.size = len(value.encode('utf-8'))
+        self.disk_size = 0
+        self.last_access = time.time()
+
+
+def _is_session_active(session_id: str) -> Optional[bool]:
+    """
+    Ask the Streamlit runtime whether a session is still connected.
+
+    Returns:
+        bool, or None when no runtime is running (scripts, tests)
+    """
+    try:
+        from streamlit.runtime import Runtime
+    except ImportError:
+        return None
+
+    if not Runtime.exists():
+        return None
+    return Runtime.instance().is_active_session(session_id)
+
+
+class SessionPayloadStore:
+    """Per-session key/value store with a global memory budget and spill-to-disk."""
+
+    def __init__(self, spill_threshold: int, memory_budget: int, spill_dir: str,
+                 idle_timeout: float):
+        self.spill_threshold = spill_threshold
+        self.memory_budget = memory_budget
+        self.idle_timeout = idle_timeout
+
+        if not _make_private_dir(spill_dir):
+            print(f"{spill_dir} is not a private directory; spilling to a new one instead")
+            spill_dir = tempfile.mkdtemp(prefix='streamlit_app_payloads-')
+        self.spill_dir = spill_dir
+        self._remove_stale_spill_dirs()
+        # This process's spill files; a leftover of an earlier process with this PID is stale
+        self.process_dir = os.path.join(spill_dir, str(os.getpid()))
+        shutil.rmtree(self.process_dir, ignore_errors=True)
+        self._private_dirs = set()
+
+        self._sessions: Dict[str, Dict[str, _Entry]] = {}
+        self._last_seen: Dict[str, float] = {}
+        # In-memory entries in least-recently-used order, for budget enforcement
+        self._lru: "OrderedDict[Tuple[str, str], None]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.RLock()
+        self._last_sweep = time.time()
+
+    def _remove_stale_spill_dirs(self):
+        """Delete the spill directories of processes that are no longer running."""
+        for name in os.listdir(self.spill_dir):
+            path = os.path.join(self.spill_dir, name)
+            if name.isdigit() and not _is_process_running(int(name)) \
+                    and not os.path.islink(path):
+                shutil.rmtree(path, ignore_errors=True)
+
+    def _session_dir(self, session_id: str) -> str:
+        return os.path.join(self.process_dir, session_id)
+
+    def _spill_path(self, session_id: str, key: str) -> str:
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return os.path.join(self._session_dir(session_id), f"{digest}.z")
+
+    def _spill(self, session_id: str, key: str, entry: _Entry):
+        """Compress an in-memory entry to disk and release its memory."""
+        path = self._spill_path(session_id, key)
+        directory = os.path.dirname(path)
+        if directory not in self._private_dirs:
+            if not (_make_private_dir(self.process_dir) and _make_private_dir(directory)):
+                raise OSError(f"Cannot create private spill directory {directory}")
+            self._private_dirs.add(directory)
+
+        data = zlib.compress(entry.value.encode('utf-8'), 6)
+        tmp_path = f"{path}.{os.urandom(4).hex()}.tmp"
+        fd = os.open(tmp_path, _CREATE_FLAGS, 0o600)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        entry.path = path
+        entry.disk_size = len(data)
+        entry.value = None
+        self._memory_bytes -= entry.size
+        self._lru.pop((session_id, key), None)
+
+    def _drop(self, session_id: str, key: str, entry: _Entry):
+        """Forget an entry and release its memory or file."""
+        if entry.value is not None:
+            self._memory_bytes -= entry.size
+            self._lru.pop((session_id, key), None)
+        if entry.path:
+            try:
+                os.unlink(entry.path)
+            except OSError:
+                pass
+
+    def _enforce_budget(self):
+        """Spill least recently used entries until memory use fits the budget."""
+        while self._memory_bytes > self.memory_budget and self._lru:
+            session_id, key = next(iter(self._lru))
+            self._spill(session_id, key, self._sessions[session_id][key])
+
+    def put(self, session_id: str, key: str, value: str):
+        """
+        Store a value for a session, replacing any previous value.
+
+        Args:
+            session_id: Streamlit session ID
+            key: Name of the value
+            value: String to store
+        """
+        with self._lock:
+            self._maybe_sweep()
+            entries = self._sessions.setdefault(session_id, {})
+            if key in entries:
+                self._drop(session_id, key, entries.pop(key))
+
+            entry = _Entry(value)
+            entries[key] = entry
+            self._last_seen[session_id] = entry.last_access
+            self._memory_bytes += entry.size
+            self._lru[(session_id, key)] = None
+
+            if entry.size >= self.spill_threshold:
+                self._spill(session_id, key, entry)
+            else:
+                self._enforce_budget()
+
+    def get(self, session_id: str, key: str) -> Optional[str]:
+        """
+        Get a stored value.
+
+        Args:
+            session_id: Streamlit session ID
+            key: Name of the value
+
+        Returns:
+            The stored string, or None if there is no value
+        """
+        with self._lock:
+            entry = self._sessions.get(session_id, {}).get(key)
+            if entry is None:
+                return None
+
+            entry.last_access = self._last_seen[session_id] = time.time()
+            if entry.value is not None:
+                self._lru.move_to_end((session_id, key))
+                return entry.value
+
+            # Spilled values are read back on demand and stay on disk
+            try:
+                with open(entry.path, 'rb') as f:
+                    return zlib.decompress(f.read()).decode('utf-8')
+            except OSError:
+                del self._sessions[session_id][key]
+                return None
+
+    def delete(self, session_id: str, key: str):
+        """Remove a stored value."""
+        with self._lock:
+            entry = self._sessions.get(session_id, {}).pop(key, None)
+            if entry is not None:
+                self._drop(session_id, key, entry)
+
+    def clear_session(self, session_id: str):
+        """Remove every value stored for a session."""
+        with self._lock:
+            for key, entry in self._sessions.pop(session_id, {}).items():
+                self._drop(session_id, key, entry)
+            self._last_seen.pop(session_id, None)
+            self._private_dirs.discard(self._session_dir(session_id))
+            shutil.rmtree(self._session_dir(session_id), ignore_errors=True)
+
+    def _maybe_sweep(self):
+        """Run sweep() if it has not run recently."""
+        if time.time() - self._last_sweep >= SWEEP_INTERVAL_SECONDS:
+            self.sweep()
+
+    def sweep(self) -> int:
+        """
+        Drop the values of sessions that have ended.
+
+        A session has ended when the Streamlit runtime no longer knows it, or,
+        outside a running server, when it has been idle longer than the
+        session timeout.
+
+        Returns:
+            int: Number of sessions removed
+        """
+        with self._lock:
+            self._last_sweep = now = time.time()
+            ended = []
+            for session_id, last_seen in self._last_seen.items():
+                active = _is_session_active(session_id)
+                if active is None:
+                    active = now - last_seen < self.idle_timeout
+                if not active:
+                    ended.append(session_id)
+
+            for session_id in ended:
+                self.clear_session(session_id)
+            return len(ended)
+
+    def configure(self, spill_threshold: int, memory_budget: int, idle_timeout: float):
+        """Change the limits of a running store, spilling entries that no longer fit."""
+        with self._lock:
+            self.spill_threshold = spill_threshold
+            self.memory_budget = memory_budget
+            self.idle_timeout = idle_timeout
+            self._enforce_budget()
+
+    def usage(self) -> List[Dict]:
+        """
+        Get memory accounting per session, largest first.
+
+        Returns:
+            list: Dictionaries with session_id, entries, memory_bytes, disk_bytes,
+            spilled and idle_seconds
+        """
+        now = time.time()
+        with self._lock:
+            rows = []
+            for session_id, entries in self._sessions.items():
+                in_memory = [e for e in entries.values() if e.value is not None]
+                rows.append({
+                    'session_id': session_id,
+                    'entries': len(entries),
+                    'memory_bytes': sum(e.size for e in in_memory),
+                    'disk_bytes': sum(e.disk_size for e in entries.values() if e.value is None),
+                    'spilled': len(entries) - len(in_memory),
+                    'idle_seconds': now - self._last_seen.get(session_id, now),
+                })
+        return sorted(rows, key=lambda row: row['memory_bytes'] + row['disk_bytes'], reverse=True)
+
+    def totals(self) -> Dict:
+        """
+        Get process-wide totals.
+
+        Returns:
+            Dict with sessions, memory_bytes, memory_budget and disk_bytes
+        """
+        with self._lock:
+            disk_bytes = sum(
+                e.disk_size for entries in self._sessions.values()
+                for e in entries.values() if e.value is None
+            )
+            return {
+                'sessions': len(self._sessions),
+                'memory_bytes': self._memory_bytes,
+                'memory_budget': self.memory_budget,
+                'disk_bytes': disk_bytes,
+            }
+
+
+# One store per process, shared by every session
+payload_store = SessionPayloadStore(
+    spill_threshold=APP_CONFIG.get('session_payload_spill_bytes', 64 * 1024),
+    memory_budget=APP_CONFIG.get('session_payload_memory_budget_bytes', 64 * 1024 * 1024),
+    spill_dir=APP_CONFIG.get('session_payload_dir') or os.path.join(
+        tempfile.gettempdir(), f"streamlit_app_payloads-{getattr(os, 'getuid', lambda: 0)()}"
+    ),
+    idle_timeout=APP_CONFIG.get('session_timeout_minutes', 60) * 60,
+)
+
+
+def _on_config_change(old, new):
+    """Apply new limits to the running store."""
+    payload_store.configure(
+        spill_threshold=new.get('session_payload_spill_bytes', 64 * 1024),
+        memory_budget=new.get('session_payload_memory_budget_bytes', 64 * 1024 * 1024),
+        idle_timeout=new.get('session_timeout_minutes', 60) * 60,
+    )
+
+
+subscribe(_on_config_change)
+
+
+def get_session_id() -> str:
+    """
+    Get the ID of the Streamlit session running the current script.
+
+    Returns:
+        str: Session ID ('default' outside a script run)
+    """
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx else 'default'
+
+
+def set_session_payload(key: str, value: str):
+    """Store a value for the current session."""
+    payload_store.put(get_session_id(), key, value)
+
+
+def get_session_payload(key: str) -> Optional[str]:
+    """Get a value stored for the current session, or None."""
+    return payload_store.get(get_session_id(), key)
+
+
+def clear_session_payloads():
+    """Remove every value stored for the current session."""
+    payload_store.clear_session(get_session_id())
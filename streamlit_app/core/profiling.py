@@ -0,0 +1,199 @@
+"""
+Profiling Module
+Times named phases of every page run and samples whole reruns on demand.
+
+Pages wrap their run in profiled_page(); code inside it marks phases with
+phase() (auth, database, XML build, prettify). Whatever time no phase claims
+is reported as render time. When an admin turns sampling on, a background
+thread also samples the script thread's stack, and the result is kept as
+collapsed stacks that flamegraph.pl or speedscope can read.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from typing import Deque, Dict, Iterator, List, Optional
+
+from streamlit_app.config.app_config import APP_CONFIG
+from streamlit_app.core import metrics
+
+
+# Runs kept per page
+MAX_RUNS_PER_PAGE = 50
+
+RENDER_PHASE = 'render'
+
+_local = threading.local()
+_runs: Dict[str, Deque[Dict]] = {}
+_runs_lock = threading.Lock()
+_sampling_enabled = False
+
+PAGE_RUN_SECONDS = metrics.histogram("page_run_seconds", "Duration of page runs", ["page"])
+
+
+class _RunTimer:
+    """Phase timings of the page run in progress on this thread."""
+
+    __slots__ = ('phases', 'depth', 'claimed')
+
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+        self.depth = 0
+        # Time spent in outermost phases, so nested phases are not subtracted twice
+        self.claimed = 0.0
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """
+    Time a named phase of the current page run.
+
+    Outside profiled_page() this does nothing. Repeated phases add up.
+
+    Args:
+        name: Phase name, e.g. 'db' or 'xml build'
+    """
+    timer: Optional[_RunTimer] = getattr(_local, 'timer', None)
+    if timer is None:
+        yield
+        return
+
+    started = time.perf_counter()
+    timer.depth += 1
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        timer.depth -= 1
+        timer.phases[name] = timer.phases.get(name, 0.0) + elapsed
+        if timer.depth == 0:
+            timer.claimed += elapsed
+
+
+class StackSampler:
+    """Samples one thread's Python stack at a fixed interval."""
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    @staticmethod
+    def _frame_name(frame) -> str:
+        code = frame.f_code
+        return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                names.append(self._frame_name(frame))
+                frame = frame.f_back
+            if names:
+                self.stacks[";".join(reversed(names))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self) -> str:
+        """
+        Stop sampling.
+
+        Returns:
+            str: Collapsed stacks, one "frame;frame;frame count" line per stack
+        """
+        self._stop_event.set()
+        self._thread.join()
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+def set_sampling_enabled(enabled: bool):
+    """Turn stack sampling of every page run in this process on or off."""
+    global _sampling_enabled
+    _sampling_enabled = enabled
+
+
+def is_sampling_enabled() -> bool:
+    """Check whether page runs are being sampled."""
+    return _sampling_enabled
+
+
+@contextmanager
+def profiled_page(page: str) -> Iterator[None]:
+    """
+    Profile one run of a page script.
+
+    The run is recorded even when it ends with st.stop() or st.rerun().
+    Cache versions are checked once for the whole run (see cache_versions).
+
+    Args:
+        page: Page name the run is stored under
+    """
+    if getattr(_local, 'timer', None) is not None:
+        # Already inside a profiled run (e.g. a page calling another page's main)
+        yield
+        return
+
+    # Imported here: cache_versions depends on the database, which uses phase()
+    from streamlit_app.core.cache_versions import run_snapshot
+
+    timer = _local.timer = _RunTimer()
+    sampler = None
+    if _sampling_enabled:
+        interval = APP_CONFIG.get('profiling_sample_interval_ms', 5) / 1000
+        sampler = StackSampler(threading.get_ident(), interval)
+        sampler.start()
+
+    started_at = time.time()
+    started = time.perf_counter()
+    try:
+        with run_snapshot():
+            yield
+    finally:
+        duration = time.perf_counter() - started
+        collapsed = sampler.stop() if sampler else None
+        _local.timer = None
+
+        phases = dict(timer.phases)
+        phases[RENDER_PHASE] = max(duration - timer.claimed, 0.0)
+        run = {
+            'page': page,
+            'started_at': started_at,
+            'duration': duration,
+            'phases': phases,
+            'collapsed': collapsed,
+            'samples': sum(sampler.stacks.values()) if sampler else 0,
+        }
+        PAGE_RUN_SECONDS.observe(duration, page=page)
+        with _runs_lock:
+            _runs.setdefault(page, deque(maxlen=MAX_RUNS_PER_PAGE)).append(run)
+
+
+def get_profiled_pages() -> List[str]:
+    """Get the names of pages with recorded runs."""
+    with _runs_lock:
+        return sorted(_runs)
+
+
+def get_page_runs(page: str) -> List[Dict]:
+    """
+    Get the recorded runs of a page, newest first.
+
+    Returns:
+        list: Dictionaries with page, started_at, duration, phases (seconds
+        per phase), collapsed (collapsed stacks or None) and samples
+    """
+    with _runs_lock:
+        return list(reversed(_runs.get(page, ())))
+
+
+def clear_profiles():
+    """Forget every recorded run."""
+    with _runs_lock:
+        _runs.clear()
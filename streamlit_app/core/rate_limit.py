@@ -0,0 +1,311 @@
+"""
+Rate Limit Module
+Token buckets that throttle login attempts before any password is hashed.
+
+Every attempt takes a token from the bucket of the username and from the
+bucket of the client address; when either is empty the attempt is rejected
+without running bcrypt. Buckets refill continuously. A bucket that has
+refilled completely behaves exactly like a missing one, so it is dropped,
+and memory stays proportional to the number of recently active keys.
+
+The "memory" backend keeps the buckets in each process. The "sqlite" backend
+keeps them in the database, shared by every worker of `app serve`; each
+process still checks its own buckets first, so a flood is rejected without
+a database write.
+
+When the shared buckets cannot be read because the database stays locked,
+the attempt fails open: it is allowed under the process's own buckets,
+which were already charged, and the fallback is logged, counted and
+audited. Failing closed would lock every user out whenever a long write
+holds the database.
+"""
+
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from streamlit_app.config.app_config import APP_CONFIG, subscribe
+from streamlit_app.core import metrics
+from streamlit_app.core.audit import audit
+from streamlit_app.core.database import pooled_connection
+
+
+LOGINS_THROTTLED = metrics.counter(
+    "auth_login_throttled_total", "Login attempts rejected by the rate limiter", ["scope"]
+)
+BCRYPT_SECONDS_AVOIDED = metrics.counter(
+    "auth_bcrypt_seconds_avoided_total",
+    "Estimated bcrypt time saved by rejecting throttled logins"
+)
+SHARED_LIMIT_ERRORS = metrics.counter(
+    "auth_rate_limit_shared_errors_total",
+    "Login attempts checked against this process's buckets only, the database being locked"
+)
+
+# Expired buckets are deleted from the database once in this many acquisitions
+SQLITE_EVICT_EVERY = 100
+
+
+class TokenBucketLimiter:
+    """
+    In-memory token buckets keyed by string.
+
+    Each bucket is a (tokens, updated_at) tuple in an OrderedDict kept in
+    order of last update, so expired buckets are always at the front.
+    """
+
+    def __init__(self, capacity: float, refill_seconds: float, max_keys: int = 100_000):
+        """
+        Args:
+            capacity: Attempts allowed in a burst
+            refill_seconds: Seconds to regain one token
+            max_keys: Buckets kept at most; the least recently used go first
+        """
+        self.capacity = float(capacity)
+        self.refill_seconds = float(refill_seconds)
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    @property
+    def full_after(self) -> float:
+        """Seconds for an empty bucket to refill completely."""
+        return self.capacity * self.refill_seconds
+
+    def refill(self, bucket: Optional[Tuple[float, float]], now: float) -> float:
+        """Tokens in a (tokens, updated_at) bucket at a point in time (None is full)."""
+        if bucket is None:
+            return self.capacity
+        tokens, updated_at = bucket
+        return min(self.capacity, tokens + (now - updated_at) / self.refill_seconds)
+
+    def wait_for(self, tokens: float) -> float:
+        """Seconds until a bucket holding this many tokens has one (0 if it has one now)."""
+        return max(0.0, (1.0 - tokens) * self.refill_seconds)
+
+    def tokens(self, key: str, now: float) -> float:
+        """Tokens available in a bucket at a point in time."""
+        return self.refill(self._buckets.get(key), now)
+
+    def retry_after(self, key: str, now: float) -> float:
+        """Seconds until the bucket holds a token (0 if it holds one now)."""
+        return self.wait_for(self.tokens(key, now))
+
+    def take(self, key: str, now: float):
+        """Remove one token from a bucket."""
+        tokens = self.tokens(key, now) - 1.0
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        self.evict(now)
+
+    def evict(self, now: float):
+        """Drop buckets that have refilled completely, and the oldest beyond max_keys."""
+        full_after = self.full_after
+        while self._buckets:
+            key, (_, updated_at) = next(iter(self._buckets.items()))
+            if now - updated_at < full_after and len(self._buckets) <= self.max_keys:
+                return
+            del self._buckets[key]
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class LoginRateLimiter:
+    """Per-username and per-client login buckets, checked and taken together."""
+
+    def __init__(self, config=APP_CONFIG):
+        max_keys = config.get("login_rate_limit_max_keys", 100_000)
+        self.scopes: Dict[str, TokenBucketLimiter] = {
+            'user': TokenBucketLimiter(
+                config.get("login_rate_limit_per_user", 5),
+                config.get("login_rate_limit_user_refill_seconds", 30.0),
+                max_keys,
+            ),
+            'client': TokenBucketLimiter(
+                config.get("login_rate_limit_per_client", 20),
+                config.get("login_rate_limit_client_refill_seconds", 3.0),
+                max_keys,
+            ),
+        }
+        self.shared = config.get("login_rate_limit_backend", "memory") == "sqlite"
+        self._lock = threading.Lock()
+        self._acquisitions = 0
+
+    @staticmethod
+    def _keys(username: str, client: Optional[str]) -> Dict[str, str]:
+        keys = {'user': f"user:{username.strip().lower()}"}
+        if client:
+            keys['client'] = f"client:{client}"
+        return keys
+
+    def acquire(self, username: str,
+                client: Optional[str] = None) -> Tuple[float, Optional[str]]:
+        """
+        Take a token for one login attempt.
+
+        Args:
+            username: Username being tried
+            client: Client address, if known
+
+        Returns:
+            tuple: (seconds to wait, scope that is exhausted), or (0.0, None)
+            when the attempt may go ahead, including when the shared buckets
+            are locked (see the module docstring)
+        """
+        keys = self._keys(username, client)
+        with self._lock:
+            retry_after, scope = self._check(keys, time.monotonic())
+            if not retry_after:
+                now = time.monotonic()
+                for name, key in keys.items():
+                    self.scopes[name].take(key, now)
+
+        if not retry_after and self.shared:
+            try:
+                retry_after, scope = self._acquire_shared(keys)
+            except sqlite3.OperationalError as e:
+                SHARED_LIMIT_ERRORS.inc()
+                print(f"Shared login rate limit unavailable, using this process's only: {e}")
+                audit('login.rate_limit', username, outcome='error', actor=username,
+                      client=client, error=str(e), fallback='process')
+        return retry_after, scope
+
+    def _check(self, keys: Dict[str, str], now: float) -> Tuple[float, Optional[str]]:
+        retry_after, scope = max(
+            (self.scopes[name].retry_after(key, now), name) for name, key in keys.items()
+        )
+        return (retry_after, scope) if retry_after > 0 else (0.0, None)
+
+    def _acquire_shared(self, keys: Dict[str, str]) -> Tuple[float, Optional[str]]:
+        """Check and take tokens from the buckets in the database, atomically."""
+        now = time.time()
+        self._acquisitions += 1
+
+        with pooled_connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            if self._acquisitions % SQLITE_EVICT_EVERY == 0:
+                for name, limiter in self.scopes.items():
+                    conn.execute(
+                        "DELETE FROM rate_limit_buckets WHERE key LIKE ? AND updated_at < ?",
+                        (f"{name}:%", now - limiter.full_after)
+                    )
+
+            rows = conn.execute(
+                f"SELECT key, tokens, updated_at FROM rate_limit_buckets "
+                f"WHERE key IN ({','.join('?' * len(keys))})",
+                list(keys.values())
+            ).fetchall()
+            stored = {row['key']: (row['tokens'], row['updated_at']) for row in rows}
+            levels = {
+                name: self.scopes[name].refill(stored.get(key), now)
+                for name, key in keys.items()
+            }
+
+            retry_after, scope = max(
+                (self.scopes[name].wait_for(level), name) for name, level in levels.items()
+            )
+            if retry_after > 0:
+                return retry_after, scope
+
+            for name, key in keys.items():
+                conn.execute(
+                    """
+                    INSERT INTO rate_limit_buckets (key, tokens, updated_at) VALUES (?, ?, ?)
+                    ON CONFLICT(key) DO UPDATE SET
+                        tokens = excluded.tokens, updated_at = excluded.updated_at
+                    """,
+                    (key, levels[name] - 1.0, now)
+                )
+        return 0.0, None
+
+    def reset(self, username: str):
+        """Refill a user's bucket, e.g. after an administrator resets the password."""
+        key = self._keys(username, None)['user']
+        with self._lock:
+            self.scopes['user']._buckets.pop(key, None)
+        if self.shared:
+            with pooled_connection() as conn:
+                conn.execute("DELETE FROM rate_limit_buckets WHERE key = ?", (key,))
+
+    def size(self) -> int:
+        """Number of in-memory buckets."""
+        with self._lock:
+            return sum(len(limiter) for limiter in self.scopes.values())
+
+
+_limiter = LoginRateLimiter()
+
+metrics.gauge(
+    "auth_rate_limit_buckets", "Login rate limit buckets held in memory"
+).set_function(lambda: _limiter.size())
+
+
+def _on_config_change(old, new):
+    """Rebuild the limiter when its settings change."""
+    global _limiter
+
+    if any(old.get(key) != new.get(key) for key in new if key.startswith("login_rate_limit_")):
+        _limiter = LoginRateLimiter(new)
+
+
+subscribe(_on_config_change)
+
+
+def get_client_id() -> Optional[str]:
+    """
+    Get the address of the client behind the current session.
+
+    Behind the `app serve` launcher every connection comes from 127.0.0.1, so
+    the last X-Forwarded-For entry is used instead. The launcher appends it to
+    every request head, including the websocket handshake this is read from,
+    so a client cannot choose it.
+
+    Returns:
+        str or None when it cannot be determined
+    """
+    try:
+        import streamlit as st
+
+        address = st.context.ip_address
+        forwarded = st.context.headers.get("X-Forwarded-For")
+    except Exception:
+        return None
+
+    if forwarded and address in (None, "127.0.0.1", "::1"):
+        return forwarded.split(",")[-1].strip() or address
+    return address
+
+
+def check_login_rate_limit(username: str, client: Optional[str] = None) -> float:
+    """
+    Count a login attempt against the rate limits.
+
+    Call this before authenticate_user(); when it returns a positive number
+    the attempt must be rejected without checking the password.
+
+    Args:
+        username: Username being tried
+        client: Client address (default: the current session's client)
+
+    Returns:
+        float: Seconds until another attempt is allowed, 0.0 if this one is
+    """
+    if client is None:
+        client = get_client_id()
+
+    retry_after, scope = _limiter.acquire(username, client)
+    if retry_after:
+        from streamlit_app.core.auth import BCRYPT_SECONDS
+
+        LOGINS_THROTTLED.inc(scope=scope)
+        verify = BCRYPT_SECONDS.snapshot().get(('verify',))
+        if verify and verify['count']:
+            BCRYPT_SECONDS_AVOIDED.inc(verify['sum'] / verify['count'])
+    return retry_after
+
+
+def reset_login_rate_limit(username: str):
+    """Allow a user to log in again immediately."""
+    _limiter.reset(username)
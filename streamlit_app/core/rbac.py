@@ -0,0 +1,361 @@
+"""
+RBAC Module
+Roles, permissions and per-user permission bitsets.
+
+Every permission owns one bit. Each role's permissions are compiled into an
+integer once per process, and a user's effective permissions are the OR of
+their primary role (users.role) and any extra roles from user_roles. The
+result is kept in the session. Within a page run, the session's bits and
+each permission mask are also kept in the run cache (see cache_versions), so
+every check after the first is a dictionary lookup and a bitwise AND. The
+bits are compiled again when the 'permissions' cache version changes, i.e.
+after any process changes roles, grants or extra roles.
+"""
+
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+import streamlit as st
+from streamlit_app.core.audit import audit
+from streamlit_app.core.auth import get_cached_user, get_user_cache_generation, require_auth
+from streamlit_app.core.cache_versions import clear_run_cache, get_version, run_cache
+from streamlit_app.core.database import pooled_connection
+
+
+# Built-in permissions; a permission's bit is its position here
+PERMISSIONS: Dict[str, str] = {
+    'users.manage': "Create, edit and delete users, roles and permissions",
+    'messages.generate': "Generate and save XML messages",
+    'messages.export': "Export saved messages",
+    'metrics.view': "View the performance dashboard, profiles and cache statistics",
+}
+
+# Built-in roles and their permissions
+BUILTIN_ROLES: Dict[str, Tuple[str, Tuple[str, ...]]] = {
+    'admin': ("Full access", tuple(PERMISSIONS)),
+    'user': ("Regular user", ('messages.generate',)),
+}
+
+SESSION_KEY = '_permission_bits'
+
+
+class _PermissionState:
+    """Compiled role bitsets, shared by every session in the process."""
+
+    def __init__(self):
+        self.permission_bits: Dict[str, int] = {}
+        self.role_bits: Dict[str, int] = {}
+        self.extra_roles: Dict[int, Tuple[str, ...]] = {}
+        self.generation = 0
+        self.version: Optional[int] = None
+        self.seeded = False
+        self.lock = threading.Lock()
+
+
+_state = _PermissionState()
+
+
+def _seed_builtin_roles(conn):
+    """Add the built-in permissions and roles if they are missing."""
+    conn.executemany(
+        "INSERT OR IGNORE INTO permissions (name, bit, description) VALUES (?, ?, ?)",
+        [(name, bit, description) for bit, (name, description) in enumerate(PERMISSIONS.items())]
+    )
+    for role, (description, permissions) in BUILTIN_ROLES.items():
+        cursor = conn.execute(
+            "INSERT OR IGNORE INTO roles (name, description) VALUES (?, ?)", (role, description)
+        )
+        if cursor.rowcount:
+            # Only a new role gets its default grants; later edits are kept
+            conn.executemany(
+                """
+                INSERT OR IGNORE INTO role_permissions (role_id, permission_id)
+                SELECT roles.id, permissions.id FROM roles, permissions
+                WHERE roles.name = ? AND permissions.name = ?
+                """,
+                [(role, permission) for permission in permissions]
+            )
+
+
+def load_permissions():
+    """Compile every role's permissions into bitsets."""
+    version = get_version('permissions')
+    with pooled_connection() as conn:
+        if not _state.seeded:
+            _seed_builtin_roles(conn)
+        permission_bits = {
+            row['name']: 1 << row['bit']
+            for row in conn.execute("SELECT name, bit FROM permissions")
+        }
+        role_bits = {row['name']: 0 for row in conn.execute("SELECT name FROM roles")}
+        for row in conn.execute(
+            """
+            SELECT roles.name AS role, permissions.bit AS bit
+            FROM role_permissions
+            JOIN roles ON roles.id = role_permissions.role_id
+            JOIN permissions ON permissions.id = role_permissions.permission_id
+            """
+        ):
+            role_bits[row['role']] |= 1 << row['bit']
+        extra_roles: Dict[int, Tuple[str, ...]] = {}
+        for row in conn.execute(
+            "SELECT user_id, roles.name AS role FROM user_roles "
+            "JOIN roles ON roles.id = user_roles.role_id"
+        ):
+            extra_roles[row['user_id']] = extra_roles.get(row['user_id'], ()) + (row['role'],)
+
+    with _state.lock:
+        _state.seeded = True
+        _state.permission_bits = permission_bits
+        _state.role_bits = role_bits
+        _state.extra_roles = extra_roles
+        _state.generation += 1
+        _state.version = version
+
+
+def invalidate_permissions():
+    """Drop the compiled bitsets so the next check recompiles them."""
+    with _state.lock:
+        _state.version = None
+    clear_run_cache()
+
+
+def _ensure_loaded():
+    version = _state.version
+    if version is None or version != get_version('permissions'):
+        load_permissions()
+
+
+def permission_mask(*permissions: str) -> int:
+    """
+    Get the bits of one or more permissions.
+
+    Raises:
+        KeyError: For a permission that does not exist
+    """
+    _ensure_loaded()
+    mask = 0
+    for permission in permissions:
+        mask |= _state.permission_bits[permission]
+    return mask
+
+
+def compile_user_permissions(user: Dict) -> int:
+    """
+    Compute a user's effective permission bits.
+
+    Args:
+        user: User dictionary with id and role
+
+    Returns:
+        int: OR of the bits of the user's primary and extra roles
+    """
+    _ensure_loaded()
+    bits = _state.role_bits.get(user['role'], 0)
+    for role in _state.extra_roles.get(user['id'], ()):
+        bits |= _state.role_bits.get(role, 0)
+    return bits
+
+
+def get_session_permissions() -> int:
+    """
+    Get the permission bits of the logged-in user, compiled once per session.
+
+    The bits are recompiled when roles or grants change, or when the user's
+    own record changes (e.g. a new role); a deleted user has none.
+
+    Returns:
+        int: Permission bits (0 when nobody is logged in)
+    """
+    user = st.session_state.get('user')
+    if not user:
+        return 0
+
+    _ensure_loaded()
+    current = get_cached_user(user['username'])
+    key = (_state.generation, get_user_cache_generation(), user['id'])
+    cached = st.session_state.get(SESSION_KEY)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    bits = compile_user_permissions(current) if current and current['id'] == user['id'] else 0
+    st.session_state[SESSION_KEY] = (key, bits)
+    return bits
+
+
+def _run_cached(key: Tuple, compute: Callable[[], int]) -> int:
+    """Compute a value once per page run (every time outside a run)."""
+    cache = run_cache()
+    if cache is None:
+        return compute()
+    value = cache.get(key)
+    if value is None:
+        value = cache[key] = compute()
+    return value
+
+
+def has_permission(*permissions: str) -> bool:
+    """Check whether the logged-in user has every one of the given permissions."""
+    mask = _run_cached(('permission_mask',) + permissions, lambda: permission_mask(*permissions))
+    return _run_cached(('session_permissions',), get_session_permissions) & mask == mask
+
+
+def require_permission(*permissions: str) -> bool:
+    """
+    Require the logged-in user to have every one of the given permissions.
+    Call this at the top of protected pages or before protected actions.
+
+    Args:
+        *permissions: Permission names, e.g. 'users.manage'
+
+    Returns:
+        bool: True if the user is logged in and has the permissions
+    """
+    if not require_auth():
+        return False
+
+    if not has_permission(*permissions):
+        st.error("❌ You don't have permission to access this page.")
+        st.info("Ask an administrator for access.")
+        return False
+
+    return True
+
+
+# Management
+
+
+def get_permissions() -> List[Dict]:
+    """Get every permission with its name, bit and description, by bit."""
+    with pooled_connection() as conn:
+        return [
+            dict(row) for row in
+            conn.execute("SELECT name, bit, description FROM permissions ORDER BY bit")
+        ]
+
+
+def get_roles() -> List[Dict]:
+    """
+    Get every role with its permissions.
+
+    Returns:
+        list: Dictionaries with name, description and permissions (list of names)
+    """
+    _ensure_loaded()
+    with pooled_connection() as conn:
+        roles = [dict(row) for row in
+                 conn.execute("SELECT name, description FROM roles ORDER BY name")]
+    names = sorted(_state.permission_bits, key=_state.permission_bits.get)
+    for role in roles:
+        bits = _state.role_bits.get(role['name'], 0)
+        role['permissions'] = [name for name in names if bits & _state.permission_bits[name]]
+    return roles
+
+
+def get_role_names() -> List[str]:
+    """Get the names of every role."""
+    _ensure_loaded()
+    return sorted(_state.role_bits)
+
+
+def get_user_roles(user_id: int) -> List[str]:
+    """Get the extra roles assigned to a user (besides their primary role)."""
+    _ensure_loaded()
+    return sorted(_state.extra_roles.get(user_id, ()))
+
+
+def _write(description: str, event: str, target: Optional[str],
+           sql_statements: List[Tuple[str, tuple]], **details) -> bool:
+    """Run statements in one transaction, invalidate the bitsets and audit the change."""
+    try:
+        with pooled_connection() as conn:
+            for sql, params in sql_statements:
+                conn.execute(sql, params)
+        invalidate_permissions()
+        audit(event, target, **details)
+        return True
+    except Exception as e:
+        print(f"Error {description}: {e}")
+        audit(event, target, outcome='error', error=str(e), **details)
+        return False
+
+
+def create_permission(name: str, description: str = "") -> bool:
+    """
+    Create a permission with the next free bit.
+
+    Returns:
+        bool: True if created, False otherwise
+    """
+    return _write("creating permission", 'permission.create', name, [(
+        "INSERT INTO permissions (name, bit, description) "
+        "SELECT ?, COALESCE(MAX(bit) + 1, 0), ? FROM permissions",
+        (name, description)
+    )])
+
+
+def create_role(name: str, description: str = "") -> bool:
+    """Create a role without permissions."""
+    return _write("creating role", 'role.create', name, [(
+        "INSERT INTO roles (name, description) VALUES (?, ?)", (name, description)
+    )])
+
+
+def delete_role(name: str) -> bool:
+    """Delete a custom role, its grants and assignments (built-in roles stay)."""
+    if name in BUILTIN_ROLES:
+        print(f"Error deleting role: '{name}' is a built-in role")
+        return False
+    return _write("deleting role", 'role.delete', name, [
+        ("DELETE FROM role_permissions WHERE role_id = (SELECT id FROM roles WHERE name = ?)",
+         (name,)),
+        ("DELETE FROM user_roles WHERE role_id = (SELECT id FROM roles WHERE name = ?)", (name,)),
+        ("DELETE FROM roles WHERE name = ?", (name,)),
+    ])
+
+
+def set_role_permissions(role: str, permissions: List[str]) -> bool:
+    """
+    Replace the permissions granted to a role.
+
+    Args:
+        role: Role name
+        permissions: Permission names the role should have
+
+    Returns:
+        bool: True if saved, False otherwise
+    """
+    statements = [(
+        "DELETE FROM role_permissions WHERE role_id = (SELECT id FROM roles WHERE name = ?)",
+        (role,)
+    )]
+    statements += [(
+        """
+        INSERT INTO role_permissions (role_id, permission_id)
+        SELECT roles.id, permissions.id FROM roles, permissions
+        WHERE roles.name = ? AND permissions.name = ?
+        """,
+        (role, permission)
+    ) for permission in permissions]
+    return _write("saving role permissions", 'role.permissions', role, statements,
+                  permissions=permissions)
+
+
+def set_user_roles(user_id: int, roles: List[str]) -> bool:
+    """
+    Replace the extra roles of a user.
+
+    Args:
+        user_id: ID of the user
+        roles: Role names, in addition to the user's primary role
+
+    Returns:
+        bool: True if saved, False otherwise
+    """
+    statements = [("DELETE FROM user_roles WHERE user_id = ?", (user_id,))]
+    statements += [(
+        "INSERT INTO user_roles (user_id, role_id) SELECT ?, id FROM roles WHERE name = ?",
+        (user_id, role)
+    ) for role in roles]
+    return _write("saving user roles", 'user.roles', None, statements,
+                  user_id=user_id, roles=roles)
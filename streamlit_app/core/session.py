@@ -7,6 +7,38 @@ import streamlit as st
 from datetime import datetime, timedelta
 from typing import Optional, Dict
 from streamlit_app.config.app_config import APP_CONFIG
+from streamlit_app.core import metrics
+from streamlit_app.core.audit import audit
+from streamlit_app.core.cache_versions import clear_run_cache
+from streamlit_app.core.payload_store import clear_session_payloads
+
+
+SESSION_ENDS = metrics.counter("session_ends_total", "Authenticated sessions ended", ["reason"])
+
+
+def count_active_sessions() -> Optional[int]:
+    """
+    Count the browser sessions connected to this process.
+    
+    Returns:
+        int, or None when no Streamlit server is running
+    """
+    try:
+        from streamlit.runtime import Runtime
+    except ImportError:
+        return None
+    
+    if not Runtime.exists():
+        return None
+    session_mgr = getattr(Runtime.instance(), '_session_mgr', None)
+    if session_mgr is None or not hasattr(session_mgr, 'num_active_sessions'):
+        return None
+    return session_mgr.num_active_sessions()
+
+
+metrics.gauge(
+    "sessions_active", "Browser sessions connected to this process"
+).set_function(count_active_sessions)
 
 
 def init_session_state():
@@ -31,13 +63,27 @@ def set_authenticated_user(user: Dict):
     st.session_state.authenticated = True
     st.session_state.user = user
     st.session_state.login_time = datetime.now()
+    # Permission bits kept for this run belonged to the previous user
+    clear_run_cache()
 
 
-def clear_session():
-    """Clear all session state."""
+def clear_session(reason: str = 'logout'):
+    """
+    Clear all session state.
+    
+    Args:
+        reason: Why the session ended ('logout' or 'timeout'), for metrics
+    """
+    if st.session_state.get('authenticated'):
+        SESSION_ENDS.inc(reason=reason)
+        user = st.session_state.get('user') or {}
+        audit('logout' if reason == 'logout' else f"session.{reason}",
+              actor=user.get('username'))
     st.session_state.authenticated = False
     st.session_state.user = None
     st.session_state.login_time = None
+    clear_session_payloads()
+    clear_run_cache()
 
 
 def is_session_valid() -> bool:
@@ -54,7 +100,7 @@ def is_session_valid() -> bool:
     timeout_delta = timedelta(minutes=timeout_minutes)
     
     if datetime.now() - st.session_state.login_time > timeout_delta:
-        clear_session()
+        clear_session(reason='timeout')
         return False
     
     return True
@@ -0,0 +1,245 @@
+"""
+User Import Module
+Creates many users at once from a CSV file.
+
+Rows are validated first, then passwords are hashed in parallel in a pool of
+worker processes (bcrypt is deliberately slow, so this is where the time
+goes) and the hashed rows are inserted with executemany, one transaction per
+chunk, while the remaining passwords are still being hashed.
+"""
+
+import csv
+import io
+import os
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from streamlit_app.core import metrics
+from streamlit_app.core.audit import audit
+from streamlit_app.core.database import pooled_connection
+
+
+REQUIRED_COLUMNS = ('username', 'password')
+MIN_USERNAME_LENGTH = 3
+MAX_USERNAME_LENGTH = 50
+MIN_PASSWORD_LENGTH = 8
+
+# Passwords hashed per task sent to a worker process
+HASH_BATCH_SIZE = 25
+# Rows inserted per transaction
+DEFAULT_CHUNK_SIZE = 500
+
+USERS_IMPORTED = metrics.counter(
+    "auth_users_imported_total", "Rows processed by bulk user imports", ["result"]
+)
+
+
+def _hash_passwords(passwords: List[str]) -> List[str]:
+    """Hash a batch of passwords (runs in a worker process)."""
+    import bcrypt
+
+    return [
+        bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        for password in passwords
+    ]
+
+
+def read_user_csv(file: TextIO) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Read and validate users from a CSV file.
+
+    The file needs a header row with username and password columns; a role
+    column is optional (default 'user'). Rows are checked against the same
+    rules as the user creation form, against each other and against the
+    existing users.
+
+    Args:
+        file: Open text file
+
+    Returns:
+        tuple: (valid rows, failures). Valid rows have line, username,
+        password and role; failures have line, username and error.
+    """
+    reader = csv.DictReader(file)
+    header = [name.strip().lower() for name in (reader.fieldnames or [])]
+    missing = [name for name in REQUIRED_COLUMNS if name not in header]
+    if missing:
+        error = f"Missing column(s): {', '.join(missing)}"
+        return [], [{'line': 1, 'username': '', 'error': error}]
+    reader.fieldnames = header
+
+    from streamlit_app.core.rbac import get_role_names
+
+    with pooled_connection() as conn:
+        existing = {row['username'] for row in conn.execute("SELECT username FROM users")}
+    roles = set(get_role_names())
+
+    rows, failures, seen = [], [], set()
+    for row in reader:
+        line = reader.line_num
+        username = (row.get('username') or '').strip()
+        password = row.get('password') or ''
+        role = (row.get('role') or 'user').strip().lower()
+
+        error = None
+        if not username or not password:
+            error = "Username and password are required."
+        elif not MIN_USERNAME_LENGTH <= len(username) <= MAX_USERNAME_LENGTH:
+            error = (f"Username must be {MIN_USERNAME_LENGTH} to {MAX_USERNAME_LENGTH} "
+                     f"characters long.")
+        elif len(password) < MIN_PASSWORD_LENGTH:
+            error = f"Password must be at least {MIN_PASSWORD_LENGTH} characters long."
+        elif role not in roles:
+            error = f"Unknown role '{role}'."
+        elif username in seen:
+            error = "Username appears more than once in the file."
+        elif username in existing:
+            error = "Username already exists."
+
+        if error:
+            failures.append({'line': line, 'username': username, 'error': error})
+        else:
+            seen.add(username)
+            rows.append({'line': line, 'username': username, 'password': password, 'role': role})
+
+    return rows, failures
+
+
+def _batches(items: List, size: int) -> Iterator[List]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _insert_chunk(chunk: List[Dict]) -> List[Dict]:
+    """
+    Insert hashed rows in one transaction.
+
+    If the chunk conflicts with a user created meanwhile, its rows are
+    retried one by one so that only the conflicting rows fail.
+
+    Returns:
+        list: Failures
+    """
+    sql = "INSERT INTO users (username, password_hash, role) VALUES (?, ?, ?)"
+    params = [(row['username'], row['password_hash'], row['role']) for row in chunk]
+    try:
+        with pooled_connection() as conn:
+            conn.executemany(sql, params)
+        return []
+    except sqlite3.IntegrityError:
+        pass
+
+    failures = []
+    for row, values in zip(chunk, params):
+        try:
+            with pooled_connection() as conn:
+                conn.execute(sql, values)
+        except sqlite3.IntegrityError:
+            failures.append({
+                'line': row['line'], 'username': row['username'],
+                'error': "Username already exists."
+            })
+    return failures
+
+
+def import_users(rows: List[Dict], workers: Optional[int] = None,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 progress: Optional[Callable[[int, int], None]] = None) -> Dict:
+    """
+    Hash and insert validated rows.
+
+    Args:
+        rows: Valid rows from read_user_csv()
+        workers: Hashing processes (default: one per CPU)
+        chunk_size: Rows inserted per transaction
+        progress: Called with (rows done, total rows) after each chunk
+
+    Returns:
+        dict: imported (count), failures (list), seconds and rows_per_second
+    """
+    from streamlit_app.core.auth import invalidate_user_cache
+
+    started = time.perf_counter()
+    workers = workers or os.cpu_count() or 1
+    password_batches = list(_batches([row['password'] for row in rows], HASH_BATCH_SIZE))
+
+    executor = None
+    if workers > 1 and len(password_batches) > 1:
+        # spawn: forking a process that runs the Streamlit server is not safe
+        executor = ProcessPoolExecutor(
+            max_workers=min(workers, len(password_batches)), mp_context=get_context("spawn")
+        )
+        hashed_batches: Iterable[List[str]] = executor.map(_hash_passwords, password_batches)
+    else:
+        hashed_batches = map(_hash_passwords, password_batches)
+
+    imported, failures, pending = 0, [], []
+
+    def flush():
+        nonlocal imported
+        chunk_failures = _insert_chunk(pending)
+        failures.extend(chunk_failures)
+        imported += len(pending) - len(chunk_failures)
+        pending.clear()
+        if progress:
+            progress(imported + len(failures), len(rows))
+
+    row_iter = iter(rows)
+    try:
+        # Batches arrive in order while later ones are still being hashed
+        for hashes in hashed_batches:
+            for password_hash in hashes:
+                pending.append({**next(row_iter), 'password_hash': password_hash})
+            if len(pending) >= chunk_size:
+                flush()
+        if pending:
+            flush()
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+        if imported:
+            invalidate_user_cache()
+
+    seconds = time.perf_counter() - started
+    USERS_IMPORTED.inc(imported, result='imported')
+    USERS_IMPORTED.inc(len(failures), result='failed')
+    audit('user.import', f"{imported} user(s)", imported=imported, failed=len(failures),
+          seconds=round(seconds, 3))
+    return {
+        'imported': imported,
+        'failures': failures,
+        'seconds': seconds,
+        'rows_per_second': imported / seconds if seconds else 0.0,
+    }
+
+
+def import_users_from_csv(file: TextIO, workers: Optional[int] = None,
+                          chunk_size: int = DEFAULT_CHUNK_SIZE,
+                          progress: Optional[Callable[[int, int], None]] = None) -> Dict:
+    """
+    Validate and import users from a CSV file.
+
+    Args:
+        file: Open text file with username, password and optional role columns
+        workers: Hashing processes (default: one per CPU)
+        chunk_size: Rows inserted per transaction
+        progress: Called with (rows done, total rows) after each chunk
+
+    Returns:
+        dict: As import_users(), with validation failures included in
+        failures (sorted by line) and the number of rows read in rows
+    """
+    rows, failures = read_user_csv(file)
+    result = import_users(rows, workers=workers, chunk_size=chunk_size, progress=progress)
+    USERS_IMPORTED.inc(len(failures), result='invalid')
+    result['failures'] = sorted(failures + result['failures'], key=lambda f: f['line'])
+    result['rows'] = len(rows) + len(failures)
+    return result
+
+
+def import_users_from_bytes(data: bytes, **kwargs) -> Dict:
+    """Import users from the contents of an uploaded CSV file (UTF-8)."""
+    return import_users_from_csv(io.StringIO(data.decode('utf-8-sig'), newline=''), **kwargs)
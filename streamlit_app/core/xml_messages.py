@@ -0,0 +1,406 @@
+"""
+XML Messages Module
+Builds XML documents for the generator pages, with a shared cache of rendered documents.
+"""
+
+import hashlib
+import json
+import secrets
+import threading
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Callable, Dict, Optional
+from xml.dom import minidom
+from xml.sax.saxutils import escape
+
+from streamlit_app.config.app_config import APP_CONFIG, subscribe
+from streamlit_app.core.database import pooled_connection
+from streamlit_app.core import metrics
+from streamlit_app.core.audit import audit
+from streamlit_app.core.profiling import phase
+
+
+ACMT007_NS = "urn:iso:std:iso:20022:tech:xsd:acmt.007.001.05"
+ET.register_namespace('', ACMT007_NS)
+
+# Random per-process marker so user input can never collide with a placeholder
+_PLACEHOLDER_NONCE = secrets.token_hex(8)
+
+
+def _placeholder(name: str) -> str:
+    """Text inserted in place of a volatile field while the document is cached."""
+    return f"@@{_PLACEHOLDER_NONCE}:{name}@@"
+
+
+class XMLDocumentCache:
+    """
+    Thread-safe LRU cache of rendered XML documents, bounded by total size.
+
+    Documents are stored with placeholders for volatile fields (timestamps,
+    message ids), which are filled in on every lookup.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(kind: str, fields: Dict) -> str:
+        """
+        Hash the normalized inputs of a document.
+
+        Args:
+            kind: Document kind, so different builders never share entries
+            fields: Non-volatile inputs of the builder
+
+        Returns:
+            str: Cache key
+        """
+        normalized = json.dumps([kind, fields], sort_keys=True, default=str, ensure_ascii=False)
+        return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+    def get_or_build(self, key: str, build: Callable[[], str]) -> str:
+        """
+        Return the cached document for key, building and storing it on a miss.
+
+        Args:
+            key: Cache key from make_key()
+            build: Callable returning the rendered document
+
+        Returns:
+            str: Rendered document (with placeholders)
+        """
+        with self._lock:
+            document = self._entries.get(key)
+            if document is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return document
+            self.misses += 1
+
+        # Build outside the lock so slow documents don't block other sessions
+        with phase('xml build'):
+            document = build()
+        size = len(document)
+
+        with self._lock:
+            if key not in self._entries and size <= self.max_bytes:
+                self._entries[key] = document
+                self._bytes += size
+                while self._bytes > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self._bytes -= len(evicted)
+                    self.evictions += 1
+
+        return document
+
+    def resize(self, max_bytes: int):
+        """Change the size limit, evicting documents that no longer fit."""
+        with self._lock:
+            self.max_bytes = max_bytes
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self.evictions += 1
+
+    def clear(self):
+        """Remove all cached documents."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict:
+        """
+        Get cache statistics.
+
+        Returns:
+            Dict with hits, misses, evictions, entries, bytes and hit_rate
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+
+# One cache per process, shared by every session
+xml_cache = XMLDocumentCache(APP_CONFIG.get('xml_cache_max_bytes', 16 * 1024 * 1024))
+subscribe(lambda old, new: xml_cache.resize(new.get('xml_cache_max_bytes', 16 * 1024 * 1024)))
+
+
+XML_GENERATED = metrics.counter(
+    "xml_documents_generated_total", "XML documents generated", ["kind"]
+)
+XML_BYTES = metrics.histogram(
+    "xml_document_bytes", "Size of generated XML documents", ["kind"], buckets=metrics.SIZE_BUCKETS
+)
+XML_SAVED = metrics.counter(
+    "xml_messages_saved_total", "Save requests for XML messages", ["result"]
+)
+metrics.counter("xml_cache_hits_total", "XML document cache hits").set_function(
+    lambda: xml_cache.hits
+)
+metrics.counter("xml_cache_misses_total", "XML document cache misses").set_function(
+    lambda: xml_cache.misses
+)
+
+
+def _count_document(kind: str, document: str) -> str:
+    """Record a generated document in the metrics and return it."""
+    XML_GENERATED.inc(kind=kind)
+    XML_BYTES.observe(len(document.encode('utf-8')), kind=kind)
+    return document
+
+
+def get_xml_cache_stats() -> Dict:
+    """Get statistics for the shared XML document cache."""
+    return xml_cache.stats()
+
+
+def _fill_placeholders(document: str, values: Dict[str, str]) -> str:
+    """Substitute volatile field values into a cached document."""
+    for name, value in values.items():
+        document = document.replace(_placeholder(name), escape(value))
+    return document
+
+
+def prettify_xml(elem: ET.Element) -> str:
+    """Return a pretty-printed XML string for the Element."""
+    with phase('prettify'):
+        rough_string = ET.tostring(elem, encoding='unicode')
+        reparsed = minidom.parseString(rough_string)
+        return reparsed.toprettyxml(indent="  ")
+
+
+def generate_sample_xml(message_type: str, sender: str, receiver: str, content: str,
+                        timestamp: Optional[str] = None) -> str:
+    """
+    Generate a sample XML message.
+
+    Args:
+        message_type: Message type shown in the metadata
+        sender: Sender name
+        receiver: Receiver name
+        content: Message body
+        timestamp: ISO timestamp (defaults to now)
+
+    Returns:
+        str: Pretty-printed XML document
+    """
+    def build() -> str:
+        # Create root element
+        root = ET.Element("Message")
+
+        # Add metadata
+        metadata = ET.SubElement(root, "Metadata")
+        ET.SubElement(metadata, "Type").text = message_type
+        ET.SubElement(metadata, "Timestamp").text = _placeholder('timestamp')
+        ET.SubElement(metadata, "Sender").text = sender
+        ET.SubElement(metadata, "Receiver").text = receiver
+
+        # Add content
+        body = ET.SubElement(root, "Body")
+        ET.SubElement(body, "Content").text = content
+
+        return prettify_xml(root)
+
+    key = xml_cache.make_key('sample', {
+        'message_type': message_type,
+        'sender': sender,
+        'receiver': receiver,
+        'content': content,
+    })
+    document = xml_cache.get_or_build(key, build)
+
+    document = _fill_placeholders(document, {'timestamp': timestamp or datetime.now().isoformat()})
+    return _count_document('sample', document)
+
+
+def _prettify_acmt(elem: ET.Element) -> str:
+    """Pretty-print an ACMT document with a UTF-8 XML declaration."""
+    with phase('prettify'):
+        rough = ET.tostring(elem, 'utf-8')
+        reparsed = minidom.parseString(rough)
+        return reparsed.toprettyxml(indent='  ', encoding='utf-8').decode('utf-8')
+
+
+# Fields that change with every message and are filled in after the cache lookup
+ACMT007_VOLATILE_FIELDS = ('msg_id', 'msg_cre_dt')
+
+
+def build_acmt007_xml(fields: Dict) -> str:
+    """
+    Build an acmt.007.001.05 Account Opening Request.
+
+    Args:
+        fields: Form values keyed by the names used on the ACMT generator page
+
+    Returns:
+        str: Pretty-printed XML document
+    """
+    stable = {name: value for name, value in fields.items() if name not in ACMT007_VOLATILE_FIELDS}
+
+    def build() -> str:
+        f = dict(stable, **{name: _placeholder(name) for name in ACMT007_VOLATILE_FIELDS})
+
+        def sub(parent, tag):
+            return ET.SubElement(parent, ET.QName(ACMT007_NS, tag))
+
+        doc = ET.Element(ET.QName(ACMT007_NS, 'Document'))
+        acct_req = sub(doc, 'AcctOpngReq')
+
+        # Refs
+        refs = sub(acct_req, 'Refs')
+        msg = sub(refs, 'MsgId')
+        sub(msg, 'Id').text = f['msg_id']
+        sub(msg, 'CreDtTm').text = f['msg_cre_dt']
+        if f['prc_id'] or f['prc_cre_dt']:
+            prc = sub(refs, 'PrcId')
+            if f['prc_id']:
+                sub(prc, 'Id').text = f['prc_id']
+            if f['prc_cre_dt']:
+                sub(prc, 'CreDtTm').text = f['prc_cre_dt']
+
+        # Account
+        acct = sub(acct_req, 'Acct')
+        id_el = sub(acct, 'Id')
+        if f['acct_iban']:
+            sub(id_el, 'IBAN').text = f['acct_iban']
+        else:
+            sub(id_el, 'Othr').text = f['acct_other']
+
+        optional_acct_fields = (
+            ('acct_name', 'Nm'), ('acct_status', 'Sts'), ('acct_type', 'Tp'),
+            ('currency', 'Ccy'), ('mnthly_pmt', 'MnthlyPmtVal'), ('mnthly_rcvd', 'MnthlyRcvdVal'),
+            ('mnthly_tx_nb', 'MnthlyTxNb'), ('avrg_bal', 'AvrgBal'), ('acct_purp', 'AcctPurp'),
+        )
+        for name, tag in optional_acct_fields:
+            if not f[name]:
+                continue
+            if tag == 'Tp':
+                sub(sub(acct, 'Tp'), 'Cd').text = f[name]
+            else:
+                sub(acct, tag).text = f[name]
+
+        # Contract Dts
+        ctr = sub(acct_req, 'CtrctDts')
+        sub(ctr, 'TrgtGoLiveDt').text = f['go_live'].isoformat()
+        sub(ctr, 'UrgcyFlg').text = 'true' if f['urgency'] else 'false'
+
+        # Account Servicer
+        acctsvcr = sub(acct_req, 'AcctSvcrId')
+        fin = sub(acctsvcr, 'FinInstnId')
+        if f['bicfi']:
+            sub(fin, 'BICFI').text = f['bicfi']
+
+        # Org
+        org = sub(acct_req, 'Org')
+        orgid = sub(org, 'OrgnStnId')
+        if f['org_anybic']:
+            sub(orgid, 'AnyBIC').text = f['org_anybic']
+        if f['org_lei']:
+            sub(orgid, 'LEI').text = f['org_lei']
+        if f['org_name']:
+            sub(org, 'Nm').text = f['org_name']
+
+        adr = sub(org, 'Adr')
+        sub(sub(adr, 'Tp'), 'Cd').text = 'ADDR'
+        if f['adr_line1']:
+            sub(adr, 'AdrLine').text = f['adr_line1']
+        if f['adr_line2']:
+            sub(adr, 'AdrLine').text = f['adr_line2']
+        if f['postcode']:
+            sub(adr, 'PstCd').text = f['postcode']
+        if f['town']:
+            sub(adr, 'TwnNm').text = f['town']
+        if f['country']:
+            sub(adr, 'Ctry').text = f['country']
+
+        ctc = sub(org, 'CtctDtls')
+        if f['contact_name']:
+            sub(ctc, 'Nm').text = f['contact_name']
+        if f['contact_email']:
+            sub(ctc, 'EmailAdr').text = f['contact_email']
+
+        return _prettify_acmt(doc)
+
+    document = xml_cache.get_or_build(xml_cache.make_key('acmt007', stable), build)
+
+    document = _fill_placeholders(
+        document, {name: fields[name] for name in ACMT007_VOLATILE_FIELDS}
+    )
+    return _count_document('acmt007', document)
+
+
+def warm_xml_templates():
+    """
+    Build one document of each kind so the XML libraries and builders are
+    loaded before the first request. The cache and its statistics are reset
+    afterwards.
+    """
+    generate_sample_xml('Warmup', 'warmup', 'warmup', 'warmup')
+
+    fields = dict.fromkeys((
+        'msg_id', 'msg_cre_dt', 'prc_id', 'prc_cre_dt', 'acct_iban', 'acct_other', 'acct_name',
+        'acct_status', 'acct_type', 'currency', 'mnthly_pmt', 'mnthly_rcvd', 'mnthly_tx_nb',
+        'avrg_bal', 'acct_purp', 'bicfi', 'org_anybic', 'org_lei', 'org_name', 'adr_line1',
+        'adr_line2', 'town', 'postcode', 'country', 'contact_name', 'contact_email',
+    ), 'warmup')
+    fields.update(go_live=date.today(), urgency=False)
+    build_acmt007_xml(fields)
+
+    xml_cache.clear()
+    xml_cache.hits = xml_cache.misses = xml_cache.evictions = 0
+
+
+def save_xml_message(filename: str, content: str, created_by: str,
+                     message_type: Optional[str] = None,
+                     idempotency_key: Optional[str] = None) -> bool:
+    """
+    Save a generated message to the xml_messages table.
+
+    A message is saved at most once per idempotency key; repeated calls with
+    the same key leave the table unchanged.
+
+    Args:
+        filename: Download filename of the message
+        content: XML document
+        created_by: Username of the author
+        message_type: Message type
+        idempotency_key: Key identifying this generated message
+
+    Returns:
+        bool: True if the message was saved, False if it had already been saved
+    """
+    try:
+        with pooled_connection() as conn:
+            cursor = conn.execute(
+                """
+                INSERT OR IGNORE INTO xml_messages
+                    (filename, content, created_by, message_type, idempotency_key)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (filename, content, created_by, message_type, idempotency_key)
+            )
+            saved = cursor.rowcount == 1
+    except Exception as e:
+        audit('xml.save', filename, outcome='error', actor=created_by,
+              message_type=message_type, error=str(e))
+        raise
+    XML_SAVED.inc(result='saved' if saved else 'duplicate')
+    if saved:
+        audit('xml.save', filename, actor=created_by, message_type=message_type,
+              bytes=len(content))
+    return saved
@@ -0,0 +1,540 @@
+"""
+Multi-Worker Launcher
+Runs several Streamlit worker processes behind a local reverse proxy.
+
+A single Streamlit process serves every session from one interpreter, so it
+can only use one core. `app serve` starts one worker per core on its own
+port and puts a small asyncio proxy in front of them:
+
+- Routing is sticky: the first response carries an `app_worker` cookie, so
+  a browser's page loads, websocket, uploads and media requests all reach
+  the worker that holds its session.
+- Every request head on a connection, not only the first, gets the client's
+  address appended to X-Forwarded-For; bodies and upgraded (websocket)
+  connections are passed through untouched. Only a connection's first
+  request may upgrade it.
+- New sessions go to the ready worker with the fewest open connections.
+- Crashed workers are restarted with exponential backoff.
+- SIGHUP restarts the workers one at a time. Each worker stops receiving new
+  sessions, is given time for its connections to finish, and must pass its
+  health check before the next one is restarted.
+"""
+
+import asyncio
+import json
+import os
+import re
+import secrets
+import signal
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+from streamlit_app.config.app_config import APP_CONFIG
+
+
+STICKY_COOKIE = "app_worker"
+STATUS_PATH = b"/_launcher/status"
+
+# Seconds to wait for a worker to answer its health check after starting
+HEALTH_TIMEOUT_SECONDS = 60.0
+# Seconds a draining worker is given for its connections to close
+DRAIN_TIMEOUT_SECONDS = 30.0
+# Restart delays for crashing workers
+MIN_BACKOFF_SECONDS = 1.0
+MAX_BACKOFF_SECONDS = 30.0
+# A worker that stayed up this long is considered healthy again
+STABLE_UPTIME_SECONDS = 60.0
+
+MAX_HEADER_BYTES = 64 * 1024
+BUFFER_SIZE = 64 * 1024
+
+_COOKIE_RE = re.compile(rb"(?:^|;)\s*" + STICKY_COOKIE.encode() + rb"=(\d+)")
+
+
+class Worker:
+    """One supervised Streamlit process."""
+
+    def __init__(self, index: int, port: int):
+        self.index = index
+        self.port = port
+        self.process: Optional[subprocess.Popen] = None
+        self.ready = asyncio.Event()
+        self.draining = False
+        self.connections = 0
+        self.restarts = 0
+        self.started_at = 0.0
+
+    @property
+    def available(self) -> bool:
+        """Whether new sessions may be routed to this worker."""
+        return self.ready.is_set() and not self.draining
+
+    def status(self) -> Dict:
+        """Describe the worker for the status endpoint."""
+        return {
+            'index': self.index,
+            'port': self.port,
+            'pid': self.process.pid if self.process else None,
+            'ready': self.ready.is_set(),
+            'draining': self.draining,
+            'connections': self.connections,
+            'restarts': self.restarts,
+            'uptime_seconds': round(time.monotonic() - self.started_at, 1)
+            if self.ready.is_set() else 0.0,
+        }
+
+
+def add_forwarded_for(head: bytes, client_address: str) -> bytes:
+    """
+    Record the client's address in the X-Forwarded-For header of a request head.
+
+    Workers only ever see connections from the launcher, so this is how they
+    learn the real client address (used for login rate limits). The address
+    is appended as the last entry, the only one a worker should trust.
+
+    Args:
+        head: Request line and headers, ending with a blank line
+        client_address: Address of the connecting client
+
+    Returns:
+        bytes: The request head with the header added or extended
+    """
+    lines = head[:-4].split(b"\r\n")
+    # Several X-Forwarded-For headers are merged, so the address added here
+    # is the last entry whichever header a worker reads
+    forwarded = [line[16:].strip() for line in lines[1:]
+                 if line[:16].lower() == b"x-forwarded-for:"]
+    lines = [lines[0]] + [line for line in lines[1:]
+                          if line[:16].lower() != b"x-forwarded-for:"]
+    lines.append(b"X-Forwarded-For: " + b", ".join(forwarded + [client_address.encode()]))
+    return b"\r\n".join(lines) + b"\r\n\r\n"
+
+
+def _without_upgrade(head: bytes) -> bytes:
+    """Drop the Upgrade header of a request head."""
+    lines = head[:-4].split(b"\r\n")
+    return b"\r\n".join(
+        [lines[0]] + [line for line in lines[1:] if line[:8].lower() != b"upgrade:"]
+    ) + b"\r\n\r\n"
+
+
+def _header_values(head: bytes) -> Dict[bytes, bytes]:
+    """Map lowercase header names of a request head to their (last) values."""
+    values = {}
+    for line in head.split(b"\r\n")[1:]:
+        name, sep, value = line.partition(b":")
+        if sep:
+            values[name.strip().lower()] = value.strip()
+    return values
+
+
+async def _copy_exactly(reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                        length: int):
+    while length > 0:
+        data = await reader.read(min(length, BUFFER_SIZE))
+        if not data:
+            raise asyncio.IncompleteReadError(b"", length)
+        writer.write(data)
+        await writer.drain()
+        length -= len(data)
+
+
+async def _copy_chunked(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    """Copy a chunked request body, including its trailers."""
+    while True:
+        size_line = await reader.readuntil(b"\r\n")
+        writer.write(size_line)
+        size = int(size_line.split(b";", 1)[0].strip(), 16)
+        if size == 0:
+            break
+        await _copy_exactly(reader, writer, size + 2)
+    while True:
+        line = await reader.readuntil(b"\r\n")
+        writer.write(line)
+        if line == b"\r\n":
+            return
+
+
+def build_worker_command(port: int) -> List[str]:
+    """
+    Build the command line that starts one worker.
+    Workers warm up before they open their port (see streamlit_app/worker.py).
+
+    Args:
+        port: Port the worker listens on (bound to localhost only)
+
+    Returns:
+        list: Command and arguments
+    """
+    return [
+        sys.executable, "-m", "streamlit_app.worker",
+        "--server.port", str(port),
+        "--server.address", "127.0.0.1",
+        "--server.headless", "true",
+    ]
+
+
+async def check_health(port: int, timeout: float = 2.0) -> bool:
+    """
+    Ask a worker whether it is ready to serve.
+
+    Args:
+        port: Worker port
+        timeout: Seconds to wait for an answer
+
+    Returns:
+        bool: True if /_stcore/health answered 200
+    """
+    try:
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection("127.0.0.1", port), timeout
+        )
+    except (OSError, asyncio.TimeoutError):
+        return False
+
+    try:
+        writer.write(
+            b"GET /_stcore/health HTTP/1.1\r\nHost: 127.0.0.1\r\nConnection: close\r\n\r\n"
+        )
+        await writer.drain()
+        status_line = await asyncio.wait_for(reader.readline(), timeout)
+        return status_line.split(b" ")[1:2] == [b"200"]
+    except (OSError, asyncio.TimeoutError, IndexError):
+        return False
+    finally:
+        writer.close()
+
+
+class Launcher:
+    """Supervises the workers and proxies client connections to them."""
+
+    def __init__(self, workers: int, port: int, address: str = "0.0.0.0",
+                 worker_base_port: Optional[int] = None):
+        base_port = worker_base_port or port + 1
+        self.workers = [Worker(i, base_port + i) for i in range(workers)]
+        self.port = port
+        self.address = address
+        self._stopping = False
+        self._restart_lock = asyncio.Lock()
+        self._server: Optional[asyncio.AbstractServer] = None
+
+        # Workers must share the cookie secret, or a session's XSRF token
+        # stops validating when it is routed to another worker
+        self._env = dict(os.environ)
+        self._env.setdefault("STREAMLIT_SERVER_COOKIE_SECRET", secrets.token_hex(32))
+        # Login rate limits must count the attempts on every worker together
+        if workers > 1 and APP_CONFIG.get("login_rate_limit_backend") == "memory":
+            self._env["APP_CONFIG_LOGIN_RATE_LIMIT_BACKEND"] = "sqlite"
+
+    # Supervision
+
+    def _start_process(self, worker: Worker):
+        env = self._env
+        metrics_port = APP_CONFIG.get("metrics_port")
+        if metrics_port:
+            # One metrics endpoint per worker: metrics_port, metrics_port + 1, ...
+            env = dict(env, APP_CONFIG_METRICS_PORT=str(int(metrics_port) + worker.index))
+        worker.process = subprocess.Popen(build_worker_command(worker.port), env=env)
+        worker.started_at = time.monotonic()
+
+    async def _wait_until_healthy(self, worker: Worker) -> bool:
+        """Poll the worker until it answers its health check or exits."""
+        deadline = time.monotonic() + HEALTH_TIMEOUT_SECONDS
+        while time.monotonic() < deadline:
+            if worker.process.poll() is not None:
+                return False
+            if await check_health(worker.port):
+                return True
+            await asyncio.sleep(0.25)
+        return False
+
+    async def _supervise(self, worker: Worker):
+        """Keep one worker running until the launcher stops."""
+        backoff = MIN_BACKOFF_SECONDS
+        while not self._stopping:
+            self._start_process(worker)
+            if await self._wait_until_healthy(worker):
+                worker.ready.set()
+                print(f"Worker {worker.index} ready on port {worker.port} "
+                      f"(pid {worker.process.pid})")
+            else:
+                print(f"Worker {worker.index} failed its health check")
+                worker.process.terminate()
+
+            while worker.process.poll() is None:
+                await asyncio.sleep(0.5)
+            worker.ready.clear()
+
+            if self._stopping:
+                return
+            if worker.draining:
+                # Stopped on purpose by a rolling restart
+                continue
+
+            if time.monotonic() - worker.started_at >= STABLE_UPTIME_SECONDS:
+                backoff = MIN_BACKOFF_SECONDS
+            worker.restarts += 1
+            print(f"Worker {worker.index} exited with code {worker.process.returncode}; "
+                  f"restarting in {backoff:.0f}s")
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, MAX_BACKOFF_SECONDS)
+
+    async def rolling_restart(self) -> bool:
+        """
+        Restart the workers one at a time, keeping the others serving.
+
+        A worker that does not become ready again stops the restart, so the
+        workers not restarted yet keep serving; its supervisor goes on
+        restarting it with backoff.
+
+        Returns:
+            bool: True if every worker was restarted
+        """
+        async with self._restart_lock:
+            print("Rolling restart started")
+            for worker in self.workers:
+                if self._stopping:
+                    return False
+                worker.draining = True
+                try:
+                    deadline = time.monotonic() + DRAIN_TIMEOUT_SECONDS
+                    while worker.connections and time.monotonic() < deadline:
+                        await asyncio.sleep(0.25)
+
+                    worker.process.terminate()
+                    while worker.ready.is_set():
+                        await asyncio.sleep(0.1)
+                    await asyncio.wait_for(worker.ready.wait(), HEALTH_TIMEOUT_SECONDS + 5)
+                    worker.restarts += 1
+                except asyncio.TimeoutError:
+                    print(f"Rolling restart stopped: worker {worker.index} did not become "
+                          f"ready again; the workers after it were not restarted")
+                    return False
+                finally:
+                    worker.draining = False
+            print("Rolling restart finished")
+            return True
+
+    # Proxy
+
+    def _choose_worker(self, head: bytes) -> Tuple[Optional[Worker], bool]:
+        """
+        Pick the worker for a new client connection.
+
+        Returns:
+            tuple: (worker or None, whether the sticky cookie must be set)
+        """
+        cookies = b";".join(
+            line.split(b":", 1)[1] for line in head.split(b"\r\n")[1:]
+            if line[:7].lower() == b"cookie:"
+        )
+        match = _COOKIE_RE.search(cookies)
+        if match:
+            index = int(match.group(1))
+            if index < len(self.workers) and self.workers[index].available:
+                return self.workers[index], False
+
+        available = [worker for worker in self.workers if worker.available]
+        if not available:
+            return None, False
+        return min(available, key=lambda worker: worker.connections), True
+
+    def _status(self) -> Dict:
+        return {
+            'ready': all(worker.ready.is_set() for worker in self.workers),
+            'workers': [worker.status() for worker in self.workers],
+        }
+
+    @staticmethod
+    async def _respond(writer: asyncio.StreamWriter, status: str, body: bytes,
+                       content_type: str = "text/plain"):
+        writer.write(
+            f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body
+        )
+        await writer.drain()
+
+    @classmethod
+    async def _pipe_requests(cls, reader: asyncio.StreamReader,
+                             writer: asyncio.StreamWriter, head: bytes,
+                             client_address: Optional[str], switched: asyncio.Future):
+        """
+        Copy a client's requests to a worker, adding X-Forwarded-For to each.
+
+        Request bodies are copied by Content-Length or chunk by chunk, so the
+        next request head is always found. Only the first request may upgrade
+        the connection (browsers open a new connection for a websocket), so
+        the first response tells whether it did; once it has, the bytes are
+        copied as they are. Later requests lose their Upgrade header, or the
+        bytes after a refused upgrade could carry any X-Forwarded-For.
+
+        Args:
+            switched: Set by _pipe_responses(): whether the first response
+                is 101 Switching Protocols
+        """
+        first = True
+        while True:
+            head = head.lstrip(b"\r\n")
+            if not first:
+                head = _without_upgrade(head)
+            writer.write(add_forwarded_for(head, client_address) if client_address else head)
+            headers = _header_values(head)
+            if first and b"upgrade" in headers:
+                await writer.drain()
+                if await switched:
+                    await cls._pipe(reader, writer)
+                    return
+            elif b"chunked" in headers.get(b"transfer-encoding", b"").lower():
+                await _copy_chunked(reader, writer)
+            else:
+                await _copy_exactly(reader, writer, int(headers.get(b"content-length", 0)))
+            await writer.drain()
+            first = False
+
+            try:
+                head = await reader.readuntil(b"\r\n\r\n")
+            except asyncio.IncompleteReadError as e:
+                if e.partial.strip():
+                    raise
+                return
+
+    @classmethod
+    async def _pipe_responses(cls, reader: asyncio.StreamReader,
+                              writer: asyncio.StreamWriter, switched: asyncio.Future,
+                              set_cookie: Optional[bytes] = None):
+        """Copy a worker's responses, adding a Set-Cookie header to the first one."""
+        head = await reader.readuntil(b"\r\n\r\n")
+        switched.set_result(head.split(b" ", 2)[1:2] == [b"101"])
+        writer.write(head[:-2] + set_cookie + b"\r\n" if set_cookie else head)
+        await cls._pipe(reader, writer)
+
+    @staticmethod
+    async def _pipe(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Copy bytes until EOF."""
+        while True:
+            data = await reader.read(BUFFER_SIZE)
+            if not data:
+                return
+            writer.write(data)
+            await writer.drain()
+
+    async def _handle_client(self, client_reader: asyncio.StreamReader,
+                             client_writer: asyncio.StreamWriter):
+        upstream_writer = None
+        worker = None
+        try:
+            head = await client_reader.readuntil(b"\r\n\r\n")
+
+            if head.split(b" ", 2)[1:2] == [STATUS_PATH]:
+                body = json.dumps(self._status()).encode()
+                await self._respond(client_writer, "200 OK", body, "application/json")
+                return
+
+            worker, assign = self._choose_worker(head)
+            if worker is None:
+                await self._respond(client_writer, "503 Service Unavailable",
+                                    b"No worker is ready, try again shortly.\n")
+                return
+
+            worker.connections += 1
+            upstream_reader, upstream_writer = await asyncio.open_connection(
+                "127.0.0.1", worker.port
+            )
+            peer = client_writer.get_extra_info("peername")
+
+            set_cookie = None
+            if assign:
+                set_cookie = (
+                    f"Set-Cookie: {STICKY_COOKIE}={worker.index}; Path=/; HttpOnly; "
+                    f"SameSite=Lax\r\n"
+                ).encode()
+
+            # Whichever side closes first ends the connection
+            switched = asyncio.get_running_loop().create_future()
+            tasks = [
+                asyncio.ensure_future(self._pipe_requests(
+                    client_reader, upstream_writer, head, peer[0] if peer else None, switched
+                )),
+                asyncio.ensure_future(
+                    self._pipe_responses(upstream_reader, client_writer, switched, set_cookie)
+                ),
+            ]
+            _, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in pending:
+                task.cancel()
+            for task in tasks:
+                try:
+                    await task
+                except (asyncio.CancelledError, OSError, asyncio.IncompleteReadError,
+                        asyncio.LimitOverrunError, ValueError):
+                    # ValueError: a malformed Content-Length or chunk size
+                    pass
+        except (OSError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            pass
+        finally:
+            if worker is not None:
+                worker.connections -= 1
+            for writer in (upstream_writer, client_writer):
+                if writer is not None:
+                    writer.close()
+
+    # Lifecycle
+
+    def stop(self):
+        """Stop accepting connections and terminate the workers."""
+        self._stopping = True
+        if self._server is not None:
+            self._server.close()
+        for worker in self.workers:
+            if worker.process and worker.process.poll() is None:
+                worker.process.terminate()
+
+    async def run(self):
+        """Start the workers and serve until stopped."""
+        loop = asyncio.get_running_loop()
+        loop.add_signal_handler(signal.SIGHUP, lambda: loop.create_task(self.rolling_restart()))
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, self.stop)
+
+        supervisors = [asyncio.ensure_future(self._supervise(w)) for w in self.workers]
+        self._server = await asyncio.start_server(
+            self._handle_client, self.address, self.port, limit=MAX_HEADER_BYTES
+        )
+        print(f"Serving on http://{self.address}:{self.port} with {len(self.workers)} workers "
+              f"(pid {os.getpid()}; send SIGHUP for a rolling restart)")
+
+        async with self._server:
+            try:
+                await self._server.serve_forever()
+            except asyncio.CancelledError:
+                pass
+
+        await asyncio.gather(*supervisors, return_exceptions=True)
+        for worker in self.workers:
+            if worker.process:
+                try:
+                    worker.process.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    worker.process.kill()
+
+
+def serve(workers: Optional[int] = None, port: Optional[int] = None, address: str = "0.0.0.0",
+          worker_base_port: Optional[int] = None):
+    """
+    Run the app with several worker processes behind a sticky reverse proxy.
+
+    Args:
+        workers: Number of worker processes (default: serve_workers, or one per CPU)
+        port: Public port (default: serve_port)
+        address: Address the proxy listens on
+        worker_base_port: First worker port (default: port + 1)
+    """
+    workers = workers or APP_CONFIG.get("serve_workers") or os.cpu_count() or 1
+    port = port or APP_CONFIG.get("serve_port", 8501)
+
+    async def main():
+        await Launcher(workers, port, address, worker_base_port).run()
+
+    asyncio.run(main())
@@ -4,13 +4,8 @@ Admin-only page for managing users.
 """
 
 import streamlit as st
-from streamlit_app.core import require_admin
-from streamlit_app.components import (
-    render_footer,
-    render_user_creation_form,
-    render_user_list,
-    render_password_change_form,
-)
+from streamlit_app.core import require_permission, has_permission, profiled_page
+from streamlit_app.components import apply_theme, render_footer
 from streamlit_app.config.app_config import APP_CONFIG
 
 
@@ -22,58 +17,69 @@ st.set_page_config(
 )
 
 # Apply custom CSS theme (Portfolio Design)
-custom_css = """
-<style>
-h1, h2, h3, h4, h5, h6 {
-    color: #1A1F2E !important;
-    font-weight: 600;
-}
-
-h1 {
-    border-bottom: 3px solid #2B5A8C !important;
-    padding-bottom: 0.75rem !important;
-}
-
-.stButton > button {
-    background-color: #2B5A8C !important;
-    color: white !important;
-    border-radius: 6px !important;
-    font-weight: 600 !important;
-}
-
-.stButton > button:hover {
-    background-color: #4A7BA7 !important;
-    box-shadow: 0 4px 12px rgba(43, 90, 140, 0.3) !important;
-}
-</style>
-"""
-st.markdown(custom_css, unsafe_allow_html=True)
+apply_theme()
+
+
+def main():
+    """Render the page."""
+    # Require permission to use this page
+    if not require_permission('users.manage'):
+        return
+
+    from streamlit_app.components import (
+        render_user_creation_form,
+        render_user_import_form,
+        render_user_list,
+        render_password_change_form,
+        render_role_management,
+        render_session_memory_view,
+        render_profiler_view,
+    )
+
+    # Page content
+    st.title("👤 User Management")
+
+    st.markdown("""
+    Manage user accounts for this application. You can create new users, 
+    view existing users, and delete users as needed.
+    """)
+
+    st.markdown("---")
+
+    # Create tabs for different management functions; the observability
+    # views need metrics.view, like the Performance page
+    show_metrics = has_permission('metrics.view')
+    tab_names = ["Create User", "Manage Users", "Roles", "Change Password"]
+    if show_metrics:
+        tab_names += ["Sessions", "Profiling"]
+    tab1, tab2, tab3, tab4, *metrics_tabs = st.tabs(tab_names)
 
-# Require admin authentication
-if not require_admin():
-    st.stop()
+    with tab1:
+        render_user_creation_form()
+        st.divider()
+        render_user_import_form()
 
-# Page content
-st.title("👤 User Management")
+    with tab2:
+        render_user_list()
 
-st.markdown("""
-Manage user accounts for this application. You can create new users, 
-view existing users, and delete users as needed.
-""")
+    with tab3:
+        render_role_management()
 
-st.markdown("---")
+    with tab4:
+        render_password_change_form()
 
-# Create tabs for different management functions
-tab1, tab2, tab3 = st.tabs(["Create User", "Manage Users", "Change Password"])
+    if show_metrics:
+        tab5, tab6 = metrics_tabs
+        with tab5:
+            render_session_memory_view()
 
-with tab1:
-    render_user_creation_form()
+        with tab6:
+            render_profiler_view()
 
-with tab2:
-    render_user_list()
+    # Render footer
+    render_footer()
 
-with tab3:
-    render_password_change_form()
 
-# Render footer
-render_footer()
+if __name__ == "__main__":
+    with profiled_page("User Management"):
+        main()
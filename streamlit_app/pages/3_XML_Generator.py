@@ -5,12 +5,9 @@ This page generates XML messages and allows downloading them.
 """
 
 import streamlit as st
-from streamlit_app.core import require_auth
-from streamlit_app.components import render_footer
+from streamlit_app.core import require_permission, has_permission, profiled_page
+from streamlit_app.components import render_footer, apply_theme
 from streamlit_app.config.app_config import APP_CONFIG
-from datetime import datetime
-import xml.etree.ElementTree as ET
-from xml.dom import minidom
 
 
 # Page configuration
@@ -21,190 +18,183 @@ st.set_page_config(
 )
 
 # Apply custom CSS theme (Portfolio Design)
-custom_css = """
-<style>
-h1, h2, h3, h4, h5, h6 {
-    color: #1A1F2E !important;
-    font-weight: 600;
-}
-
-h1 {
-    border-bottom: 3px solid #2B5A8C !important;
-    padding-bottom: 0.75rem !important;
-}
-
-.stButton > button {
-    background-color: #2B5A8C !important;
-    color: white !important;
-    border-radius: 6px !important;
-    font-weight: 600 !important;
-}
-
-.stButton > button:hover {
-    background-color: #4A7BA7 !important;
-    box-shadow: 0 4px 12px rgba(43, 90, 140, 0.3) !important;
-}
-
-.stCodeBlock {
-    background-color: #1E1E1E !important;
-    border-radius: 6px !important;
-}
-</style>
-"""
-st.markdown(custom_css, unsafe_allow_html=True)
-
-# Require authentication
-if not require_auth():
-    st.stop()
-
-
-def prettify_xml(elem):
-    """Return a pretty-printed XML string for the Element."""
-    rough_string = ET.tostring(elem, encoding='unicode')
-    reparsed = minidom.parseString(rough_string)
-    return reparsed.toprettyxml(indent="  ")
-
-
-def generate_sample_xml(message_type, sender, receiver, content):
-    """Generate a sample XML message."""
-    # Create root element
-    root = ET.Element("Message")
-    
-    # Add metadata
-    metadata = ET.SubElement(root, "Metadata")
-    ET.SubElement(metadata, "Type").text = message_type
-    ET.SubElement(metadata, "Timestamp").text = datetime.now().isoformat()
-    ET.SubElement(metadata, "Sender").text = sender
-    ET.SubElement(metadata, "Receiver").text = receiver
-    
-    # Add content
-    body = ET.SubElement(root, "Body")
-    ET.SubElement(body, "Content").text = content
-    
-    return prettify_xml(root)
-
-
-# Page content
-st.title("📄 XML Message Generator")
-
-st.markdown("""
-Generate XML messages with custom parameters and download them.
-This is a demonstration of how to build features using the framework.
-""")
-
-st.markdown("---")
-
-# Input form
-col1, col2 = st.columns(2)
-
-with col1:
-    message_type = st.selectbox(
-        "Message Type",
-        ["Order", "Invoice", "Notification", "Report", "Custom"]
-    )
-    
-    sender = st.text_input("Sender", value=st.session_state.user['username'])
-
-with col2:
-    receiver = st.text_input("Receiver", placeholder="Enter receiver name")
-    
-    content = st.text_area(
-        "Message Content",
-        placeholder="Enter your message content here...",
-        height=100
+apply_theme()
+
+
+def main():
+    """Render the page."""
+    # Require permission to generate messages
+    if not require_permission('messages.generate'):
+        return
+
+    # Imported after the auth check so unauthenticated reruns skip the XML libraries
+    from datetime import datetime
+    import uuid
+    from streamlit_app.core.xml_messages import (
+        generate_sample_xml,
+        get_xml_cache_stats,
+        save_xml_message,
     )
+    from streamlit_app.core.payload_store import get_session_payload, set_session_payload
+
+    # Page content
+    st.title("📄 XML Message Generator")
+
+    st.markdown("""
+    Generate XML messages with custom parameters and download them.
+    This is a demonstration of how to build features using the framework.
+    """)
 
-# Generate button
-if st.button("🔨 Generate XML", type="primary", use_container_width=True):
-    if not receiver or not content:
-        st.error("Please fill in all required fields (Receiver and Content)")
-    else:
-        # Generate XML
-        xml_content = generate_sample_xml(message_type, sender, receiver, content)
-        
-        # Store in session state
-        st.session_state['generated_xml'] = xml_content
-        st.session_state['xml_filename'] = f"{message_type}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xml"
-        
-        st.success("✅ XML generated successfully!")
-
-# Display generated XML
-if 'generated_xml' in st.session_state:
     st.markdown("---")
-    st.subheader("Generated XML")
-    
-    # Show XML in code block
-    st.code(st.session_state['generated_xml'], language='xml')
-    
-    # Download button
-    st.download_button(
-        label="⬇️ Download XML",
-        data=st.session_state['generated_xml'],
-        file_name=st.session_state['xml_filename'],
-        mime="application/xml",
-        use_container_width=True
-    )
-    
-    # Option to save to database (example)
-    if st.button("💾 Save to Database (Demo)", use_container_width=True):
-        from streamlit_app.core import get_db_connection
-        
-        # This is just a demo - you'd need to create the table first
-        try:
-            conn = get_db_connection()
-            cursor = conn.cursor()
-            
-            # Create table if it doesn't exist (add this to init_db.py in production)
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS xml_messages (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    filename TEXT NOT NULL,
-                    content TEXT NOT NULL,
-                    created_by TEXT NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            
-            # Insert the XML message
-            cursor.execute(
-                "INSERT INTO xml_messages (filename, content, created_by) VALUES (?, ?, ?)",
-                (st.session_state['xml_filename'], st.session_state['generated_xml'], 
-                 st.session_state.user['username'])
-            )
-            
-            conn.commit()
-            conn.close()
-            
-            st.success("✅ XML message saved to database!")
-        except Exception as e:
-            st.error(f"❌ Error saving to database: {e}")
-
-# Show saved messages
-with st.expander("📚 View Saved Messages"):
-    from streamlit_app.core import get_db_connection
-    
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT filename, created_by, created_at 
-            FROM xml_messages 
-            ORDER BY created_at DESC 
-            LIMIT 10
-        """)
-        
-        messages = cursor.fetchall()
-        conn.close()
-        
-        if messages:
-            st.write(f"Found {len(messages)} saved message(s):")
-            for msg in messages:
-                st.write(f"- **{msg['filename']}** by {msg['created_by']} at {msg['created_at']}")
+
+    # Idempotency keys of messages this session has already saved or queued
+    st.session_state.setdefault('xml_saved_keys', set())
+    st.session_state.setdefault('xml_queued_keys', set())
+
+    # Input form
+    col1, col2 = st.columns(2)
+
+    with col1:
+        message_type = st.selectbox(
+            "Message Type",
+            ["Order", "Invoice", "Notification", "Report", "Custom"]
+        )
+
+        sender = st.text_input("Sender", value=st.session_state.user['username'])
+
+    with col2:
+        receiver = st.text_input("Receiver", placeholder="Enter receiver name")
+
+        content = st.text_area(
+            "Message Content",
+            placeholder="Enter your message content here...",
+            height=100
+        )
+
+    # Generate button
+    if st.button("🔨 Generate XML", type="primary", use_container_width=True):
+        if not receiver or not content:
+            st.error("Please fill in all required fields (Receiver and Content)")
         else:
-            st.info("No saved messages yet. Generate and save one to get started!")
-    except:
-        st.info("No saved messages table yet. Save a message to create it.")
+            # Generate XML
+            xml_content = generate_sample_xml(message_type, sender, receiver, content)
+
+            # Keep the document in the payload store (large documents spill to disk);
+            # session state only holds the small metadata
+            set_session_payload('generated_xml', xml_content)
+            st.session_state['xml_filename'] = f"{message_type}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xml"
+            st.session_state['xml_message_type'] = message_type
+
+            # Identifies this generated message so repeated saves are ignored
+            st.session_state['xml_idempotency_key'] = uuid.uuid4().hex
+
+            st.success("✅ XML generated successfully!")
+
+    # Display generated XML
+    generated_xml = get_session_payload('generated_xml')
+    if generated_xml is not None:
+        st.markdown("---")
+        st.subheader("Generated XML")
+
+        # Show XML in code block
+        st.code(generated_xml, language='xml')
+
+        # Download button
+        st.download_button(
+            label="⬇️ Download XML",
+            data=generated_xml,
+            file_name=st.session_state['xml_filename'],
+            mime="application/xml",
+            use_container_width=True
+        )
+
+        # Option to save to database (example)
+        if st.button("💾 Save to Database (Demo)", use_container_width=True):
+            idempotency_key = st.session_state['xml_idempotency_key']
+
+            # Repeat clicks on the same message are answered from session state
+            if idempotency_key in st.session_state['xml_saved_keys']:
+                st.info("ℹ️ This message was already saved.")
+            else:
+                try:
+                    saved = save_xml_message(
+                        st.session_state['xml_filename'],
+                        generated_xml,
+                        st.session_state.user['username'],
+                        message_type=st.session_state['xml_message_type'],
+                        idempotency_key=idempotency_key,
+                    )
+                    st.session_state['xml_saved_keys'].add(idempotency_key)
+
+                    if saved:
+                        st.success("✅ XML message saved to database!")
+                    else:
+                        st.info("ℹ️ This message was already saved.")
+                except Exception as e:
+                    st.error(f"❌ Error saving to database: {e}")
+
+        # Queue the message for delivery to the gateway
+        if st.button("📤 Queue for Delivery", use_container_width=True):
+            from streamlit_app.core import enqueue_message
+
+            idempotency_key = st.session_state['xml_idempotency_key']
+            if idempotency_key in st.session_state['xml_queued_keys']:
+                st.info("ℹ️ This message is already queued for delivery.")
+            else:
+                try:
+                    outbox_id = enqueue_message(
+                        st.session_state['xml_filename'],
+                        generated_xml,
+                        st.session_state.user['username'],
+                        idempotency_key=idempotency_key,
+                    )
+                    st.session_state['xml_queued_keys'].add(idempotency_key)
+                    st.success(f"✅ Message queued for delivery (outbox #{outbox_id})")
+                except Exception as e:
+                    st.error(f"❌ Error queuing message: {e}")
+
+    # Show saved messages
+    with st.expander("📚 View Saved Messages"):
+        from streamlit_app.core import get_db_connection, phase
 
-# Render footer
-render_footer()
+        try:
+            with phase("db"):
+                conn = get_db_connection()
+                cursor = conn.cursor()
+
+                cursor.execute("""
+                    SELECT filename, created_by, created_at 
+                    FROM xml_messages 
+                    ORDER BY created_at DESC 
+                    LIMIT 10
+                """)
+
+                messages = cursor.fetchall()
+                conn.close()
+
+            if messages:
+                st.write(f"Found {len(messages)} saved message(s):")
+                for msg in messages:
+                    st.write(f"- **{msg['filename']}** by {msg['created_by']} at {msg['created_at']}")
+            else:
+                st.info("No saved messages yet. Generate and save one to get started!")
+        except:
+            st.info("No saved messages table yet. Save a message to create it.")
+
+    # Show cache effectiveness to admins
+    if has_permission('metrics.view'):
+        with st.expander("⚡ XML Cache Statistics"):
+            stats = get_xml_cache_stats()
+            col1, col2, col3, col4 = st.columns(4)
+            col1.metric("Hit Rate", f"{stats['hit_rate']:.0%}")
+            col2.metric("Hits / Misses", f"{stats['hits']} / {stats['misses']}")
+            col3.metric("Cached Documents", stats['entries'])
+            col4.metric("Cache Size", f"{stats['bytes'] / 1024:.1f} KiB")
+
+    # Render footer
+    render_footer()
+
+
+if __name__ == "__main__":
+    with profiled_page("XML Generator"):
+        main()
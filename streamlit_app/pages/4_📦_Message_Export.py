@@ -0,0 +1,136 @@
+"""
+Message Export Page
+Admin-only page for exporting saved XML messages in bulk.
+"""
+
+import shlex
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+import streamlit as st
+from streamlit_app.core import require_permission, profiled_page
+from streamlit_app.components import render_footer, apply_theme
+from streamlit_app.config.app_config import APP_CONFIG
+
+
+# Page configuration
+st.set_page_config(
+    page_title=f"Message Export - {APP_CONFIG['app_name']}",
+    page_icon="📦",
+    layout="wide",
+)
+
+# Apply custom CSS theme (Portfolio Design)
+apply_theme()
+
+
+def _export_command(export_format: str, extension: str, filters: dict) -> str:
+    """The `app export` command producing the same export."""
+    command = f"app export xml_messages.{extension} --format {export_format}"
+    if filters['start_date']:
+        command += f" --since {filters['start_date'].isoformat()}"
+    if filters['end_date']:
+        command += f" --until {filters['end_date'].isoformat()}"
+    if filters['created_by']:
+        command += f" --created-by {shlex.quote(filters['created_by'])}"
+    if filters['message_type']:
+        command += f" --type {filters['message_type']}"
+    return command
+
+
+def main():
+    """Render the page."""
+    # Require permission to use this page
+    if not require_permission('messages.export'):
+        return
+
+    from streamlit_app.core.export import count_xml_messages, export_messages, get_message_creators
+
+    # Page content
+    st.title("📦 Message Export")
+
+    st.markdown("""
+    Export saved XML messages as a zip archive (one file per message) or as a single
+    concatenated file. Messages are read and compressed in chunks into a file on the
+    server; exports too large to download here are built with `app export` instead.
+    """)
+
+    st.markdown("---")
+
+    col1, col2 = st.columns(2)
+
+    with col1:
+        # created_at is stored in UTC, so the range is in UTC days too
+        today = datetime.now(timezone.utc).date()
+        date_range = st.date_input(
+            "Created between (UTC)",
+            value=(today - timedelta(days=30), today),
+            help="Dates are UTC days, the time zone messages are stored in.",
+        )
+        created_by = st.selectbox("Created by", ["All"] + get_message_creators())
+
+    with col2:
+        message_type = st.selectbox(
+            "Message Type",
+            ["All", "Order", "Invoice", "Notification", "Report", "Custom"]
+        )
+        export_format = st.radio(
+            "Format",
+            ["zip", "concat"],
+            format_func=lambda fmt: "Zip archive" if fmt == "zip" else "Concatenated XML",
+            horizontal=True,
+        )
+
+    # The date input returns a single date while the user is still picking the range
+    if isinstance(date_range, (tuple, list)):
+        start_date = date_range[0] if len(date_range) > 0 else None
+        end_date = date_range[1] if len(date_range) > 1 else None
+    else:
+        start_date, end_date = date_range, None
+
+    filters = {
+        'start_date': start_date,
+        'end_date': end_date,
+        'created_by': None if created_by == "All" else created_by,
+        'message_type': None if message_type == "All" else message_type,
+    }
+
+    st.write(f"Matching messages: **{count_xml_messages(**filters)}**")
+
+    if st.button("📦 Build Export", type="primary", use_container_width=True):
+        # Build the export on disk; it is read into memory only if small enough to download
+        max_bytes = APP_CONFIG.get("export_download_max_bytes", 64 * 1024 * 1024)
+        extension = "zip" if export_format == "zip" else "xml"
+        with st.spinner("Exporting messages..."):
+            with tempfile.TemporaryFile() as export_file:
+                exported = export_messages(export_file, export_format=export_format, **filters)
+                size = export_file.tell()
+                export_data = None
+                if size <= max_bytes:
+                    export_file.seek(0)
+                    export_data = export_file.read()
+
+        if export_data is None:
+            st.warning(
+                f"The export of {exported} message(s) is {size / 1024 / 1024:.0f} MB, more "
+                f"than the {max_bytes / 1024 / 1024:.0f} MB that can be downloaded here. "
+                "Run it on the server instead:"
+            )
+            st.code(_export_command(export_format, extension, filters), language="bash")
+        else:
+            st.success(f"✅ Exported {exported} message(s)")
+            st.download_button(
+                label="⬇️ Download Export",
+                data=export_data,
+                file_name=f"xml_messages_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}",
+                mime="application/zip" if export_format == "zip" else "application/xml",
+                use_container_width=True
+            )
+
+    # Render footer
+    render_footer()
+
+
+if __name__ == "__main__":
+    with profiled_page("Message Export"):
+        main()
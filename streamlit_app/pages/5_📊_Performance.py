@@ -0,0 +1,48 @@
+"""
+Performance Page
+Admin-only live view of latency, caches, queues and sessions in this process.
+"""
+
+import streamlit as st
+from streamlit_app.core import require_permission, profiled_page
+from streamlit_app.components import render_footer, apply_theme, render_perf_dashboard
+from streamlit_app.config.app_config import APP_CONFIG
+
+
+# Page configuration
+st.set_page_config(
+    page_title=f"Performance - {APP_CONFIG['app_name']}",
+    page_icon="📊",
+    layout="wide",
+)
+
+# Apply custom CSS theme (Portfolio Design)
+apply_theme()
+
+
+def main():
+    """Render the page."""
+    # Require permission to use this page
+    if not require_permission('metrics.view'):
+        return
+
+    # Page content
+    st.title("📊 Performance")
+
+    st.markdown(
+        f"Metrics of the worker process serving this session, refreshed every "
+        f"{APP_CONFIG.get('perf_dashboard_refresh_seconds', 5)} seconds. "
+        f"Under `app serve` each worker keeps its own numbers."
+    )
+
+    st.markdown("---")
+
+    render_perf_dashboard()
+
+    # Render footer
+    render_footer()
+
+
+if __name__ == "__main__":
+    with profiled_page("Performance"):
+        main()
@@ -0,0 +1,47 @@
+"""
+Audit Log Page
+Admin-only view of the audit log.
+"""
+
+import streamlit as st
+from streamlit_app.core import require_permission, profiled_page
+from streamlit_app.components import render_footer, apply_theme, render_audit_log
+from streamlit_app.config.app_config import APP_CONFIG
+
+
+# Page configuration
+st.set_page_config(
+    page_title=f"Audit Log - {APP_CONFIG['app_name']}",
+    page_icon="📜",
+    layout="wide",
+)
+
+# Apply custom CSS theme (Portfolio Design)
+apply_theme()
+
+
+def main():
+    """Render the page."""
+    # Require permission to use this page
+    if not require_permission('users.manage'):
+        return
+
+    # Page content
+    st.title("📜 Audit Log")
+
+    st.markdown(
+        "Logins, user and role changes, imports, directory syncs and message "
+        "saves and exports, newest first. Entries cannot be changed or deleted."
+    )
+
+    st.markdown("---")
+
+    render_audit_log()
+
+    # Render footer
+    render_footer()
+
+
+if __name__ == "__main__":
+    with profiled_page("Audit Log"):
+        main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Serve Benchmark Script
+Measures how many new sessions per second `app serve` handles for different worker counts.
+
+Each session opens the Streamlit websocket through the proxy, asks for a
+script run of the login page, and waits for the run to finish, which is what
+a browser does on its first visit. Requires the `websockets` package.
+
+Usage:
+    python -m streamlit_app.scripts.benchmark_serve --workers 1 2 4 --duration 20
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+try:
+    import websockets
+except ImportError:
+    websockets = None
+
+
+def launch(workers: int, port: int) -> subprocess.Popen:
+    """Start `app serve` in a subprocess."""
+    return subprocess.Popen(
+        [sys.executable, "-m", "streamlit_app.cli", "serve",
+         "--workers", str(workers), "--port", str(port), "--address", "127.0.0.1"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+
+
+async def wait_until_ready(port: int, timeout: float = 120.0) -> bool:
+    """Poll the launcher status endpoint until every worker is ready."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(b"GET /_launcher/status HTTP/1.1\r\nHost: 127.0.0.1\r\n\r\n")
+            response = await reader.read()
+            writer.close()
+            if json.loads(response.split(b"\r\n\r\n", 1)[1])["ready"]:
+                return True
+        except (OSError, ValueError, IndexError):
+            pass
+        await asyncio.sleep(0.5)
+    return False
+
+
+async def run_session(port: int) -> float:
+    """
+    Open one new session and wait for its first script run to finish.
+
+    Returns:
+        float: Seconds from connecting to the end of the script run
+    """
+    from streamlit.proto.BackMsg_pb2 import BackMsg
+    from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+    started = time.perf_counter()
+    async with websockets.connect(
+        f"ws://127.0.0.1:{port}/_stcore/stream", subprotocols=["streamlit"],
+        max_size=None,
+    ) as ws:
+        rerun = BackMsg()
+        rerun.rerun_script.query_string = ""
+        await ws.send(rerun.SerializeToString())
+
+        while True:
+            msg = ForwardMsg()
+            msg.ParseFromString(await ws.recv())
+            if msg.WhichOneof("type") == "script_finished":
+                return time.perf_counter() - started
+
+
+async def measure(port: int, concurrency: int, duration: float) -> Dict:
+    """Run sessions from `concurrency` clients for `duration` seconds."""
+    latencies: List[float] = []
+    errors = 0
+    deadline = time.monotonic() + duration
+
+    async def client():
+        nonlocal errors
+        while time.monotonic() < deadline:
+            try:
+                latencies.append(await asyncio.wait_for(run_session(port), 30))
+            except Exception:
+                errors += 1
+
+    started = time.monotonic()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.monotonic() - started
+
+    latencies.sort()
+    return {
+        'sessions': len(latencies),
+        'errors': errors,
+        'per_second': len(latencies) / elapsed,
+        'p50_ms': statistics.median(latencies) * 1000 if latencies else 0.0,
+        'p95_ms': latencies[int(len(latencies) * 0.95)] * 1000 if latencies else 0.0,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Benchmark each worker count and print a table."""
+    parser = argparse.ArgumentParser(description="Benchmark `app serve` session throughput.")
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, 2, os.cpu_count() or 1}),
+                        help="Worker counts to compare")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent clients")
+    parser.add_argument("--duration", type=float, default=15.0, help="Seconds per measurement")
+    parser.add_argument("--port", type=int, default=8601, help="Proxy port to use")
+    args = parser.parse_args(argv)
+
+    if websockets is None:
+        print("❌ The benchmark needs the 'websockets' package: pip install websockets")
+        return 1
+
+    print(f"{'workers':>8} {'sessions':>9} {'errors':>7} {'sessions/s':>11} "
+          f"{'p50 ms':>8} {'p95 ms':>8}")
+    for workers in args.workers:
+        process = launch(workers, args.port)
+        try:
+            if not asyncio.run(wait_until_ready(args.port)):
+                print(f"❌ {workers} worker(s) did not become ready")
+                return 1
+            result = asyncio.run(measure(args.port, args.concurrency, args.duration))
+        finally:
+            process.send_signal(signal.SIGTERM)
+            process.wait()
+
+        print(f"{workers:>8} {result['sessions']:>9} {result['errors']:>7} "
+              f"{result['per_second']:>11.1f} {result['p50_ms']:>8.0f} {result['p95_ms']:>8.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
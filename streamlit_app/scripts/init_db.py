@@ -2,8 +2,13 @@
 """
 Database Initialization Script
 Run this script to initialize the database and create the default admin user.
+
+Usage:
+    init-db
+    init-db --import-csv staff.csv [--workers 8]   # then import users from a CSV file
 """
 
+import argparse
 import sys
 import os
 
@@ -11,14 +16,51 @@ from streamlit_app.core.database import init_database, get_db_connection
 from streamlit_app.core.auth import create_user
 
 
-def main():
+def import_csv(path: str, workers=None) -> bool:
+    """
+    Import users from a CSV file and print a report.
+    
+    Args:
+        path: CSV file with username, password and optional role columns
+        workers: Hashing processes (default: one per CPU)
+        
+    Returns:
+        bool: True if every row was imported
+    """
+    from streamlit_app.core.user_import import import_users_from_csv
+    
+    def show_progress(done, total):
+        print(f"   {done}/{total} rows", end="\r", flush=True)
+    
+    print(f"\nImporting users from {path}...")
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        result = import_users_from_csv(f, workers=workers, progress=show_progress)
+    
+    print(f"\n✅ Imported {result['imported']} of {result['rows']} users in "
+          f"{result['seconds']:.1f} s ({result['rows_per_second']:.0f} rows/s)")
+    for failure in result['failures']:
+        print(f"❌ Line {failure['line']} ({failure['username'] or '-'}): {failure['error']}")
+    return not result['failures']
+
+
+def main(argv=None):
     """Initialize the database and create default admin user."""
+    parser = argparse.ArgumentParser(description="Initialize the database.")
+    parser.add_argument("--import-csv", metavar="PATH", help="Import users from a CSV file")
+    parser.add_argument("--workers", type=int, help="Processes hashing passwords for the import")
+    args = parser.parse_args(argv)
+    
     print("Initializing database...")
     
     # Initialize database tables
     init_database()
     print("✅ Database tables created successfully!")
     
+    if args.import_csv:
+        if not import_csv(args.import_csv, args.workers):
+            sys.exit(1)
+        return
+    
     # Check if admin user already exists
     conn = get_db_connection()
     cursor = conn.cursor()
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Load Test Script
+Drives app.py and the pages headlessly with many concurrent simulated sessions.
+
+Every session logs in, opens the user list and generates an XML message,
+using Streamlit's AppTest so the real page scripts run. AppTest keeps its
+runtime in process-wide globals, so each simulated session runs in its own
+process, which also matches `app serve`, where sessions share the SQLite
+database across worker processes. The report lists
+rerun latency percentiles per step, throughput, and how long writers had
+to wait for the SQLite write lock while the test ran.
+
+By default the test runs against a throwaway database, so it never touches
+data/app.db.
+
+Usage:
+    python -m streamlit_app.scripts.load_test --sessions 16 --iterations 5
+    python -m streamlit_app.scripts.load_test --max-p95-ms 500   # exit 1 when slower
+"""
+
+import argparse
+import multiprocessing
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(PACKAGE_DIR, "app.py")
+USER_MANAGEMENT_PAGE = os.path.join(PACKAGE_DIR, "pages", "1_👤_User_Management.py")
+XML_GENERATOR_PAGE = os.path.join(PACKAGE_DIR, "pages", "3_XML_Generator.py")
+
+LOAD_TEST_USER = "loadtest"
+LOAD_TEST_PASSWORD = "loadtest-password"
+
+# Seconds between two write-lock probes
+LOCK_PROBE_INTERVAL = 0.05
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a sorted list."""
+    if not samples:
+        return 0.0
+    index = max(0, min(len(samples) - 1, int(round(pct / 100 * len(samples))) - 1))
+    return samples[index]
+
+
+class LoadStats:
+    """Rerun timings and errors, per step."""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.scenarios = 0
+
+    def record(self, step: str, seconds: float):
+        self.latencies[step].append(seconds)
+
+    def record_error(self, step: str):
+        self.errors[step] += 1
+
+    def scenario_done(self):
+        self.scenarios += 1
+
+    def merge(self, other: "LoadStats"):
+        """Add the results of another session."""
+        for step, samples in other.latencies.items():
+            self.latencies[step].extend(samples)
+        for step, count in other.errors.items():
+            self.errors[step] += count
+        self.scenarios += other.scenarios
+
+
+class LockProbe(threading.Thread):
+    """Measures how long a new writer waits for the SQLite write lock."""
+
+    def __init__(self, db_path: str):
+        super().__init__(name="lock-probe", daemon=True)
+        self.db_path = db_path
+        self.waits: List[float] = []
+        self.timeouts = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        conn = sqlite3.connect(self.db_path, timeout=5.0, isolation_level=None)
+        try:
+            while not self._stop_event.is_set():
+                started = time.perf_counter()
+                try:
+                    conn.execute("BEGIN IMMEDIATE")
+                    self.waits.append(time.perf_counter() - started)
+                    conn.execute("ROLLBACK")
+                except sqlite3.OperationalError:
+                    self.timeouts += 1
+                self._stop_event.wait(LOCK_PROBE_INTERVAL)
+        finally:
+            conn.close()
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+class RerunFailed(RuntimeError):
+    """A rerun raised; already counted in the stats."""
+
+
+def _timed_run(stats: LoadStats, step: str, app_test, timeout: float):
+    """Run one rerun and record its latency."""
+    started = time.perf_counter()
+    app_test.run(timeout=timeout)
+    stats.record(step, time.perf_counter() - started)
+    if app_test.exception:
+        stats.record_error(step)
+        raise RerunFailed(f"{step}: {app_test.exception[0].message}")
+
+
+def _widget(widgets, label: str):
+    """Find a widget by its label, so the scenario survives layout changes."""
+    for widget in widgets:
+        if widget.label == label:
+            return widget
+    raise RuntimeError(f"No widget labelled {label!r}")
+
+
+def run_scenario(stats: LoadStats, session_no: int, timeout: float):
+    """One simulated user: log in, browse the user list, generate XML."""
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    _timed_run(stats, "open app", app, timeout)
+
+    _widget(app.sidebar.text_input, "Username").input(LOAD_TEST_USER)
+    _widget(app.sidebar.text_input, "Password").input(LOAD_TEST_PASSWORD)
+    _widget(app.sidebar.button, "Login").click()
+    _timed_run(stats, "login", app, timeout)
+    if not app.session_state["authenticated"]:
+        stats.record_error("login")
+        raise RerunFailed("login: not authenticated")
+
+    def open_page(path: str):
+        page = AppTest.from_file(path, default_timeout=timeout)
+        for key in ("authenticated", "user", "login_time"):
+            page.session_state[key] = app.session_state[key]
+        return page
+
+    users = open_page(USER_MANAGEMENT_PAGE)
+    _timed_run(stats, "user list", users, timeout)
+
+    xml = open_page(XML_GENERATOR_PAGE)
+    _timed_run(stats, "open xml page", xml, timeout)
+    _widget(xml.text_input, "Receiver").input(f"receiver-{session_no}")
+    _widget(xml.text_area, "Message Content").input(
+        f"Load test message from session {session_no}"
+    )
+    _widget(xml.button, "🔨 Generate XML").click()
+    _timed_run(stats, "generate xml", xml, timeout)
+
+    stats.scenario_done()
+
+
+def session_process(session_no: int, iterations: int, timeout: float, start_barrier, results):
+    """Run the scenario repeatedly for one simulated session, in its own process."""
+    import streamlit.testing.v1  # noqa: F401 - load Streamlit before the clock starts
+
+    isolate_sessions()
+    start_barrier.wait()
+
+    stats = LoadStats()
+    for _ in range(iterations):
+        try:
+            run_scenario(stats, session_no, timeout)
+        except RerunFailed as e:
+            print(f"Session {session_no}: {e}")
+        except Exception as e:
+            # The scenario itself broke, e.g. a widget it looks for is gone
+            stats.record_error("scenario")
+            print(f"Session {session_no}: {e}")
+    results.put(stats)
+
+
+def isolate_sessions():
+    """
+    Give every simulated session its own payload store entries.
+
+    AppTest runs every script with the same session ID, so without this the
+    sessions would share the values the pages keep in the payload store.
+    """
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    from streamlit_app.core import payload_store
+
+    def get_session_id() -> str:
+        ctx = get_script_run_ctx()
+        return f"load-test-{id(ctx.session_state)}" if ctx else "default"
+
+    payload_store.get_session_id = get_session_id
+
+
+def prepare_database():
+    """Create the schema and the load test user."""
+    from streamlit_app.core.auth import create_user, get_all_users
+    from streamlit_app.core.database import init_database
+
+    init_database()
+    if not any(user["username"] == LOAD_TEST_USER for user in get_all_users()):
+        create_user(LOAD_TEST_USER, LOAD_TEST_PASSWORD, "admin")
+
+
+def print_report(stats: LoadStats, probe: LockProbe, elapsed: float, sessions: int) -> float:
+    """
+    Print the results.
+
+    Returns:
+        float: p95 latency over all reruns, in milliseconds
+    """
+    print(f"\n{'step':<16} {'reruns':>7} {'errors':>7} {'p50 ms':>9} {'p95 ms':>9} "
+          f"{'p99 ms':>9} {'max ms':>9}")
+    everything = []
+    for step, samples in stats.latencies.items():
+        samples.sort()
+        everything.extend(samples)
+        print(f"{step:<16} {len(samples):>7} {stats.errors.get(step, 0):>7} "
+              f"{percentile(samples, 50) * 1000:>9.1f} {percentile(samples, 95) * 1000:>9.1f} "
+              f"{percentile(samples, 99) * 1000:>9.1f} {samples[-1] * 1000:>9.1f}")
+
+    everything.sort()
+    p95_ms = percentile(everything, 95) * 1000
+    print(f"{'all':<16} {len(everything):>7} {sum(stats.errors.values()):>7} "
+          f"{percentile(everything, 50) * 1000:>9.1f} {p95_ms:>9.1f} "
+          f"{percentile(everything, 99) * 1000:>9.1f} "
+          f"{(everything[-1] if everything else 0) * 1000:>9.1f}")
+
+    print(f"\nSessions: {sessions}, elapsed {elapsed:.1f} s")
+    print(f"Throughput: {len(everything) / elapsed:.1f} reruns/s, "
+          f"{stats.scenarios / elapsed:.2f} scenarios/s")
+
+    waits = sorted(probe.waits)
+    contended = [w for w in waits if w > 0.001]
+    print(f"DB write lock: {len(waits)} probes, {len(contended)} waited > 1 ms, "
+          f"p95 {percentile(waits, 95) * 1000:.1f} ms, "
+          f"max {(waits[-1] if waits else 0) * 1000:.1f} ms, {probe.timeouts} timed out")
+    return p95_ms
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the load test and print the report."""
+    parser = argparse.ArgumentParser(description="Load test the app with simulated sessions.")
+    parser.add_argument("--sessions", type=int, default=8, help="Concurrent sessions")
+    parser.add_argument("--iterations", type=int, default=3, help="Scenarios per session")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Seconds allowed per rerun")
+    parser.add_argument(
+        "--db-path", help="Database to use (default: a throwaway database in a temp directory)"
+    )
+    parser.add_argument(
+        "--max-p95-ms", type=float, help="Exit non-zero when the overall p95 latency is higher"
+    )
+    args = parser.parse_args(argv)
+
+    # Must be set before the app's configuration is first read
+    temp_dir = None
+    if args.db_path is None:
+        temp_dir = tempfile.TemporaryDirectory(prefix="app_load_test_")
+        args.db_path = os.path.join(temp_dir.name, "load_test.db")
+    os.environ["APP_CONFIG_DB_PATH"] = args.db_path
+    # Every simulated session logs in as the same user from the same address
+    os.environ.setdefault("APP_CONFIG_LOGIN_RATE_LIMIT_PER_USER", "1000000")
+    os.environ.setdefault("APP_CONFIG_LOGIN_RATE_LIMIT_PER_CLIENT", "1000000")
+    project_dir = os.path.dirname(PACKAGE_DIR)
+    if project_dir not in sys.path:
+        sys.path.insert(0, project_dir)
+
+    # The configuration is already loaded when called from a test
+    from streamlit_app.config.app_config import reload_config
+
+    reload_config()
+    prepare_database()
+
+    print(f"Running {args.sessions} sessions x {args.iterations} scenarios "
+          f"against {args.db_path}...")
+    context = multiprocessing.get_context("spawn")
+    start_barrier = context.Barrier(args.sessions + 1)
+    results = context.Queue()
+    processes = [
+        context.Process(
+            target=session_process,
+            args=(i, args.iterations, args.timeout, start_barrier, results),
+        )
+        for i in range(args.sessions)
+    ]
+    for process in processes:
+        process.start()
+
+    # Time only the scenarios, not process start-up
+    start_barrier.wait()
+    probe = LockProbe(args.db_path)
+    probe.start()
+    started = time.perf_counter()
+
+    stats = LoadStats()
+    for _ in processes:
+        stats.merge(results.get())
+    elapsed = time.perf_counter() - started
+    probe.stop()
+    for process in processes:
+        process.join()
+
+    p95_ms = print_report(stats, probe, elapsed, args.sessions)
+    if temp_dir is not None:
+        temp_dir.cleanup()
+
+    if args.max_p95_ms is not None and p95_ms > args.max_p95_ms:
+        print(f"❌ p95 latency {p95_ms:.1f} ms exceeds {args.max_p95_ms:.0f} ms")
+        return 1
+    if sum(stats.errors.values()):
+        print("❌ Some reruns failed")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
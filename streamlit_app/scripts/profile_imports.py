@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Import Profiling Script
+Reports the import tree of the app's modules with timings, using python -X importtime.
+
+Streamlit itself is imported first and left out of the report, because the
+server has already loaded it by the time a page script runs.
+
+Usage:
+    app --profile-imports
+    app --profile-imports --import-budget-ms 50
+"""
+
+import argparse
+import re
+import subprocess
+import sys
+from typing import Dict, List, Optional
+
+
+# Modules a page script imports before its auth check
+DEFAULT_MODULES = [
+    "streamlit_app.config.app_config",
+    "streamlit_app.core",
+    "streamlit_app.components",
+    "streamlit_app.core.auth",
+    "streamlit_app.core.session",
+]
+
+# Default cold start budget for DEFAULT_MODULES, in milliseconds
+DEFAULT_BUDGET_MS = 50.0
+
+_LINE_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def collect_import_tree(modules: List[str]) -> List[Dict]:
+    """
+    Import modules in a fresh interpreter and parse the importtime report.
+
+    Args:
+        modules: Modules to import
+
+    Returns:
+        list: Top-level import nodes, each a dict with name, self_us,
+        cumulative_us and children
+    """
+    code = "import streamlit\n" + "".join(f"import {module}\n" for module in modules)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, check=False,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {', '.join(modules)} failed:\n{result.stderr}")
+
+    # Skip everything reported before the app's own modules start loading
+    lines = result.stderr.splitlines()
+    streamlit_done = max(
+        (i for i, line in enumerate(lines) if line.endswith("| streamlit")), default=-1
+    )
+
+    # importtime lists children before their parent, one level of indentation deeper
+    pending: Dict[int, List[Dict]] = {}
+    roots = []
+    for line in lines[streamlit_done + 1:]:
+        match = _LINE_RE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        level = (len(indent) - 1) // 2
+        node = {
+            'name': name,
+            'self_us': int(self_us),
+            'cumulative_us': int(cumulative_us),
+            'children': pending.pop(level + 1, []),
+        }
+        if level == 0:
+            roots.append(node)
+        else:
+            pending.setdefault(level, []).append(node)
+
+    return roots
+
+
+def print_tree(nodes: List[Dict], min_us: int = 0, depth: int = 0):
+    """
+    Print an import tree, slowest imports first.
+
+    Args:
+        nodes: Nodes from collect_import_tree()
+        min_us: Hide imports faster than this (microseconds)
+        depth: Current indentation level
+    """
+    for node in sorted(nodes, key=lambda n: n['cumulative_us'], reverse=True):
+        if node['cumulative_us'] < min_us:
+            continue
+        print(
+            f"{node['cumulative_us'] / 1000:9.2f} ms {node['self_us'] / 1000:9.2f} ms  "
+            f"{'  ' * depth}{node['name']}"
+        )
+        print_tree(node['children'], min_us, depth + 1)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Print the import tree and check it against the budget."""
+    parser = argparse.ArgumentParser(description="Profile the app's import time.")
+    parser.add_argument(
+        "--module", action="append", dest="modules",
+        help="Module to profile (repeatable; defaults to the modules pages import before auth)"
+    )
+    parser.add_argument(
+        "--import-budget-ms", type=float, default=DEFAULT_BUDGET_MS,
+        help="Fail when the total import time exceeds this many milliseconds"
+    )
+    parser.add_argument(
+        "--min-us", type=int, default=100,
+        help="Hide imports faster than this many microseconds"
+    )
+    args = parser.parse_args(argv)
+
+    roots = collect_import_tree(args.modules or DEFAULT_MODULES)
+    total_ms = sum(node['cumulative_us'] for node in roots) / 1000
+
+    print(f"{'cumulative':>12} {'self':>12}  module")
+    print_tree(roots, args.min_us)
+    print(f"\nTotal import time: {total_ms:.2f} ms (budget {args.import_budget_ms:.0f} ms)")
+
+    if total_ms > args.import_budget_ms:
+        print("❌ Cold start import budget exceeded.")
+        return 1
+    print("✅ Within budget.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,172 @@
+"""
+Worker Entry Point
+Warms up a process before it starts serving the Streamlit app.
+
+The first user after a deploy would otherwise pay for module imports, the
+database check, loading bcrypt, a cold SQLite cache and the first build of
+each XML template. The warmup does that work first and only then starts
+Streamlit, so the port stays closed until the worker is warm.
+
+Usage:
+    python -m streamlit_app.worker --server.port 8502 [other streamlit run options]
+"""
+
+import ast
+import glob
+import importlib
+import importlib.util
+import os
+import sys
+import time
+from typing import Callable, List, Optional, Tuple
+
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_PATH = os.path.join(PACKAGE_DIR, "app.py")
+
+# Libraries the pages load on first use, imported when installed
+WARM_LIBRARIES = ("bcrypt", "pandas", "pyarrow")
+
+# Gauge of the seconds each warmup step took, exported with the other metrics
+# and shown on the Performance page
+WARMUP_METRIC = "worker_warmup_seconds"
+
+
+def get_page_scripts() -> List[str]:
+    """Get the entry script and every page script."""
+    return [APP_PATH] + sorted(glob.glob(os.path.join(PACKAGE_DIR, "pages", "*.py")))
+
+
+def _imported_modules(tree: ast.AST) -> List[Tuple[str, Tuple[str, ...]]]:
+    """List (module, names) for every absolute import in a parsed script."""
+    imports = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            imports.extend((alias.name, ()) for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            imports.append((node.module, tuple(alias.name for alias in node.names)))
+    return imports
+
+
+def import_pages() -> str:
+    """
+    Compile every page script and import everything the pages import,
+    including imports placed after a page's auth check.
+    """
+    modules = set()
+    for path in get_page_scripts():
+        with open(path, encoding="utf-8") as f:
+            source = f.read()
+        tree = ast.parse(source, path)
+        compile(tree, path, "exec")
+
+        for module_name, names in _imported_modules(tree):
+            module = importlib.import_module(module_name)
+            for name in names:
+                # Resolves lazy package exports such as streamlit_app.core.*
+                getattr(module, name, None)
+            modules.add(module_name)
+
+    return f"{len(get_page_scripts())} scripts, {len(modules)} modules"
+
+
+def import_libraries() -> str:
+    """Import the optional libraries the pages load lazily."""
+    loaded = [name for name in WARM_LIBRARIES if importlib.util.find_spec(name)]
+    for name in loaded:
+        importlib.import_module(name)
+    return ", ".join(loaded)
+
+
+def warm_database() -> str:
+    """Open the connection pool and read the database into the page cache."""
+    from streamlit_app.core.database import warm_connection_pool
+
+    return f"{warm_connection_pool()} pooled connections"
+
+
+def analyze_database() -> str:
+    """Refresh the query planner statistics."""
+    from streamlit_app.core.database import analyze_database as analyze
+
+    analyze()
+    return "ANALYZE"
+
+
+def load_users() -> str:
+    """Load the process-wide user cache."""
+    from streamlit_app.core.auth import load_user_cache
+
+    return f"{load_user_cache()} users"
+
+
+def compile_templates() -> str:
+    """Build each XML template once."""
+    from streamlit_app.core.xml_messages import warm_xml_templates
+
+    warm_xml_templates()
+    return "sample, acmt.007"
+
+
+WARMUP_STEPS: List[Tuple[str, Callable[[], str]]] = [
+    ("imports", import_pages),
+    ("libraries", import_libraries),
+    ("database", warm_database),
+    ("analyze", analyze_database),
+    ("user cache", load_users),
+    ("xml templates", compile_templates),
+]
+
+
+def warm_up() -> float:
+    """
+    Run every warmup step and print how long each one took.
+
+    Returns:
+        float: Total warmup time in seconds
+    """
+    from streamlit_app.core import metrics
+
+    warmup_seconds = metrics.gauge(
+        WARMUP_METRIC, "Seconds each warmup step took before the worker opened its port",
+        ["step"]
+    )
+    started = time.perf_counter()
+    for name, step in WARMUP_STEPS:
+        step_started = time.perf_counter()
+        detail = step()
+        seconds = time.perf_counter() - step_started
+        warmup_seconds.set(seconds, step=name)
+        print(f"  warmup {name:<14} {seconds * 1000:8.1f} ms  {detail}")
+
+    total = time.perf_counter() - started
+    warmup_seconds.set(total, step="total")
+    print(f"Worker {os.getpid()} warm in {total * 1000:.0f} ms")
+    return total
+
+
+def main(argv: Optional[List[str]] = None):
+    """Warm up, then run the app with the given `streamlit run` options."""
+    argv = list(sys.argv[1:] if argv is None else argv)
+
+    # Pages import streamlit_app as a package, as under `streamlit run`
+    project_dir = os.path.dirname(PACKAGE_DIR)
+    if project_dir not in sys.path:
+        sys.path.insert(0, project_dir)
+
+    warm_up()
+
+    from streamlit_app.core import metrics
+    from streamlit_app.core.maintenance import start_maintenance_scheduler
+
+    metrics.start_exporters()
+    start_maintenance_scheduler()
+
+    from streamlit.web import cli as streamlit_cli
+
+    sys.argv = ["streamlit", "run", APP_PATH] + argv
+    streamlit_cli.main()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,13 @@
+"""
+Test setup: the whole test session uses a fresh database in a temporary
+directory, configured through the environment before the app is imported.
+"""
+
+import os
+import tempfile
+
+_DATA_DIR = tempfile.mkdtemp(prefix="streamlit_app_tests_")
+os.environ["APP_CONFIG_DB_PATH"] = os.path.join(_DATA_DIR, "app.db")
+os.environ["APP_CONFIG_OUTBOX_DIR"] = os.path.join(_DATA_DIR, "outbox")
+# Ignore a streamlit_app.toml in the working directory
+os.environ["APP_CONFIG_FILE"] = os.path.join(_DATA_DIR, "streamlit_app.toml")
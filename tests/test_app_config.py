@@ -0,0 +1,40 @@
+"""
+Tests for environment variable overrides of the configuration.
+"""
+
+import pytest
+
+from streamlit_app.config import app_config
+
+
+def test_every_none_default_has_a_type():
+    untyped = [key for key, value in app_config.DEFAULTS.items()
+               if value is None and key not in app_config.TYPES]
+    assert untyped == []
+
+
+@pytest.mark.parametrize("key, raw, expected", [
+    ("serve_workers", "2", 2),
+    ("metrics_port", "9100", 9100),
+    ("serve_workers", "", None),
+    ("backup_dir", "/srv/backups", "/srv/backups"),
+    ("maintenance_enabled", "off", False),
+    ("db_slow_query_ms", "250", 250),
+    ("audit_flush_interval_seconds", "0.5", 0.5),
+])
+def test_env_values_are_parsed_as_the_setting_type(monkeypatch, key, raw, expected):
+    monkeypatch.setenv(app_config.ENV_PREFIX + key.upper(), raw)
+    assert app_config.load_config()[key] == expected
+
+
+def test_invalid_env_values_are_ignored_with_a_message(monkeypatch, capsys):
+    monkeypatch.setenv("APP_CONFIG_SERVE_WORKERS", "many")
+    monkeypatch.setenv("APP_CONFIG_MAINTENANCE_ENABLED", "maybe")
+
+    config = app_config.load_config()
+
+    assert config["serve_workers"] == app_config.DEFAULTS["serve_workers"]
+    assert config["maintenance_enabled"] == app_config.DEFAULTS["maintenance_enabled"]
+    output = capsys.readouterr().out
+    assert "Ignoring APP_CONFIG_SERVE_WORKERS='many': expected an integer" in output
+    assert "APP_CONFIG_MAINTENANCE_ENABLED" in output
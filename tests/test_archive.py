@@ -0,0 +1,69 @@
+"""
+Round trip through the archive: old messages are archived, then counted,
+read and exported together with the recent ones.
+"""
+
+import io
+import os
+import zipfile
+
+import pytest
+
+from streamlit_app.core import archive, export
+from streamlit_app.core.database import pooled_connection
+
+
+@pytest.fixture(autouse=True)
+def messages():
+    """Three messages from 2020 and one from now."""
+    with pooled_connection() as conn:
+        conn.execute("DELETE FROM xml_messages")
+        conn.executemany(
+            "INSERT INTO xml_messages (filename, content, created_by, created_at, message_type) "
+            "VALUES (?, ?, 'alice', ?, 'sample')",
+            [("old_1.xml", "<a>1</a>", "2020-01-10 08:00:00"),
+             ("old_2.xml", "<a>2</a>", "2020-01-20 08:00:00"),
+             ("old_3.xml", "<a>3</a>", "2020-02-10 08:00:00")]
+        )
+        conn.execute(
+            "INSERT INTO xml_messages (filename, content, created_by, message_type) "
+            "VALUES ('new.xml', '<a>4</a>', 'bob', 'sample')"
+        )
+    yield
+    for _, path in archive.list_archives():
+        os.unlink(path)
+
+
+def test_archive_query_export_round_trip():
+    result = archive.archive_messages(older_than_days=30)
+    assert result['archived'] == 3
+    assert [month.strftime('%Y-%m') for month, _ in archive.list_archives()] == [
+        '2020-01', '2020-02'
+    ]
+    with pooled_connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM xml_messages").fetchone()[0] == 1
+
+    assert export._count_xml_messages() == 4
+    assert export._get_message_creators() == ('alice', 'bob')
+    assert [m['filename'] for m in export.iter_xml_messages()] == [
+        "old_1.xml", "old_2.xml", "old_3.xml", "new.xml"
+    ]
+
+    buffer = io.BytesIO()
+    assert export.export_messages(buffer, 'zip') == 4
+    with zipfile.ZipFile(buffer) as exported:
+        contents = sorted(exported.read(name) for name in exported.namelist())
+    assert contents == [b"<a>1</a>", b"<a>2</a>", b"<a>3</a>", b"<a>4</a>"]
+
+
+def test_stopping_a_read_early_detaches_the_archive():
+    archive.archive_messages(older_than_days=30)
+
+    messages = export.iter_xml_messages(chunk_size=1)
+    assert next(messages)['filename'] == "old_1.xml"
+    # Closing with the archive attached and its cursor open must not fail
+    messages.close()
+
+    # The archive is free again for the next run
+    assert archive.archive_messages(older_than_days=30)['archived'] == 0
+    assert export._count_xml_messages() == 4
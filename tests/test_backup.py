@@ -0,0 +1,66 @@
+"""
+Tests for backups: create, verify and restore, and backup names.
+"""
+
+import gzip
+import os
+
+import pytest
+
+from streamlit_app.core import backup
+from streamlit_app.core.database import pooled_connection
+
+
+@pytest.fixture(autouse=True)
+def no_backups():
+    yield
+    for entry in backup.list_backups():
+        os.unlink(entry['path'])
+
+
+def _usernames():
+    with pooled_connection() as conn:
+        return {row['username'] for row in conn.execute("SELECT username FROM users")}
+
+
+def test_create_verify_restore():
+    with pooled_connection() as conn:
+        conn.execute(
+            "INSERT INTO users (username, password_hash, role) VALUES ('kept', '!', 'user')"
+        )
+    created = backup.create_backup(step_sleep_seconds=0)
+    assert backup.verify_backup(created['path']) == created['tables']
+
+    with pooled_connection() as conn:
+        conn.execute("DELETE FROM users WHERE username = 'kept'")
+        conn.execute(
+            "INSERT INTO users (username, password_hash, role) VALUES ('dropped', '!', 'user')"
+        )
+
+    result = backup.restore_backup(created['path'])
+    assert 'kept' in _usernames() and 'dropped' not in _usernames()
+    # The database as it was before the restore was kept as well
+    assert result['safety_backup'] != created['path']
+    assert {entry['path'] for entry in backup.list_backups()} == {
+        created['path'], result['safety_backup']
+    }
+
+    with pooled_connection() as conn:
+        conn.execute("DELETE FROM users WHERE username = 'kept'")
+
+
+def test_backups_in_the_same_second_get_their_own_names():
+    paths = {backup.create_backup(step_sleep_seconds=0, prune=False)['path'] for _ in range(3)}
+    assert len(paths) == 3
+    assert [entry['path'] for entry in backup.list_backups()] == sorted(paths, reverse=True)
+
+
+def test_older_names_are_listed():
+    directory = backup.get_backup_dir()
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, "app-20200101-020000.db.gz")
+    with gzip.open(path, "wb"):
+        pass
+    assert [entry['created_at'].year for entry in backup.list_backups()] == [2020]
+    with pytest.raises(backup.BackupError):
+        backup.verify_backup(path)
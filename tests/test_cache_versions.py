@@ -0,0 +1,43 @@
+"""
+Tests for cache versions: writes by other connections are seen, and a page
+run checks the versions only once.
+"""
+
+from streamlit_app.core import cache_versions
+from streamlit_app.core.database import get_db_connection
+
+
+def _write_users_elsewhere():
+    conn = get_db_connection()
+    try:
+        conn.execute(
+            "INSERT INTO users (username, password_hash, role) VALUES ('versions', '!', 'user')"
+        )
+        conn.execute("DELETE FROM users WHERE username = 'versions'")
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def test_write_by_another_connection_bumps_the_version():
+    before = cache_versions.get_version('users')
+    _write_users_elsewhere()
+    assert cache_versions.get_version('users') > before
+
+
+def test_page_run_reads_one_snapshot(monkeypatch):
+    polls = []
+    poll = cache_versions._poll_versions
+    monkeypatch.setattr(cache_versions, "_poll_versions", lambda: polls.append(1) or poll())
+
+    with cache_versions.run_snapshot():
+        seen = cache_versions.get_version('users')
+        _write_users_elsewhere()
+        assert cache_versions.get_version('users') == seen
+        assert cache_versions.get_version('permissions') is not None
+        assert len(polls) == 1
+
+        cache_versions.run_cache()['derived'] = 1
+    assert cache_versions.run_cache() is None
+    # The next run sees the write
+    assert cache_versions.get_version('users') > seen
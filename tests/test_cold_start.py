@@ -0,0 +1,27 @@
+"""
+Cold start regression test: importing what a page needs before its auth
+check must stay within the import budget (see scripts/profile_imports.py).
+"""
+
+import os
+
+from streamlit_app.scripts import profile_imports
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Slower machines (e.g. shared CI runners) can raise the budget
+BUDGET_MS = float(os.environ.get("COLD_START_BUDGET_MS", profile_imports.DEFAULT_BUDGET_MS))
+
+
+def test_cold_start_within_budget(monkeypatch):
+    monkeypatch.setenv("PYTHONPATH", REPO_ROOT)
+    # Best of three fresh interpreters, so one noisy run does not fail the test
+    totals_ms = []
+    for _ in range(3):
+        roots = profile_imports.collect_import_tree(profile_imports.DEFAULT_MODULES)
+        totals_ms.append(sum(node['cumulative_us'] for node in roots) / 1000)
+
+    assert min(totals_ms) <= BUDGET_MS, (
+        f"Cold start imports take {min(totals_ms):.1f} ms, over the {BUDGET_MS:.0f} ms budget; "
+        "see `app --profile-imports` for the slowest modules"
+    )
@@ -0,0 +1,98 @@
+"""
+Tests for the directory sync: the merge diff, applying it to the users
+table, the delete guard and the export watermark.
+"""
+
+import pytest
+
+from streamlit_app.core import directory_sync
+from streamlit_app.core.database import pooled_connection
+
+
+@pytest.fixture(autouse=True)
+def clean_users():
+    def clean():
+        with pooled_connection() as conn:
+            conn.execute("DELETE FROM users WHERE username LIKE 'dir_%'")
+            conn.execute("DELETE FROM sync_state")
+
+    clean()
+    yield
+    clean()
+
+
+def _export(tmp_path, *rows, name="export.csv"):
+    path = tmp_path / name
+    path.write_text("username,role\n" + "".join(f"{user},{role}\n" for user, role in rows))
+    return str(path)
+
+
+def _directory_users():
+    with pooled_connection() as conn:
+        return dict(conn.execute(
+            "SELECT username, role FROM users WHERE source = 'directory' ORDER BY username"
+        ).fetchall())
+
+
+def test_diff_users_merges_sorted_sequences():
+    changes = directory_sync.diff_users(
+        [("amy", "user"), ("ben", "admin"), ("dan", "user")],
+        iter([(1, "ben", "user"), (2, "cat", "user"), (3, "dan", "user")]),
+    )
+    assert changes == {
+        'inserts': [("amy", "user")],
+        'role_changes': [(1, "ben", "admin")],
+        'deletes': [(2, "cat")],
+    }
+
+
+def test_sync_inserts_changes_roles_deletes_and_reports_conflicts(tmp_path):
+    with pooled_connection() as conn:
+        conn.execute(
+            "INSERT INTO users (username, password_hash, role) VALUES ('dir_local', '!', 'user')"
+        )
+    first = directory_sync.sync_users(_export(
+        tmp_path, ("dir_a", "user"), ("dir_b", "user"), ("dir_c", "user"), ("dir_local", "admin")
+    ))
+    assert first['applied'] and first['inserted'] == 3
+    # A local user of the same name is left alone
+    assert first['conflicts'] == ["dir_local"]
+    assert _directory_users() == {"dir_a": "user", "dir_b": "user", "dir_c": "user"}
+
+    second = directory_sync.sync_users(_export(
+        tmp_path, ("dir_a", "admin"), ("dir_b", "user"), ("dir_d", "user"), name="next.csv"
+    ))
+    assert (second['inserted'], second['role_changed'], second['deleted']) == (1, 1, 1)
+    assert _directory_users() == {"dir_a": "admin", "dir_b": "user", "dir_d": "user"}
+    assert directory_sync.get_sync_state()['stats'] == {
+        'inserted': 1, 'role_changed': 1, 'deleted': 1, 'conflicts': 0
+    }
+
+
+def test_sync_refuses_to_delete_most_users_unless_forced(tmp_path):
+    users = [(f"dir_{i}", "user") for i in range(4)]
+    directory_sync.sync_users(_export(tmp_path, *users))
+
+    shrunk = _export(tmp_path, users[0], name="shrunk.csv")
+    refused = directory_sync.sync_users(shrunk)
+    assert not refused['applied'] and "would delete 3 of 4" in refused['error']
+    assert len(_directory_users()) == 4
+
+    forced = directory_sync.sync_users(shrunk, force=True)
+    assert forced['applied'] and forced['deleted'] == 3
+    assert list(_directory_users()) == ["dir_0"]
+
+
+def test_unchanged_export_is_skipped_by_its_watermark(tmp_path):
+    path = _export(tmp_path, ("dir_a", "user"))
+    assert directory_sync.sync_users(path)['applied']
+
+    # Changes made since are not looked at: the export itself did not change
+    with pooled_connection() as conn:
+        conn.execute("UPDATE users SET role = 'admin' WHERE username = 'dir_a'")
+    skipped = directory_sync.sync_users(path)
+    assert skipped['skipped'] and not skipped['applied']
+    assert _directory_users() == {"dir_a": "admin"}
+
+    assert directory_sync.sync_users(path, force=True)['role_changed'] == 1
+    assert _directory_users() == {"dir_a": "user"}
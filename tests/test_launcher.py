@@ -0,0 +1,155 @@
+"""
+Tests for the launcher: rolling restarts with fake worker processes, and
+the proxy in front of a fake worker.
+"""
+
+import asyncio
+
+from streamlit_app import launcher
+
+
+class FakeProcess:
+    """Stops at terminate(); comes back ready unless `comes_back` is False."""
+
+    pid = 1
+
+    def __init__(self, worker, comes_back: bool = True):
+        self.worker = worker
+        self.comes_back = comes_back
+
+    def terminate(self):
+        self.worker.ready.clear()
+        if self.comes_back:
+            asyncio.get_running_loop().call_later(0.05, self.worker.ready.set)
+
+
+def _launcher(*comes_back):
+    app = launcher.Launcher(len(comes_back), port=18500)
+    for worker, back in zip(app.workers, comes_back):
+        worker.process = FakeProcess(worker, back)
+        worker.ready.set()
+    return app
+
+
+def test_rolling_restart_restarts_every_worker():
+    async def scenario():
+        app = _launcher(True, True)
+        assert await app.rolling_restart()
+        return app
+
+    app = asyncio.run(scenario())
+    assert [worker.restarts for worker in app.workers] == [1, 1]
+    assert all(worker.available for worker in app.workers)
+
+
+def test_rolling_restart_stops_at_a_worker_that_stays_down(monkeypatch):
+    # wait_for() allows HEALTH_TIMEOUT_SECONDS + 5
+    monkeypatch.setattr(launcher, "HEALTH_TIMEOUT_SECONDS", -4.8)
+
+    async def scenario():
+        app = _launcher(False, True, True)
+        assert not await app.rolling_restart()
+        return app
+
+    app = asyncio.run(scenario())
+    # No worker is left draining, so each can be routed to once it is ready
+    assert not any(worker.draining for worker in app.workers)
+    assert [worker.restarts for worker in app.workers] == [0, 0, 0]
+    assert [worker.available for worker in app.workers] == [False, True, True]
+
+
+async def _proxy_to_fake_worker(requests: bytes, response: bytes) -> bytes:
+    """
+    Send raw requests through the proxy to a worker that answers the first
+    one with `response`; return what the worker received.
+    """
+    received = asyncio.get_running_loop().create_future()
+
+    async def fake_worker(reader, writer):
+        head = await reader.readuntil(b"\r\n\r\n")
+        writer.write(response)
+        await writer.drain()
+        received.set_result(head + await reader.read())
+        writer.close()
+
+    upstream = await asyncio.start_server(fake_worker, "127.0.0.1", 0)
+    app = launcher.Launcher(1, port=0)
+    app.workers[0].port = upstream.sockets[0].getsockname()[1]
+    app.workers[0].ready.set()
+    proxy = await asyncio.start_server(app._handle_client, "127.0.0.1", 0)
+
+    reader, writer = await asyncio.open_connection(
+        "127.0.0.1", proxy.sockets[0].getsockname()[1]
+    )
+    writer.write(requests)
+    await writer.drain()
+    writer.write_eof()
+    data = await asyncio.wait_for(received, 5)
+    writer.close()
+    proxy.close()
+    upstream.close()
+    return data
+
+
+OK = b"HTTP/1.1 200 OK\r\nContent-Length: 0\r\n\r\n"
+UPGRADE = b"GET /_stcore/stream HTTP/1.1\r\nConnection: Upgrade\r\nUpgrade: websocket\r\n"
+SPOOFED = b"GET /again HTTP/1.1\r\nUpgrade: websocket\r\nX-Forwarded-For: 6.6.6.6\r\n\r\n"
+
+
+def _heads(data: bytes):
+    return [block for block in data.split(b"\r\n\r\n") if block.startswith((b"GET", b"POST"))]
+
+
+def _forwarded(head: bytes):
+    return [line for line in head.split(b"\r\n") if line.lower().startswith(b"x-forwarded-for")]
+
+
+def test_every_request_on_a_connection_gets_the_client_address():
+    body = b"X-Forwarded-For: 7.7.7.7\r\n\r\n"
+    requests = (
+        b"GET / HTTP/1.1\r\nHost: app\r\n\r\n"
+        b"POST /upload HTTP/1.1\r\nHost: app\r\nContent-Length: "
+        + str(len(body)).encode() + b"\r\n\r\n" + body
+        + b"POST /chunked HTTP/1.1\r\nHost: app\r\nTransfer-Encoding: chunked\r\n\r\n"
+        b"5\r\nhello\r\n0\r\n\r\n"
+        # A keep-alive request choosing its own address, and trying to upgrade
+        + UPGRADE + b"X-Forwarded-For: 6.6.6.6\r\nX-Forwarded-For: 5.5.5.5\r\n\r\n"
+        b"GET /last HTTP/1.1\r\nX-Forwarded-For: 4.4.4.4\r\n\r\n"
+    )
+    heads = _heads(asyncio.run(_proxy_to_fake_worker(requests, OK)))
+
+    assert [head.split(b" ")[1] for head in heads] == [
+        b"/", b"/upload", b"/chunked", b"/_stcore/stream", b"/last"
+    ]
+    assert [_forwarded(head) for head in heads] == [
+        [b"X-Forwarded-For: 127.0.0.1"],
+        [b"X-Forwarded-For: 127.0.0.1"],
+        [b"X-Forwarded-For: 127.0.0.1"],
+        [b"X-Forwarded-For: 6.6.6.6, 5.5.5.5, 127.0.0.1"],
+        [b"X-Forwarded-For: 4.4.4.4, 127.0.0.1"],
+    ]
+    # Only a connection's first request may upgrade it
+    assert b"Upgrade: websocket" not in heads[3]
+
+
+def test_bodies_are_passed_through_untouched():
+    body = b"GET /not-a-head HTTP/1.1\r\nX-Forwarded-For: 7.7.7.7\r\n\r\n"
+    requests = (
+        b"POST / HTTP/1.1\r\nContent-Length: " + str(len(body)).encode() + b"\r\n\r\n" + body
+        + b"POST / HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n5\r\nhello\r\n0\r\n\r\n"
+    )
+    data = asyncio.run(_proxy_to_fake_worker(requests, OK))
+    assert body in data and b"5\r\nhello\r\n0\r\n\r\n" in data
+
+
+def test_websocket_bytes_are_not_rewritten():
+    switching = b"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\n\r\n"
+    data = asyncio.run(_proxy_to_fake_worker(UPGRADE + b"\r\n" + SPOOFED, switching))
+    assert data.endswith(SPOOFED)
+
+
+def test_a_refused_upgrade_keeps_rewriting_requests():
+    refused = b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\n\r\n"
+    heads = _heads(asyncio.run(_proxy_to_fake_worker(UPGRADE + b"\r\n" + SPOOFED, refused)))
+    assert _forwarded(heads[1]) == [b"X-Forwarded-For: 6.6.6.6, 127.0.0.1"]
+    assert b"Upgrade" not in heads[1]
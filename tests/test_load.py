@@ -0,0 +1,19 @@
+"""
+Capacity smoke test: a short run of the load test harness must finish
+without a failed rerun (scripts/load_test.py).
+"""
+
+from streamlit_app.config.app_config import reload_config
+from streamlit_app.scripts import load_test
+
+
+def test_load_test_runs_clean(monkeypatch):
+    # main() points the app at a throwaway database; restore the test database afterwards
+    for name in ("APP_CONFIG_DB_PATH", "APP_CONFIG_LOGIN_RATE_LIMIT_PER_USER",
+                 "APP_CONFIG_LOGIN_RATE_LIMIT_PER_CLIENT"):
+        monkeypatch.delenv(name, raising=False)
+    try:
+        assert load_test.main(["--sessions", "2", "--iterations", "1"]) == 0
+    finally:
+        monkeypatch.undo()
+        reload_config()
@@ -0,0 +1,56 @@
+"""
+Tests for database maintenance: task results and how runs are recorded.
+"""
+
+import sqlite3
+
+import pytest
+
+from streamlit_app.core import maintenance
+
+
+def _malformed(conn, deadline):
+    raise sqlite3.DatabaseError("database disk image is malformed")
+
+
+def _failed_runs():
+    return maintenance.MAINTENANCE_RUNS.values().get((maintenance.STATUS_FAILED,), 0)
+
+
+def test_run_records_each_task():
+    result = maintenance.run_maintenance(['optimize', 'quick_check'])
+    assert result['status'] == maintenance.STATUS_DONE
+    assert [task['status'] for task in result['tasks']] == [maintenance.STATUS_DONE] * 2
+
+    latest = maintenance.get_maintenance_runs(1)[0]
+    assert latest['id'] == result['id'] and latest['tasks'] == result['tasks']
+
+
+def test_a_database_error_fails_the_task_and_the_run(monkeypatch):
+    monkeypatch.setitem(maintenance.TASKS, 'analyze', _malformed)
+    failed = _failed_runs()
+
+    result = maintenance.run_maintenance(['analyze', 'quick_check'])
+    # The remaining tasks still run
+    assert [(task['status'], task['detail']) for task in result['tasks']] == [
+        (maintenance.STATUS_FAILED, "database disk image is malformed"),
+        (maintenance.STATUS_DONE, "ok"),
+    ]
+    latest = maintenance.get_maintenance_runs(1)[0]
+    assert latest['status'] == maintenance.STATUS_FAILED and latest['finished_at']
+    assert latest['tasks'] == result['tasks']
+    assert _failed_runs() == failed + 1
+
+
+def test_a_run_that_cannot_connect_is_still_finalized(monkeypatch):
+    def cannot_connect():
+        raise sqlite3.DatabaseError("file is not a database")
+
+    monkeypatch.setattr(maintenance, "get_db_connection", cannot_connect)
+    failed = _failed_runs()
+
+    with pytest.raises(sqlite3.DatabaseError):
+        maintenance.run_maintenance(['quick_check'])
+    latest = maintenance.get_maintenance_runs(1)[0]
+    assert (latest['status'], latest['tasks']) == (maintenance.STATUS_FAILED, [])
+    assert latest['finished_at'] and _failed_runs() == failed + 1
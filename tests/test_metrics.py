@@ -0,0 +1,83 @@
+"""
+Tests for metrics: the registry, the Prometheus text format and quantiles.
+"""
+
+import pytest
+
+from streamlit_app.core import metrics
+
+
+def test_metric_must_implement_samples():
+    with pytest.raises(TypeError):
+        metrics._Metric("incomplete", "No samples()")
+
+
+def test_counter_renders_each_label_combination():
+    counter = metrics.Counter("test_logins_total", "Logins", ["result"])
+    counter.inc(result="success")
+    counter.inc(2, result="failure")
+    assert counter.render() == (
+        "# HELP app_test_logins_total Logins\n"
+        "# TYPE app_test_logins_total counter\n"
+        'app_test_logins_total{result="failure"} 2\n'
+        'app_test_logins_total{result="success"} 1\n'
+    )
+
+
+def test_gauge_renders_set_values_and_functions():
+    gauge = metrics.Gauge("test_ratio", "Ratio")
+    gauge.set(0.25)
+    assert gauge.render().splitlines()[-1] == "app_test_ratio 0.25"
+
+    gauge.set_function(lambda: 7)
+    assert gauge.render().splitlines()[-1] == "app_test_ratio 7"
+    # A function returning None leaves the metric without samples
+    gauge.set_function(lambda: None)
+    assert gauge.render().count("\n") == 2
+
+
+def test_label_values_are_escaped():
+    counter = metrics.Counter("test_escaped_total", "Escaping", ["path"])
+    counter.inc(path='a"b\\c\nd')
+    assert 'path="a\\"b\\\\c\\nd"' in counter.render()
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = metrics.Histogram("test_seconds", "Durations", ["op"], buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 3.0):
+        histogram.observe(value, op="read")
+    assert histogram.render() == (
+        "# HELP app_test_seconds Durations\n"
+        "# TYPE app_test_seconds histogram\n"
+        'app_test_seconds_bucket{op="read",le="0.1"} 1\n'
+        'app_test_seconds_bucket{op="read",le="1"} 3\n'
+        'app_test_seconds_bucket{op="read",le="+Inf"} 4\n'
+        'app_test_seconds_sum{op="read"} 4.25\n'
+        'app_test_seconds_count{op="read"} 4\n'
+    )
+
+
+def test_quantile_interpolates_within_a_bucket():
+    histogram = metrics.Histogram("test_quantile_seconds", "Durations", buckets=(1.0, 2.0))
+    assert metrics.quantile({'buckets': [], 'sum': 0.0, 'count': 0}, 0.5) == 0.0
+    for value in (0.5, 1.5, 1.5, 1.5):
+        histogram.observe(value)
+    data = histogram.snapshot()[()]
+    assert metrics.quantile(data, 0.25) == pytest.approx(1.0)
+    assert metrics.quantile(data, 0.5) == pytest.approx(1 + 1 / 3)
+    assert metrics.quantile(data, 1.0) == pytest.approx(2.0)
+
+    histogram.observe(10.0)
+    # Past the last finite bucket, the estimate is that bucket's bound
+    assert metrics.quantile(histogram.snapshot()[()], 1.0) == 2.0
+
+
+def test_registry_returns_one_metric_per_name():
+    counter = metrics.counter("test_registry_total", "Registry")
+    assert metrics.counter("test_registry_total", "Registry") is counter
+    assert metrics.get_metric("test_registry_total") is counter
+    assert metrics.get_metric("app_test_registry_total") is counter
+
+    counter.inc()
+    text = metrics.render_prometheus()
+    assert "# TYPE app_test_registry_total counter\napp_test_registry_total 1\n" in text
@@ -0,0 +1,118 @@
+"""
+Tests for the outbox: claiming, backoff, recovery of stale claims and
+results that cannot be recorded. Messages go through a fake transport.
+"""
+
+import sqlite3
+import time
+
+import pytest
+
+from streamlit_app.core import outbox
+from streamlit_app.core.database import pooled_connection
+
+
+class FakeTransport(outbox.Transport):
+    """Records delivered messages; fails while `failing` is set."""
+
+    def __init__(self, failing: bool = False):
+        self.failing = failing
+        self.sent = []
+
+    def send(self, message):
+        if self.failing:
+            raise ConnectionError("gateway down")
+        self.sent.append(message['id'])
+
+
+@pytest.fixture(autouse=True)
+def empty_outbox():
+    with pooled_connection() as conn:
+        conn.execute("DELETE FROM outbox")
+
+
+def _entry(message_id):
+    with pooled_connection() as conn:
+        return dict(conn.execute("SELECT * FROM outbox WHERE id = ?", (message_id,)).fetchone())
+
+
+def test_transport_must_implement_send():
+    with pytest.raises(TypeError):
+        outbox.Transport()
+
+
+def test_drain_sends_each_message_once():
+    ids = [outbox.enqueue_message(f"m{i}.xml", "<x/>", idempotency_key=f"key-{i}")
+           for i in range(10)]
+    assert outbox.enqueue_message("m0.xml", "<x/>", idempotency_key="key-0") == ids[0]
+
+    transport = FakeTransport()
+    totals = outbox.OutboxDispatcher(transport, max_workers=2).drain()
+
+    assert totals == {'sent': 10, 'retried': 0, 'failed': 0}
+    assert sorted(transport.sent) == ids
+    assert outbox.get_outbox_counts()[outbox.STATUS_SENT] == 10
+    assert outbox.OutboxDispatcher(transport).drain() == {'sent': 0, 'retried': 0, 'failed': 0}
+
+
+def test_failed_delivery_backs_off_then_fails():
+    message_id = outbox.enqueue_message("m.xml", "<x/>")
+    dispatcher = outbox.OutboxDispatcher(
+        FakeTransport(failing=True), max_workers=1, max_attempts=2, backoff_seconds=10
+    )
+
+    before = time.time()
+    assert dispatcher.drain() == {'sent': 0, 'retried': 1, 'failed': 0}
+    entry = _entry(message_id)
+    assert entry['status'] == outbox.STATUS_PENDING
+    assert entry['attempts'] == 1
+    assert entry['next_attempt_at'] >= before + 9
+    assert "gateway down" in entry['last_error']
+
+    # Not due yet
+    assert dispatcher.drain() == {'sent': 0, 'retried': 0, 'failed': 0}
+
+    with pooled_connection() as conn:
+        conn.execute("UPDATE outbox SET next_attempt_at = 0 WHERE id = ?", (message_id,))
+    assert dispatcher.drain() == {'sent': 0, 'retried': 0, 'failed': 1}
+    assert _entry(message_id)['status'] == outbox.STATUS_FAILED
+
+    assert outbox.retry_failed_messages() == 1
+    entry = _entry(message_id)
+    assert (entry['status'], entry['attempts']) == (outbox.STATUS_PENDING, 0)
+
+
+def test_stale_claim_is_recovered():
+    message_id = outbox.enqueue_message("m.xml", "<x/>")
+    transport = FakeTransport()
+    dispatcher = outbox.OutboxDispatcher(transport, max_workers=1)
+
+    # A dispatcher claims the message and dies before sending it
+    assert [message['id'] for message in dispatcher._claim_batch()] == [message_id]
+    assert dispatcher.drain()['sent'] == 0
+
+    with pooled_connection() as conn:
+        conn.execute(
+            "UPDATE outbox SET claimed_at = ? WHERE id = ?",
+            (time.time() - outbox.CLAIM_TIMEOUT_SECONDS - 1, message_id)
+        )
+    assert dispatcher.drain()['sent'] == 1
+    assert transport.sent == [message_id]
+    assert _entry(message_id)['attempts'] == 2
+
+
+def test_unrecorded_results_are_logged_and_counted(monkeypatch, capsys):
+    message_id = outbox.enqueue_message("m.xml", "<x/>")
+    dispatcher = outbox.OutboxDispatcher(FakeTransport(), max_workers=1)
+
+    def locked(*args):
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(dispatcher, "_write_results", locked)
+    monkeypatch.setattr(outbox, "RECORD_RETRY_SECONDS", 0)
+    unrecorded = outbox.OUTBOX_UNRECORDED.get()
+
+    assert dispatcher.drain(limit=1) == {'sent': 0, 'retried': 0, 'failed': 0}
+    assert _entry(message_id)['status'] == outbox.STATUS_SENDING
+    assert outbox.OUTBOX_UNRECORDED.get() == unrecorded + 1
+    assert "will be sent again" in capsys.readouterr().out
@@ -0,0 +1,64 @@
+"""
+Tests for the login rate limiter: local buckets, the shared SQLite buckets
+and the fallback when the database is locked.
+"""
+
+import sqlite3
+
+from streamlit_app.core import rate_limit
+from streamlit_app.core.audit import flush_audit_log, get_audit_entries
+from streamlit_app.core.database import pooled_connection
+
+
+CONFIG = {
+    "login_rate_limit_backend": "sqlite",
+    "login_rate_limit_per_user": 2,
+    "login_rate_limit_user_refill_seconds": 60.0,
+    "login_rate_limit_per_client": 10,
+    "login_rate_limit_client_refill_seconds": 60.0,
+}
+
+
+def _limiter():
+    with pooled_connection() as conn:
+        conn.execute("DELETE FROM rate_limit_buckets")
+    return rate_limit.LoginRateLimiter(CONFIG)
+
+
+def test_user_bucket_runs_out():
+    limiter = _limiter()
+    assert limiter.acquire("alice", "10.0.0.1") == (0.0, None)
+    assert limiter.acquire("alice", "10.0.0.1") == (0.0, None)
+    retry_after, scope = limiter.acquire("alice", "10.0.0.1")
+    assert scope == 'user'
+    assert 0 < retry_after <= 60
+
+
+def test_shared_buckets_are_seen_by_other_processes():
+    limiter = _limiter()
+    limiter.acquire("bob", "10.0.0.2")
+    limiter.acquire("bob", "10.0.0.2")
+    # A fresh limiter stands in for another worker with empty local buckets
+    other = rate_limit.LoginRateLimiter(CONFIG)
+    assert other.acquire("bob", "10.0.0.2")[1] == 'user'
+
+
+def test_locked_database_fails_open_on_local_buckets(monkeypatch):
+    limiter = _limiter()
+
+    def locked(keys):
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(limiter, "_acquire_shared", locked)
+    errors = rate_limit.SHARED_LIMIT_ERRORS.get()
+
+    assert limiter.acquire("carol", "10.0.0.3") == (0.0, None)
+    assert rate_limit.SHARED_LIMIT_ERRORS.get() == errors + 1
+    limiter.acquire("carol", "10.0.0.3")
+    # The process's own buckets still apply
+    assert limiter.acquire("carol", "10.0.0.3")[1] == 'user'
+
+    flush_audit_log()
+    entries = get_audit_entries(action='login.rate_limit')
+    assert entries and entries[0]['target'] == "carol"
+    assert entries[0]['outcome'] == 'error'
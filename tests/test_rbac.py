@@ -0,0 +1,37 @@
+"""
+Tests for permission checks: role bits, and per-run caching of the
+session's bits and permission masks.
+"""
+
+from streamlit_app.core import rbac
+from streamlit_app.core.cache_versions import run_snapshot
+
+
+def test_builtin_roles_compile_to_bits():
+    admin = rbac.compile_user_permissions({'id': -1, 'role': 'admin'})
+    user = rbac.compile_user_permissions({'id': -1, 'role': 'user'})
+    assert admin == rbac.permission_mask(*rbac.PERMISSIONS)
+    assert user == rbac.permission_mask('messages.generate')
+
+
+def test_checks_in_a_run_compute_once(monkeypatch):
+    calls = []
+
+    def session_permissions():
+        calls.append(1)
+        return rbac.permission_mask('messages.generate')
+
+    monkeypatch.setattr(rbac, "get_session_permissions", session_permissions)
+    with run_snapshot():
+        for _ in range(4):
+            assert rbac.has_permission('messages.generate')
+            assert not rbac.has_permission('users.manage')
+        assert len(calls) == 1
+
+        # A change made by this run is seen by its next check
+        rbac.invalidate_permissions()
+        assert rbac.has_permission('messages.generate')
+        assert len(calls) == 2
+
+    rbac.has_permission('messages.generate')
+    assert len(calls) == 3
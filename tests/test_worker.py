@@ -0,0 +1,14 @@
+"""
+Tests for the worker warmup.
+"""
+
+from streamlit_app import worker
+from streamlit_app.core import metrics
+
+
+def test_warmup_exports_each_step():
+    total = worker.warm_up()
+
+    steps = metrics.get_metric(worker.WARMUP_METRIC).values()
+    assert [key[0] for key in steps] == [name for name, _ in worker.WARMUP_STEPS] + ["total"]
+    assert steps[("total",)] == total